@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Micro benchmark of the geometry kernels and of the offset and break
+pipelines which use them. Run it from the source folder:
+
+    python benchmarks/bench_geometry.py [repeat]
+
+To compare two versions, run it in a checkout of each of them.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import os
+import random
+import sys
+import tempfile
+import timeit
+from math import cos, sin, pi
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import globals.globals as g
+from globals.config import MyConfig
+
+g.folder = tempfile.mkdtemp()
+g.config = MyConfig()
+
+from core.arcgeo import ArcGeo
+from core.intersect import Intersect
+from core.layercontent import LayerContent, Layers
+from core.linegeo import LineGeo
+from core.point import Point
+from core.shape import Shape
+from core.shapeoffset import offShapeClass
+from postpro.breaks import Breaks
+
+
+def random_point(rnd):
+    return Point(rnd.uniform(-100, 100), rnd.uniform(-100, 100))
+
+
+def random_line(rnd):
+    return LineGeo(random_point(rnd), random_point(rnd))
+
+
+def random_arc(rnd):
+    O = random_point(rnd)
+    r = rnd.uniform(1, 50)
+    s_ang = rnd.uniform(-pi, pi)
+    e_ang = s_ang + rnd.uniform(0.1, 1.9 * pi)
+    Ps = Point(O.x + r * cos(s_ang), O.y + r * sin(s_ang))
+    Pe = Point(O.x + r * cos(e_ang), O.y + r * sin(e_ang))
+    return ArcGeo(Ps=Ps, Pe=Pe, O=O, r=r, s_ang=s_ang, e_ang=e_ang, direction=1)
+
+
+def polar(r, ang):
+    return Point(r * cos(ang), r * sin(ang))
+
+
+def gear(nr, teeth=40, r=50):
+    """
+    A closed shape with lines and arcs, like a gear wheel.
+    """
+    O = Point(0, 0)
+    geos = []
+    for i in range(teeth):
+        ang = 2 * pi * i / teeth
+        step = pi / teeth
+        geos.append(ArcGeo(Ps=polar(0.8 * r, ang), Pe=polar(0.8 * r, ang + step), O=O, r=0.8 * r, direction=1))
+        geos.append(LineGeo(polar(0.8 * r, ang + step), polar(r, ang + step)))
+        geos.append(ArcGeo(Ps=polar(r, ang + step), Pe=polar(r, ang + 2 * step), O=O, r=r, direction=1))
+        geos.append(LineGeo(polar(r, ang + 2 * step), polar(0.8 * r, ang + 2 * step)))
+    return Shape(nr, True, None, geos)
+
+
+def rectangle(nr, P, size):
+    points = [Point(P.x - size, P.y - size), Point(P.x + size, P.y - size),
+              Point(P.x + size, P.y + size), Point(P.x - size, P.y + size)]
+    geos = [LineGeo(points[i], points[(i + 1) % 4]) for i in range(4)]
+    return Shape(nr, True, None, geos)
+
+
+def bench(name, stmt, repeat):
+    duration = min(timeit.repeat(stmt, number=1, repeat=repeat))
+    print("%-24s %8.3f s" % (name, duration))
+
+
+def main(repeat=3):
+    rnd = random.Random(0)
+    lines = [random_line(rnd) for _ in range(300)]
+    arcs = [random_arc(rnd) for _ in range(300)]
+    points = [random_point(rnd) for _ in range(300)]
+
+    def line_point():
+        for line in lines:
+            for point in points:
+                line.distance_l_p(point)
+
+    def arc_point():
+        for arc in arcs:
+            for point in points:
+                arc.distance_a_p(point)
+
+    def line_line():
+        for line1 in lines:
+            for line2 in lines:
+                Intersect.get_intersection_point(line1, line2)
+
+    def arc_arc():
+        for arc1 in arcs:
+            for arc2 in arcs:
+                Intersect.get_intersection_point(arc1, arc2)
+
+    gears = [gear(nr) for nr in range(20)]
+
+    def offset():
+        for shape in gears:
+            offShapeClass(parent=shape, offset=2, offtype='in')
+            offShapeClass(parent=shape, offset=2, offtype='out')
+
+    # The outer arc and one flank of each tooth of the big gears are broken
+    teeth = 200
+    big_gears = [gear(nr, teeth=teeth) for nr in range(20)]
+    mill = LayerContent(0, 'MILL:0', big_gears)
+    breaks = LayerContent(1, 'BREAKS:0', [rectangle(100 + i, polar(50, (2 * i + 1.5) * pi / teeth), 0.1)
+                                          for i in range(teeth)] +
+                                         [rectangle(300 + i, polar(45, (2 * i + 1) * pi / teeth), 0.1)
+                                          for i in range(teeth)])
+    for layer in (mill, breaks):
+        for shape in layer.shapes:
+            shape.parentLayer = layer
+    layers = Layers([mill, breaks])
+
+    def break_shapes():
+        breaker = Breaks(layers)
+        for shape in big_gears:
+            breaker.getNewGeos(shape.geos)
+
+    print("%i lines, %i arcs and %i points, %i gears" % (len(lines), len(arcs), len(points), len(gears) + len(big_gears)))
+    bench("line-point distance", line_point, repeat)
+    bench("arc-point distance", arc_point, repeat)
+    bench("line-line intersect", line_line, repeat)
+    bench("arc-arc intersect", arc_arc, repeat)
+    bench("offset in and out", offset, repeat)
+    bench("breaks", break_shapes, repeat)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
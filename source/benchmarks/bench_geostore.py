@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Memory of the geometries of a shape, as they are after the import and after
+they were packed into a GeoStore (Import_Parameters compact_geometry). Run it
+from the source folder:
+
+    python benchmarks/bench_geostore.py [nr_of_geos]
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from math import cos, sin, pi
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import globals.globals as g
+from globals.config import MyConfig
+
+g.folder = tempfile.mkdtemp()
+g.config = MyConfig()
+
+from core.arcgeo import ArcGeo
+from core.entitycontent import EntityContent
+from core.linegeo import LineGeo
+from core.point import Point
+from core.shape import Geos
+
+
+def make_geos(cls, nr, parent):
+    """
+    Lines or arcs around a circle, with their absolute geometries and
+    BoundingBoxes as they are used after the import
+    """
+    geos = Geos([])
+    for i in range(nr):
+        ang1 = 2 * pi * i / nr
+        ang2 = 2 * pi * (i + 1) / nr
+        Ps = Point(100 * cos(ang1), 100 * sin(ang1))
+        Pe = Point(100 * cos(ang2), 100 * sin(ang2))
+        if cls is LineGeo:
+            geos.append(LineGeo(Ps, Pe))
+        else:
+            geos.append(ArcGeo(Ps=Ps, Pe=Pe, O=Point(0, 0), r=100, direction=1))
+    geos.make_abs_geos(parent)
+    for geo in geos.abs_iter():
+        geo.BB
+    return geos
+
+
+def measure(build):
+    """
+    @return: the memory in bytes of the result of build and the result
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main(nr=10000):
+    parent = EntityContent(nr=0, name='Entities', parent=None, p0=Point(10, 20),
+                           pb=Point(0, 0), sca=[2, 2, 1], rot=0.5)
+    print("%i geometries with absolute geometries" % nr)
+    for cls in (LineGeo, ArcGeo):
+        size, geos = measure(lambda: make_geos(cls, nr, parent))
+        packed_size, packed = measure(lambda: make_geos(cls, nr, parent).pack())
+        print("%-8s %6.0f bytes per geometry, packed %6.0f bytes (%.1fx less)"
+              % (cls.__name__, size / nr, packed_size / nr, size / packed_size))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -27,13 +27,15 @@
 from __future__ import absolute_import
 from __future__ import division
 
-from math import sqrt, sin, cos, pi, degrees, ceil, floor
+from math import sqrt, sin, cos, acos, pi, ceil, floor
+from array import array
 from copy import deepcopy
 
 
 from core.point import Point
 #from core.linegeo import LineGeo
 from core.boundingbox import BoundingBox
+from core.transform import LazyAbsGeo
 import globals.globals as g
 
 from globals.six import text_type
@@ -48,7 +50,7 @@ logger = logging.getLogger("core.arcgeo")
 
 eps=1e-12
 
-class ArcGeo(object):
+class ArcGeo(LazyAbsGeo):
     """
     Standard Geometry Item used for DXF Import of all geometries, plotting and
     G-Code export.
@@ -114,7 +116,10 @@ class ArcGeo(object):
 
         self.length = self.r * abs(self.ext)
 
-        self.calc_bounding_box()
+        # The BoundingBox is calculated when it is used first
+        self.BB_cache = None
+        # Key and vertices of the lines the arc is drawn with
+        self.polyline_cache = None
 
 
         self.abs_geo = None
@@ -169,9 +174,17 @@ class ArcGeo(object):
         """
         Calculated the BoundingBox of the geometry and saves it into self.BB
         """
+        self.BB = self.get_bounding_box()
 
-        Ps = Point(x=self.O.x - self.r, y=self.O.y - self.r)
-        Pe = Point(x=self.O.x + self.r, y=self.O.y + self.r)
+    def get_bounding_box(self):
+        """
+        @return: a new BoundingBox of the geometry
+        """
+        O = self.O
+        xmin = O.x - self.r
+        ymin = O.y - self.r
+        xmax = O.x + self.r
+        ymax = O.y + self.r
 
         # Do the calculation only for arcs have positiv extend => switch angles
         if self.ext >= 0:
@@ -183,22 +196,64 @@ class ArcGeo(object):
 
         # If the positive X Axis is crossed
         if not(self.wrap(s_ang, 0) >= self.wrap(e_ang, 1)):
-            Pe.x = max(self.Ps.x, self.Pe.x)
+            xmax = max(self.Ps.x, self.Pe.x)
 
         # If the positive Y Axis is crossed
         if not(self.wrap(s_ang - pi / 2, 0) >= self.wrap(e_ang - pi / 2, 1)):
-            Pe.y = max(self.Ps.y, self.Pe.y)
+            ymax = max(self.Ps.y, self.Pe.y)
 
         # If the negative X Axis is crossed
         if not(self.wrap(s_ang - pi, 0) >= self.wrap(e_ang - pi, 1)):
-            Ps.x = min(self.Ps.x, self.Pe.x)
+            xmin = min(self.Ps.x, self.Pe.x)
 
         # If the negative Y is crossed
         if not(self.wrap(s_ang - 1.5 * pi, 0) >=
                 self.wrap(e_ang - 1.5 * pi, 1)):
-            Ps.y = min(self.Ps.y, self.Pe.y)
+            ymin = min(self.Ps.y, self.Pe.y)
+
+        return BoundingBox.from_values(xmin, ymin, xmax, ymax)
+
+    def get_bb(self):
+        if self.BB_cache is None:
+            self.calc_bounding_box()
+        return self.BB_cache
+
+    def set_bb(self, BB):
+        self.BB_cache = BB
 
-        self.BB = BoundingBox(Ps=Ps, Pe=Pe)
+    BB = property(get_bb, set_bb)
+
+    def crosses_ray(self, point):
+        """
+        Check if the horizontal ray from point in positive x direction crosses
+        the arc an odd number of times. The arc and its chord enclose a segment
+        of the circle, so this is the case if the ray crosses the chord
+        (counted like a LineGeo) or if the point is inside that segment.
+        @param point: the start of the ray
+        @return: True if crossed an odd number of times
+        """
+        Ps = self.Ps
+        Pe = self.Pe
+        O = self.O
+        crossed = (Ps.y > point.y) != (Pe.y > point.y) and\
+            Ps.x + (point.y - Ps.y) * (Pe.x - Ps.x) / (Pe.y - Ps.y) > point.x
+
+        if (point.x - O.x) ** 2 + (point.y - O.y) ** 2 >= self.r ** 2:
+            return crossed
+
+        # A full circle has no chord
+        if abs(self.ext) >= 2 * pi - eps:
+            return not crossed
+
+        # Inside the segment if on the same side of the chord as the arc
+        mid = O.get_arc_point(self.s_ang + self.ext / 2, self.r)
+        dx = Pe.x - Ps.x
+        dy = Pe.y - Ps.y
+        side = dx * (point.y - Ps.y) - dy * (point.x - Ps.x)
+        side_mid = dx * (mid.y - Ps.y) - dy * (mid.x - Ps.x)
+        if side * side_mid > 0.0:
+            return not crossed
+        return crossed
 
     def dif_ang(self, Ps, Pe, direction):
         """
@@ -259,31 +314,21 @@ class ArcGeo(object):
         @param other: the instance of the 2nd geometry element.
         @return: The distance between the two geometries
         """
+        dis_O = self.O.distance_xy(other.x, other.y)
+        dis_min = min(other.distance_xy(self.Ps.x, self.Ps.y),
+                      other.distance_xy(self.Pe.x, self.Pe.y))
+
         # The Pont is outside of the Arc
-        if self.O.distance(other) > self.r:
+        if dis_O > self.r:
             # If the Nearest Point is on Arc Segement it is the neares one.
-            # logger.debug("Nearest Point is outside of arc")
             if self.PointAng_withinArc(other):
-                return other.distance(self.O.get_arc_point(self.O.norm_angle(other), r=self.r))
-            elif other.distance(self.Ps) < other.distance(self.Pe):
-                    return other.distance(self.Ps)
+                return dis_O - self.r
             else:
-                    return other.distance(self.Pe)
+                return dis_min
 
-        # logger.debug("Nearest Point is Inside of arc")
-        # logger.debug("self.distance(other.Ps): %s, self.distance(other.Pe): %s" %(self.distance(other.Ps),self.distance(other.Pe)))
         # The Line may be inside of the ARc or cross it
-        if other.distance(self.Ps) < other.distance(self.Pe):
-            dis_min = other.distance(self.Ps)
-            # logger.debug("Pnearest: %s, distance: %s" %(Pnearest, dis_min))
-        else:
-            dis_min = other.distance(self.Pe)
-            # logger.debug("Pnearest: %s, distance: %s" %(Pnearest, dis_min))
-
-        if ((self.PointAng_withinArc(other)) and
-            abs(self.r - self.O.distance(other)) < dis_min):
-            dis_min = abs(self.r - self.O.distance(other))
-            # logger.debug("Pnearest: %s, distance: %s" %(Pnearest, dis_min))
+        if self.PointAng_withinArc(other) and self.r - dis_O < dis_min:
+            dis_min = self.r - dis_O
 
         return dis_min
 
@@ -360,28 +405,28 @@ class ArcGeo(object):
                     y=ybase - (other.O.x - self.O.x) / \
                     (2 * pow(O_dis, 2)) * root)
 
-        Pi1.v1 = self.dif_ang(self.Ps, Pi1, self.ext) / self.ext
-        Pi1.v2 = other.dif_ang(other.Ps, Pi1, other.ext) / other.ext
+        Pi1_v1 = self.dif_ang(self.Ps, Pi1, self.ext) / self.ext
+        Pi1_v2 = other.dif_ang(other.Ps, Pi1, other.ext) / other.ext
 
         Pi2 = Point(x=xbase - (other.O.y - self.O.y) / \
                          (2 * pow(O_dis, 2)) * root,
                     y=ybase + (other.O.x - self.O.x) / \
                     (2 * pow(O_dis, 2)) * root)
 
-        Pi2.v1 = self.dif_ang(self.Ps, Pi2, self.ext) / self.ext
-        Pi2.v2 = other.dif_ang(other.Ps, Pi2, other.ext) / other.ext
+        Pi2_v1 = self.dif_ang(self.Ps, Pi2, self.ext) / self.ext
+        Pi2_v2 = other.dif_ang(other.Ps, Pi2, other.ext) / other.ext
 
 
         if type == 'TIP':
-            if ((Pi1.v1 >= 0.0 and Pi1.v1 <= 1.0 and Pi1.v2 > 0.0 and Pi1.v2 <= 1.0) and
-               (Pi2.v1 >= 0.0 and Pi2.v1 <= 1.0 and Pi2.v2 > 0.0 and Pi2.v2 <= 1.0)):
+            if ((Pi1_v1 >= 0.0 and Pi1_v1 <= 1.0 and Pi1_v2 > 0.0 and Pi1_v2 <= 1.0) and
+               (Pi2_v1 >= 0.0 and Pi2_v1 <= 1.0 and Pi2_v2 > 0.0 and Pi2_v2 <= 1.0)):
                 if (root == 0):
                     return Pi1
                 else:
                     return [Pi1, Pi2]
-            elif (Pi1.v1 >= 0.0 and Pi1.v1 <= 1.0 and Pi1.v2 > 0.0 and Pi1.v2 <= 1.0):
+            elif (Pi1_v1 >= 0.0 and Pi1_v1 <= 1.0 and Pi1_v2 > 0.0 and Pi1_v2 <= 1.0):
                 return Pi1
-            elif  (Pi2.v1 >= 0.0 and Pi2.v1 <= 1.0 and Pi2.v2 > 0.0 and Pi2.v2 <= 1.0):
+            elif  (Pi2_v1 >= 0.0 and Pi2_v1 <= 1.0 and Pi2_v2 > 0.0 and Pi2_v2 <= 1.0):
                 return Pi2
             else:
                 return None
@@ -530,6 +575,44 @@ class ArcGeo(object):
             #         elif ret=="arc":
             #             return Pnother
 
+    def get_segments(self, chord_error):
+        """
+        Number of lines which are needed to draw the arc, such that the
+        distance between the lines and the arc is at most chord_error. Each
+        line spans at most 45 degree.
+        @param chord_error: The maximum distance
+        @return: The number of lines
+        """
+        if chord_error < self.r:
+            max_ang = min(2 * acos(1 - chord_error / self.r), pi / 4)
+        else:
+            max_ang = pi / 4
+        return max(1, int(ceil(abs(self.ext) / max_ang)))
+
+    def get_polyline(self):
+        """
+        Vertices of the lines the arc is drawn with (see get_segments). They
+        are calculated once and again only if the arc or the chord error in
+        the config changed.
+        @return: array with x and y of the vertices
+        """
+        chord_error = g.config.vars.General['arc_chord_error']
+        O = self.O
+        key = (chord_error, O.x, O.y, self.r, self.s_ang, self.ext)
+        cache = self.polyline_cache
+        if cache is not None and cache[0] == key:
+            return cache[1]
+
+        segments = self.get_segments(chord_error)
+        step = self.ext / segments
+        vertices = array('d')
+        for i in range(segments + 1):
+            ang = self.s_ang + i * step
+            vertices.append(O.x + cos(ang) * self.r)
+            vertices.append(O.y + sin(ang) * self.r)
+        self.polyline_cache = (key, vertices)
+        return vertices
+
     def get_point_from_start(self, i, segments):
         ang = self.s_ang + i * self.ext / segments
         return self.O.get_arc_point(ang, self.r)
@@ -603,38 +686,37 @@ class ArcGeo(object):
 
     def isHit(self, caller, xy, tol):
         tol2 = tol**2
-        segments = int(abs(degrees(self.ext)) // 3 + 1)
-        Ps = self.O.get_arc_point(self.s_ang, self.r)
-        for i in range(1, segments + 1):
-            Pe = self.get_point_from_start(i, segments)
+        vertices = self.get_polyline()
+        Ps = Point(vertices[0], vertices[1])
+        for i in range(2, len(vertices), 2):
+            Pe = Point(vertices[i], vertices[i + 1])
             if xy.distance2_to_line(Ps, Pe) <= tol2:
                 return True
             Ps = Pe
         return False
 
-    def make_abs_geo(self, parent=None):
+    def build_abs_geo(self, transform):
         """
-        Generates the absolute geometry based on itself and the parent. This
-        is done for rotating and scaling purposes
+        Generates the absolute geometry based on itself and the Transform of
+        the parent. This is done for rotating and scaling purposes
         """
-        Ps = self.Ps.rot_sca_abs(parent=parent)
-        Pe = self.Pe.rot_sca_abs(parent=parent)
-        O = self.O.rot_sca_abs(parent=parent)
-        r = self.scaled_r(self.r, parent)
+        Ps = transform.apply(self.Ps)
+        Pe = transform.apply(self.Pe)
+        O = transform.apply(self.O)
+        r = self.r * transform.r_sca
 
         direction = 1 if self.ext > 0.0 else -1
 
-        if parent is not None and parent.sca[0] * parent.sca[1] < 0.0:
+        if transform.is_mirrored():
             direction *= -1
 
-        self.abs_geo = ArcGeo(Ps=Ps, Pe=Pe, O=O, r=r, direction=direction)
+        return ArcGeo(Ps=Ps, Pe=Pe, O=O, r=r, direction=direction)
 
     def make_path(self, caller, drawHorLine):
-        segments = int(abs(degrees(self.ext)) // 3 + 1)
-        Ps = self.O.get_arc_point(self.s_ang, self.r)
-
-        for i in range(1, segments + 1):
-            Pe = self.get_point_from_start(i, segments)
+        vertices = self.get_polyline()
+        Ps = Point(vertices[0], vertices[1])
+        for i in range(2, len(vertices), 2):
+            Pe = Point(vertices[i], vertices[i + 1])
             drawHorLine(caller, Ps, Pe)
             Ps = Pe
 
@@ -657,8 +739,7 @@ class ArcGeo(object):
         self.Ps, self.Pe = self.Pe, self.Ps
         self.s_ang, self.e_ang = self.e_ang, self.s_ang
         self.ext = -self.ext
-        if self.abs_geo:
-            self.abs_geo.reverse()
+        self.reverse_abs_geo()
 
     def scaled_r(self, r, parent):
         """
@@ -718,7 +799,10 @@ class ArcGeo(object):
 
         # logger.debug("I'm getting trimmed: %s, %s, %s, %s" % (self, Point, dir, rev_norm))
         newPoint = self.O.get_arc_point(self.O.norm_angle(Point), r=self.r)
-        new_normal = newPoint.unit_vector(self.O, r=1)
+        # Same direction as the normals of the offset segments
+        new_normal = self.O.unit_vector(newPoint, r=1)
+        if self.ext < 0:
+            new_normal = -new_normal
 
         # logger.debug(newPoint)
         [Arc1, Arc2] = self.split_into_2geos(newPoint)
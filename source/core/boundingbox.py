@@ -27,9 +27,6 @@
 from __future__ import absolute_import
 from __future__ import division
 
-from math import sqrt, sin, cos, atan2
-from copy import deepcopy
-
 from core.point import Point
 
 import logging
@@ -37,19 +34,43 @@ logger = logging.getLogger("core.boundingbox")
 
 eps=-1e-12
 
-class BoundingBox:
+class BoundingBox(object):
     """ 
     Bounding Box Class. This is the standard class which provides all std. 
-    Bounding Box methods.
+    Bounding Box methods. The box is stored as four floats, Ps and Pe are
+    created when they are accessed.
     """
-    def __init__(self, Ps=Point(0, 0), Pe=Point(0, 0), hdl=[]):
+    __slots__ = ["xmin", "ymin", "xmax", "ymax"]
+
+    def __init__(self, Ps=None, Pe=None):
         """ 
         Standard method to initialize the class
+        @param Ps: The corner with the minimum values, default the origin
+        @param Pe: The corner with the maximum values, default the origin
         """
+        if Ps is None:
+            self.xmin = self.ymin = 0.0
+        else:
+            self.xmin = Ps.x
+            self.ymin = Ps.y
+        if Pe is None:
+            self.xmax = self.ymax = 0.0
+        else:
+            self.xmax = Pe.x
+            self.ymax = Pe.y
 
-        self.Ps = Ps
-        self.Pe = Pe
-
+    @staticmethod
+    def from_values(xmin, ymin, xmax, ymax):
+        """
+        Create a Bounding Box without creating Points
+        @return: A new Bounding Box
+        """
+        BB = BoundingBox.__new__(BoundingBox)
+        BB.xmin = xmin
+        BB.ymin = ymin
+        BB.xmax = xmax
+        BB.ymax = ymax
+        return BB
 
     def __str__(self):
         """ 
@@ -60,22 +81,49 @@ class BoundingBox:
            ("\nPe : %s" % (self.Pe))
         return s
 
+    def get_Ps(self):
+        return Point(self.xmin, self.ymin)
+
+    def set_Ps(self, Ps):
+        self.xmin = Ps.x
+        self.ymin = Ps.y
+
+    def get_Pe(self):
+        return Point(self.xmax, self.ymax)
+
+    def set_Pe(self, Pe):
+        self.xmax = Pe.x
+        self.ymax = Pe.y
+
+    Ps = property(get_Ps, set_Ps)
+    Pe = property(get_Pe, set_Pe)
+
     def joinBB(self, other):
         """
         Joins two Bounding Box Classes and returns the new one
         @param other: The 2nd Bounding Box
         @return: Returns the joined Bounding Box Class
         """
+        return BoundingBox.from_values(min(self.xmin, other.xmin),
+                                       min(self.ymin, other.ymin),
+                                       max(self.xmax, other.xmax),
+                                       max(self.ymax, other.ymax))
 
-        if type(self.Ps) == type(None) or type(self.Pe) == type(None):
-            return BoundingBox(deepcopy(other.Ps), deepcopy(other.Pe))
-
-        xmin = min(self.Ps.x, other.Ps.x)
-        xmax = max(self.Pe.x, other.Pe.x)
-        ymin = min(self.Ps.y, other.Ps.y)
-        ymax = max(self.Pe.y, other.Pe.y)
-
-        return BoundingBox(Ps=Point(xmin, ymin), Pe=Point(xmax, ymax))
+    def union(self, other):
+        """
+        Joins the other Bounding Box into this one (in place)
+        @param other: The 2nd Bounding Box
+        @return: Returns itself
+        """
+        if other.xmin < self.xmin:
+            self.xmin = other.xmin
+        if other.ymin < self.ymin:
+            self.ymin = other.ymin
+        if other.xmax > self.xmax:
+            self.xmax = other.xmax
+        if other.ymax > self.ymax:
+            self.ymax = other.ymax
+        return self
 
     def hasintersection(self, other=None, tol=eps):
         """
@@ -86,10 +134,10 @@ class BoundingBox:
         if isinstance(other, Point):
             return self.pointisinBB(other, tol)
         elif isinstance(other, BoundingBox):
-            x_inter_pos = (self.Pe.x + tol > other.Ps.x) and \
-            (self.Ps.x - tol < other.Pe.x)
-            y_inter_pos = (self.Pe.y + tol > other.Ps.y) and \
-            (self.Ps.y - tol < other.Pe.y)
+            x_inter_pos = (self.xmax + tol > other.xmin) and \
+            (self.xmin - tol < other.xmax)
+            y_inter_pos = (self.ymax + tol > other.ymin) and \
+            (self.ymin - tol < other.ymax)
 
             return x_inter_pos and y_inter_pos
         else:
@@ -101,8 +149,8 @@ class BoundingBox:
         @param other: The 2nd Bounding Box
         @return: Returns true or false
         """
-        return  other.Ps.x < self.Ps.x and self.Pe.x < other.Pe.x and\
-            other.Ps.y < self.Ps.y and self.Pe.y < other.Pe.y
+        return  other.xmin < self.xmin and self.xmax < other.xmax and\
+            other.ymin < self.ymin and self.ymax < other.ymax
 
 
     def pointisinBB(self, Point=Point(), tol=eps):
@@ -111,8 +159,8 @@ class BoundingBox:
         @param Point: The Point which shall be ckecke
         @return: Returns true or false
         """
-        x_inter_pos = (self.Pe.x + tol > Point.x) and \
-        (self.Ps.x - tol < Point.x)
-        y_inter_pos = (self.Pe.y + tol > Point.y) and \
-        (self.Ps.y - tol < Point.y)
+        x_inter_pos = (self.xmax + tol > Point.x) and \
+        (self.xmin - tol < Point.x)
+        y_inter_pos = (self.ymax + tol > Point.y) and \
+        (self.ymin - tol < Point.y)
         return x_inter_pos and y_inter_pos
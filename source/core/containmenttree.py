@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Nesting of the shapes of a layer.
+
+Each shape is placed below the smallest closed shape which really contains it.
+The candidates are the shapes whose BoundingBox contains the one of the shape
+(queried from a ShapeIndex, e.g. the shared one of the MainWindow). They are
+checked with a point of the shape against the exact geometry of the candidate
+(Shape.isPointInside). The geometries of the candidates are sorted into rows
+by their height, so only the ones at the height of the point are checked.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from math import sqrt
+
+from core.shape import Shape
+from core.shapeindex import ShapeIndex
+
+
+class ContainmentTree(object):
+    """
+    Containment tree of shapes. The depth of a shape is the length of the
+    longest chain of shapes which contain it, 0 for the outermost shapes.
+    """
+    def __init__(self, shapes, index=None):
+        """
+        @param shapes: The shapes (other items, e.g. CustomGCode, are skipped)
+        @param index: ShapeIndex which contains (at least) the shapes. Shapes
+        of the index which are not part of shapes are ignored. A new index is
+        built if it is None.
+        """
+        self.shapes = [shape for shape in shapes if isinstance(shape, Shape)]
+        self.index = index
+        self.parents = {}
+        self.depths = {}
+        # Rows of the contours of the shapes which were candidates
+        self.rows = {}
+        self.build()
+
+    def build(self):
+        """
+        The shapes are handled from the largest BoundingBox to the smallest
+        one, so the depths of the possible containers are already known.
+        """
+        if self.index is None:
+            self.index = ShapeIndex(self.shapes)
+
+        def area(nr_shape):
+            BB = nr_shape[1].BB
+            return (BB.xmax - BB.xmin) * (BB.ymax - BB.ymin)
+
+        members = set(self.shapes)
+        for _, shape in sorted(enumerate(self.shapes), key=area, reverse=True):
+            point = shape.get_start_end_points(True)
+            parent = None
+            depth = 0
+            for outerShape in self.index.containing(shape):
+                if outerShape not in members:
+                    continue
+                if self.depths[outerShape] + 1 > depth and\
+                        outerShape.isPointInside(point, self.get_row(outerShape, point.y)):
+                    parent = outerShape
+                    depth = self.depths[outerShape] + 1
+            self.parents[shape] = parent
+            self.depths[shape] = depth
+
+    def get_row(self, shape, y):
+        """
+        @return: the geometries of the contour of shape whose height
+        includes y
+        """
+        rows = self.rows.get(shape)
+        if rows is None:
+            rows = self.rows[shape] = self.make_rows(shape)
+        ymin, height, geos_of_rows = rows
+        return geos_of_rows[self.row_nr(y, ymin, height, len(geos_of_rows))]
+
+    def make_rows(self, shape):
+        """
+        Sort the geometries of the contour into rows of the same height. A
+        geometry is in all the rows it reaches into.
+        """
+        contour = shape.get_contour_geos()
+        BB = shape.BB
+        nr_rows = max(1, int(sqrt(len(contour))))
+        height = (BB.ymax - BB.ymin) / nr_rows or 1.0
+        geos_of_rows = [[] for _ in range(nr_rows)]
+        for geo in contour:
+            first = self.row_nr(geo.BB.ymin, BB.ymin, height, nr_rows)
+            last = self.row_nr(geo.BB.ymax, BB.ymin, height, nr_rows)
+            for nr in range(first, last + 1):
+                geos_of_rows[nr].append(geo)
+        return BB.ymin, height, geos_of_rows
+
+    def row_nr(self, y, ymin, height, nr_rows):
+        return min(max(int((y - ymin) / height), 0), nr_rows - 1)
+
+    def get_parent(self, shape):
+        """
+        @return: The smallest shape which contains shape, None if there is none
+        """
+        return self.parents.get(shape)
+
+    def get_depth(self, shape):
+        """
+        @return: The depth of shape, 0 for items which are not in the tree
+        """
+        return self.depths.get(shape, 0)
+
+    def inside_out_order(self, items):
+        """
+        Sort the items from the innermost to the outermost ones. Items with
+        the same depth are in reversed order.
+        @param items: list of shapes and other items (e.g. CustomGCode)
+        @return: a new list
+        """
+        order = sorted(range(len(items)), key=lambda nr: (self.get_depth(items[nr]), nr))
+        return [items[nr] for nr in reversed(order)]
@@ -24,8 +24,15 @@
 #
 ############################################################################
 
+from __future__ import absolute_import
+
+from core.transform import Transform
+
 
 class EntityContent(object):
+    # Incremented each time p0, pb, sca or rot of any entity is set
+    transform_version = 0
+
     def __init__(self, nr, name, parent, p0, pb, sca, rot):
         """
         @param p0: The Starting Point to plot (Default x=0 and y=0)
@@ -43,6 +50,16 @@ class EntityContent(object):
         self.sca = sca
         self.rot = rot
 
+        self.transform = None
+        self.transform_key = None
+        self.transform_checked = -1
+        self.parent_transform = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ("p0", "pb", "sca", "rot"):
+            EntityContent.transform_version += 1
+
     def __str__(self):
         return "\nEntityContent" +\
                "\nnr :      %i" % self.nr +\
@@ -55,3 +72,30 @@ class EntityContent(object):
 
     def append(self, child):
         self.children.append(child)
+
+    def get_transform(self):
+        """
+        Get the transformation of this entity and all its parents. It is
+        calculated again if the values of an entity of the chain changed. Assign
+        new values to p0, pb, sca and rot instead of changing them in place.
+        @return: The Transform to get the absolute geometry
+        """
+        if self.transform is not None and\
+                self.transform_checked == EntityContent.transform_version:
+            return self.transform
+
+        key = (self.p0.x, self.p0.y, self.pb.x, self.pb.y,
+               self.sca[0], self.sca[1], self.rot)
+        parent_transform = None if self.parent is None else self.parent.get_transform()
+
+        if self.transform is None or key != self.transform_key or\
+                parent_transform is not self.parent_transform:
+            transform = Transform.from_insert(self.p0, self.pb, self.sca, self.rot)
+            if parent_transform is not None:
+                transform = parent_transform.compose(transform)
+            self.transform = transform
+            self.transform_key = key
+            self.parent_transform = parent_transform
+        self.transform_checked = EntityContent.transform_version
+
+        return self.transform
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Compact storage of the geometries of a shape.
+
+The vertices and values of the LineGeos and ArcGeos (and of their absolute
+geometries) are stored in arrays of a GeoStore. The geometries of the shape
+are replaced by StoredLineGeo and StoredArcGeo instances, which are thin views
+on one row of the store. Their Points are created when they are accessed.
+
+Each row has its own vertices, also where the geometries share a point. A
+Point which is assigned to a geometry is copied into its vertex (only the
+vertices of the same row are exchanged), so changing one geometry never
+moves the points of another one.
+
+The absolute geometries are stored as well. They are calculated again for the
+whole store when the Transform of the parent of the shape changed.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from array import array
+
+from core.point import Point
+from core.linegeo import LineGeo
+from core.arcgeo import ArcGeo
+from core.boundingbox import BoundingBox
+from core.transform import Transform
+
+# Integers per row of the GeoStore
+PS, PE, O, ABS_ROW, FLOATS = range(5)
+NR_INTS = 5
+# Floats of an arc, starting at its FLOATS index. Lines have none, the length
+# and the BoundingBox are calculated from the other values.
+R, S_ANG, E_ANG, EXT = range(4)
+NR_ARC_FLOATS = 4
+
+
+class GeoStore(object):
+    """
+    Struct of arrays with the geometries of one shape. Each geometry is a
+    row with the numbers of its vertices and its values.
+    """
+    def __init__(self):
+        self.coords = array('d')  # x and y of the vertices
+        self.ints = array('i')  # PS, PE, O vertex, ABS_ROW and FLOATS per row
+        self.floats = array('d')  # R, S_ANG, E_ANG and EXT per arc
+        self.drag = array('b')
+        self.geo_rows = array('i')  # rows which are not absolute geometries
+        self.abs_parent = None
+        self.abs_transform = None
+        # Cached lines of the arcs by their row (see ArcGeo.get_polyline)
+        self.polylines = {}
+
+    def pack(self, geos):
+        """
+        Store the geometries and return the views for them. Other geometries
+        than LineGeo and ArcGeo (e.g. HoleGeo) are returned unchanged.
+        @param geos: list of geometries
+        @return: list of geometries
+        """
+        packed = []
+        for geo in geos:
+            if type(geo) is LineGeo or type(geo) is ArcGeo:
+                row = self.add_row(geo)
+                self.geo_rows.append(row)
+                packed.append(self.get_geo(row))
+                if geo.abs_transform is not None:
+                    self.abs_parent = geo.abs_parent
+                    self.abs_transform = geo.abs_transform
+            else:
+                packed.append(geo)
+        return packed
+
+    def add_row(self, geo):
+        """
+        Add a row for a LineGeo or ArcGeo
+        @return: the number of the row
+        """
+        row = len(self.drag)
+        self.ints.extend((-1,) * NR_INTS)
+        self.drag.append(0)
+
+        ints = row * NR_INTS
+        if isinstance(geo, ArcGeo):
+            self.ints[ints + FLOATS] = len(self.floats)
+            self.floats.extend((0.0,) * NR_ARC_FLOATS)
+
+        self.ints[ints + PS] = self.add_vertex(geo.Ps)
+        self.ints[ints + PE] = self.add_vertex(geo.Pe)
+        if isinstance(geo, ArcGeo):
+            self.ints[ints + O] = self.add_vertex(geo.O)
+        self.set_values(row, geo)
+        if geo.abs_geo is not None:
+            self.ints[ints + ABS_ROW] = self.add_row(geo.abs_geo)
+        return row
+
+    def set_row(self, row, geo):
+        """
+        Overwrite the row of an absolute geometry with a geometry of the same
+        type.
+        """
+        ints = row * NR_INTS
+        self.set_vertex(self.ints[ints + PS], geo.Ps)
+        self.set_vertex(self.ints[ints + PE], geo.Pe)
+        if isinstance(geo, ArcGeo):
+            self.set_vertex(self.ints[ints + O], geo.O)
+        self.set_values(row, geo)
+        self.set_abs_geo(row, geo.abs_geo)
+
+    def set_values(self, row, geo):
+        if isinstance(geo, ArcGeo):
+            floats = self.ints[row * NR_INTS + FLOATS]
+            self.floats[floats + R] = geo.r
+            self.floats[floats + S_ANG] = geo.s_ang
+            self.floats[floats + E_ANG] = geo.e_ang
+            self.floats[floats + EXT] = geo.ext
+            self.drag[row] = 1 if geo.drag else 0
+
+    def add_vertex(self, point):
+        """
+        @return: the number of the new vertex with the coordinates of point
+        """
+        nr = len(self.coords) // 2
+        self.coords.append(point.x)
+        self.coords.append(point.y)
+        return nr
+
+    def set_vertex(self, nr, point):
+        self.coords[2 * nr] = point.x
+        self.coords[2 * nr + 1] = point.y
+
+    def get_abs_bb(self):
+        """
+        Join the BoundingBoxes of the absolute geometries (or of the
+        geometries which have none). The ones of the lines are taken from
+        the coordinates directly.
+        @return: a new BoundingBox, None if the store is empty
+        """
+        self.update_abs_geos()
+        ints = self.ints
+        coords = self.coords
+        inf = float('inf')
+        xmin = ymin = inf
+        xmax = ymax = -inf
+        for row in self.geo_rows:
+            abs_row = ints[row * NR_INTS + ABS_ROW]
+            if abs_row >= 0:
+                row = abs_row
+            if self.is_arc(row):
+                BB = self.get_geo(row).get_bounding_box()
+                xmin = min(xmin, BB.xmin)
+                ymin = min(ymin, BB.ymin)
+                xmax = max(xmax, BB.xmax)
+                ymax = max(ymax, BB.ymax)
+            else:
+                for vertex in (ints[row * NR_INTS + PS], ints[row * NR_INTS + PE]):
+                    x = coords[2 * vertex]
+                    y = coords[2 * vertex + 1]
+                    if x < xmin:
+                        xmin = x
+                    if x > xmax:
+                        xmax = x
+                    if y < ymin:
+                        ymin = y
+                    if y > ymax:
+                        ymax = y
+        if xmin == inf:
+            return None
+        return BoundingBox.from_values(xmin, ymin, xmax, ymax)
+
+    def is_arc(self, row):
+        return self.ints[row * NR_INTS + O] >= 0
+
+    def get_geo(self, row):
+        """
+        @return: a new view on the row
+        """
+        if self.is_arc(row):
+            return StoredArcGeo(self, row)
+        return StoredLineGeo(self, row)
+
+    def update_abs_geos(self):
+        """
+        Calculate the absolute geometries again if the Transform of the parent
+        changed since they were stored
+        @return: True if they were calculated again
+        """
+        if self.abs_parent is None:
+            return False
+        transform = self.abs_parent.get_transform()
+        if transform is self.abs_transform:
+            return False
+
+        self.abs_transform = transform
+        for row in self.geo_rows:
+            if self.ints[row * NR_INTS + ABS_ROW] >= 0:
+                self.set_abs_geo(row, self.get_geo(row).build_abs_geo(transform))
+        return True
+
+    def get_abs_geo(self, row):
+        self.update_abs_geos()
+        abs_row = self.ints[row * NR_INTS + ABS_ROW]
+        if abs_row < 0:
+            return None
+        return self.get_geo(abs_row)
+
+    def set_abs_geo(self, row, abs_geo):
+        """
+        Store the absolute geometry of a row. Its row is reused if it had one.
+        """
+        ints = row * NR_INTS
+        abs_row = self.ints[ints + ABS_ROW]
+        if abs_geo is None:
+            self.ints[ints + ABS_ROW] = -1
+        elif isinstance(abs_geo, (StoredLineGeo, StoredArcGeo)) and abs_geo.store is self:
+            self.ints[ints + ABS_ROW] = abs_geo.row
+        elif abs_row >= 0 and self.is_arc(abs_row) == isinstance(abs_geo, ArcGeo):
+            self.set_row(abs_row, abs_geo)
+        else:
+            self.ints[ints + ABS_ROW] = self.add_row(abs_geo)
+
+
+class StoredPoint(Point):
+    """
+    Point which is a vertex of a GeoStore
+    """
+    __slots__ = ["store", "nr"]
+
+    def __init__(self, store, nr):
+        self.store = store
+        self.nr = nr
+
+    def __copy__(self):
+        return Point(self.x, self.y)
+
+    def __deepcopy__(self, memo):
+        return Point(self.x, self.y)
+
+    def get_x(self):
+        return self.store.coords[2 * self.nr]
+
+    def set_x(self, x):
+        self.store.coords[2 * self.nr] = x
+
+    def get_y(self):
+        return self.store.coords[2 * self.nr + 1]
+
+    def set_y(self, y):
+        self.store.coords[2 * self.nr + 1] = y
+
+    x = property(get_x, set_x)
+    y = property(get_y, set_y)
+
+
+def int_property(index):
+    def get_vertex(self):
+        return StoredPoint(self.store, self.store.ints[self.row * NR_INTS + index])
+
+    def set_vertex(self, point):
+        store = self.store
+        ints = self.row * NR_INTS
+        if isinstance(point, StoredPoint) and point.store is store:
+            # A vertex of the same row is exchanged with this one, so that
+            # self.Ps, self.Pe = self.Pe, self.Ps swaps them
+            for other in (PS, PE, O):
+                if store.ints[ints + other] == point.nr:
+                    store.ints[ints + other] = store.ints[ints + index]
+                    store.ints[ints + index] = point.nr
+                    return
+        # Other points are copied, the vertex belongs to this row only
+        store.set_vertex(store.ints[ints + index], point)
+
+    return property(get_vertex, set_vertex)
+
+
+def float_property(index):
+    def get_value(self):
+        store = self.store
+        return store.floats[store.ints[self.row * NR_INTS + FLOATS] + index]
+
+    def set_value(self, value):
+        store = self.store
+        store.floats[store.ints[self.row * NR_INTS + FLOATS] + index] = value
+
+    return property(get_value, set_value)
+
+
+def get_bb(self):
+    # Not stored, it is calculated from the values of the row
+    return self.get_bounding_box()
+
+
+def get_line_length(self):
+    return self.Ps.distance(self.Pe)
+
+
+def get_arc_length(self):
+    return self.r * abs(self.ext)
+
+
+def set_length(self, length):
+    # Not stored, it is calculated from the values of the row
+    pass
+
+
+def get_abs_geo(self):
+    return self.store.get_abs_geo(self.row)
+
+
+def get_polyline_cache(self):
+    return self.store.polylines.get(self.row)
+
+
+def set_polyline_cache(self, cache):
+    self.store.polylines[self.row] = cache
+
+
+def set_abs_geo(self, abs_geo):
+    self.store.set_abs_geo(self.row, abs_geo)
+
+
+def make_abs_geo(self, parent=None, transform=None):
+    """
+    The absolute geometries of a store are calculated immediately, they all
+    have the same parent.
+    """
+    store = self.store
+    store.abs_parent = parent
+    store.abs_transform = Transform.of(parent) if transform is None else transform
+    self.abs_geo = self.build_abs_geo(store.abs_transform)
+
+
+def reverse_abs_geo(self):
+    # Calculated again from the already reversed geometry
+    if self.store.update_abs_geos():
+        return
+    abs_geo = self.abs_geo
+    if abs_geo is not None:
+        abs_geo.reverse()
+
+
+def unpack_abs_geo(self, geo):
+    """
+    Give the unpacked geometry geo the absolute geometry of this row
+    """
+    abs_geo = self.abs_geo
+    if abs_geo is None:
+        return
+    if self.store.abs_transform is not None:
+        geo.make_abs_geo(self.store.abs_parent, self.store.abs_transform)
+    else:
+        geo.abs_geo = abs_geo.unpack()
+
+
+class StoredLineGeo(LineGeo):
+    """
+    LineGeo which is a row of a GeoStore. Its only attributes are the store
+    and the row (LineGeo has no __slots__, so it still has a __dict__).
+    """
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __copy__(self):
+        return self.unpack()
+
+    def unpack(self):
+        """
+        @return: a LineGeo with the values of this row
+        """
+        geo = LineGeo(Point(self.Ps.x, self.Ps.y), Point(self.Pe.x, self.Pe.y))
+        unpack_abs_geo(self, geo)
+        return geo
+
+    make_abs_geo = make_abs_geo
+    reverse_abs_geo = reverse_abs_geo
+
+    Ps = int_property(PS)
+    Pe = int_property(PE)
+    length = property(get_line_length, set_length)
+    BB = property(get_bb)
+    abs_geo = property(get_abs_geo, set_abs_geo)
+
+
+class StoredArcGeo(ArcGeo):
+    """
+    ArcGeo which is a row of a GeoStore. Its only attributes are the store
+    and the row (ArcGeo has no __slots__, so it still has a __dict__).
+    """
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __copy__(self):
+        return self.unpack()
+
+    def unpack(self):
+        """
+        @return: an ArcGeo with the values of this row
+        """
+        geo = ArcGeo(Point(self.Ps.x, self.Ps.y), Point(self.Pe.x, self.Pe.y),
+                     Point(self.O.x, self.O.y), self.r, self.s_ang, self.e_ang,
+                     self.ext, self.drag)
+        # Keep the extent, it may differ in the last digits if it is
+        # calculated again
+        geo.ext = self.ext
+        geo.length = geo.r * abs(geo.ext)
+        unpack_abs_geo(self, geo)
+        return geo
+
+    make_abs_geo = make_abs_geo
+    reverse_abs_geo = reverse_abs_geo
+
+    def get_drag(self):
+        return bool(self.store.drag[self.row])
+
+    def set_drag(self, drag):
+        self.store.drag[self.row] = 1 if drag else 0
+
+    Ps = int_property(PS)
+    Pe = int_property(PE)
+    O = int_property(O)
+    r = float_property(R)
+    s_ang = float_property(S_ANG)
+    e_ang = float_property(E_ANG)
+    ext = float_property(EXT)
+    length = property(get_arc_length, set_length)
+    drag = property(get_drag, set_drag)
+    polyline_cache = property(get_polyline_cache, set_polyline_cache)
+    BB = property(get_bb)
+    abs_geo = property(get_abs_geo, set_abs_geo)
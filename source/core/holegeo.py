@@ -31,9 +31,10 @@ from math import pi
 
 from core.point import Point
 from core.boundingbox import BoundingBox
+from core.transform import LazyAbsGeo
 
 
-class HoleGeo(object):
+class HoleGeo(LazyAbsGeo):
     """
     HoleGeo represents drilling holes.
     """
@@ -65,10 +66,14 @@ class HoleGeo(object):
         @param radius: The Radius of the HoleGeo to be used for BoundingBox
         """
 
-        Ps = Point(x = self.Ps.x - radius, y = self.Ps.y - radius)
-        Pe = Point(x = self.Ps.x + radius, y = self.Ps.y + radius)
+        self.BB = BoundingBox.from_values(self.Ps.x - radius, self.Ps.y - radius,
+                                          self.Ps.x + radius, self.Ps.y + radius)
 
-        self.BB = BoundingBox(Ps = Ps, Pe = Pe)
+    def crosses_ray(self, point):
+        """
+        A hole has no contour which could be crossed
+        """
+        return False
 
     def reverse(self):
         """
@@ -76,14 +81,12 @@ class HoleGeo(object):
         """
         pass
 
-    def make_abs_geo(self, parent=None):
+    def build_abs_geo(self, transform):
         """
-        Generates the absolute geometry based on itself and the parent. This
-        is done for rotating and scaling purposes
+        Generates the absolute geometry based on itself and the Transform of
+        the parent. This is done for rotating and scaling purposes
         """
-        Ps = self.Ps.rot_sca_abs(parent=parent)
-
-        self.abs_geo = HoleGeo(Ps)
+        return HoleGeo(transform.apply(self.Ps))
 
     def get_start_end_points(self, start_point, angles=None):
         if angles is None:
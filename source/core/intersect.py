@@ -46,10 +46,10 @@ class Intersect(object):
 
     @staticmethod
     def point_belongs_to_line(point, line):
-        linex = sorted([line.Ps.x, line.Pe.x])
-        liney = sorted([line.Ps.y, line.Pe.y])
-        return (linex[0] - 1e-8 <= point.x <= linex[1] + 1e-8 and
-                liney[0] - 1e-8 <= point.y <= liney[1] + 1e-8)
+        Ps = line.Ps
+        Pe = line.Pe
+        return (min(Ps.x, Pe.x) - 1e-8 <= point.x <= max(Ps.x, Pe.x) + 1e-8 and
+                min(Ps.y, Pe.y) - 1e-8 <= point.y <= max(Ps.y, Pe.y) + 1e-8)
 
     @staticmethod
     def point_belongs_to_arc(point, arc):
@@ -61,20 +61,20 @@ class Intersect(object):
     def line_line_intersection(line1, line2):
         # based on
         # http://stackoverflow.com/questions/20677795/find-the-point-of-intersecting-lines
-        xydiff1 = line1.Ps - line1.Pe
-        xydiff2 = line2.Ps - line2.Pe
-        xdiff = (xydiff1.x, xydiff2.x)
-        ydiff = (xydiff1.y, xydiff2.y)
-
-        det = lambda a, b: a[0] * b[1] - a[1] * b[0]
-
-        div = det(xdiff, ydiff)
+        P1s, P1e = line1.Ps, line1.Pe
+        P2s, P2e = line2.Ps, line2.Pe
+        xdiff1 = P1s.x - P1e.x
+        xdiff2 = P2s.x - P2e.x
+        ydiff1 = P1s.y - P1e.y
+        ydiff2 = P2s.y - P2e.y
+
+        div = xdiff1 * ydiff2 - xdiff2 * ydiff1
         if div != 0:
-            d = (det((line1.Ps.x, line1.Ps.y), (line1.Pe.x, line1.Pe.y)),
-                 det((line2.Ps.x, line2.Ps.y), (line2.Pe.x, line2.Pe.y)))
+            d1 = P1s.x * P1e.y - P1s.y * P1e.x
+            d2 = P2s.x * P2e.y - P2s.y * P2e.x
 
-            point = Point(det(d, xdiff) / div,
-                              det(d, ydiff) / div)
+            point = Point((d1 * xdiff2 - d2 * xdiff1) / div,
+                          (d1 * ydiff2 - d2 * ydiff1) / div)
 
             if Intersect.point_belongs_to_line(point, line1) and Intersect.point_belongs_to_line(point, line2):
                 return point
@@ -115,7 +115,7 @@ class Intersect(object):
                 intersections.append(p1)
             if Intersect.point_belongs_to_arc(p2, arc) and Intersect.point_belongs_to_line(p2, line):
                 intersections.append(p2)
-            intersections.sort(key=lambda x: (refpoint - x).length_squared())
+            intersections.sort(key=refpoint.distance_squared)
             if len(intersections) > 0:
                 return intersections[0]
         return None
@@ -137,19 +137,20 @@ class Intersect(object):
             if arc1.r**2 - a**2 < 0:
                 return None
             h = sqrt(arc1.r**2 - a**2)
-            P2 = arc1.O + a * (arc2.O - arc1.O) / d
+            dx = (arc2.O.x - arc1.O.x) / d
+            dy = (arc2.O.y - arc1.O.y) / d
+            x2 = arc1.O.x + a * dx
+            y2 = arc1.O.y + a * dy
 
-            p1 = Point(P2.x + h * (arc2.O.y - arc1.O.y) / d,
-                       P2.y - h * (arc2.O.x - arc1.O.x) / d)
-            p2 = Point(P2.x - h * (arc2.O.y - arc1.O.y) / d,
-                       P2.y + h * (arc2.O.x - arc1.O.x) / d)
+            p1 = Point(x2 + h * dy, y2 - h * dx)
+            p2 = Point(x2 - h * dy, y2 + h * dx)
 
             intersections = []
             if Intersect.point_belongs_to_arc(p1, arc1) and Intersect.point_belongs_to_arc(p1, arc2):
                 intersections.append(p1)
             if Intersect.point_belongs_to_arc(p2, arc1) and Intersect.point_belongs_to_arc(p2, arc2):
                 intersections.append(p2)
-            intersections.sort(key=lambda x: (refpoint - x).length_squared())
+            intersections.sort(key=refpoint.distance_squared)
             if len(intersections) > 0:
                 return intersections[0]
             return None
@@ -31,6 +31,7 @@ from copy import deepcopy
 
 from core.point import Point
 from core.boundingbox import BoundingBox
+from core.transform import LazyAbsGeo
 #from core.arcgeo import ArcGeo
 
 import logging
@@ -39,7 +40,7 @@ logger = logging.getLogger("core.linegeo")
 eps= 1e-12
 
 
-class LineGeo(object):
+class LineGeo(LazyAbsGeo):
     """
     Standard Geometry Item used for DXF Import of all geometries, plotting and
     G-Code export.
@@ -80,10 +81,16 @@ class LineGeo(object):
         """
         Calculated the BoundingBox of the geometry and saves it into self.BB
         """
-        Ps = Point(x=min(self.Ps.x, self.Pe.x), y=min(self.Ps.y, self.Pe.y))
-        Pe = Point(x=max(self.Ps.x, self.Pe.x), y=max(self.Ps.y, self.Pe.y))
+        self.BB = self.get_bounding_box()
 
-        self.BB = BoundingBox(Ps=Ps, Pe=Pe)
+    def get_bounding_box(self):
+        """
+        @return: a new BoundingBox of the geometry
+        """
+        Ps = self.Ps
+        Pe = self.Pe
+        return BoundingBox.from_values(min(Ps.x, Pe.x), min(Ps.y, Pe.y),
+                                       max(Ps.x, Pe.x), max(Ps.y, Pe.y))
 
     def colinear(self, other):
         """
@@ -102,6 +109,20 @@ class LineGeo(object):
         else:
             logger.debug("Unsupported instance: %s" % type(other))
 
+    def crosses_ray(self, point):
+        """
+        Check if the horizontal ray from point in positive x direction crosses
+        the line. The start of the ray and the upper end of the line are
+        excluded, so a ray through a vertex is counted once.
+        @param point: the start of the ray
+        @return: True if crossed
+        """
+        Ps = self.Ps
+        Pe = self.Pe
+        if (Ps.y > point.y) == (Pe.y > point.y):
+            return False
+        return Ps.x + (point.y - Ps.y) * (Pe.x - Ps.x) / (Pe.y - Ps.y) > point.x
+
     def colinearoverlapping(self, other):
         """
         Check if the lines are colinear overlapping
@@ -246,38 +267,36 @@ class LineGeo(object):
         @param Point: the Point
         @return: The shortest distance between the Point and Line
         """
-        d = self.Pe - self.Ps
-        v = Point - self.Ps
+        Ps = self.Ps
+        Pe = self.Pe
+        dx = Pe.x - Ps.x
+        dy = Pe.y - Ps.y
+        vx = Point.x - Ps.x
+        vy = Point.y - Ps.y
 
-        t = d.dotProd(v)
+        t = dx * vx + dy * vy
 
         if t <= 0:
             # our Point is lying "behind" the segment
             # so end Point 1 is closest to Point and distance is length of
             # vector from end Point 1 to Point.
-            return self.Ps.distance(Point)
-        elif t >= d.dotProd(d):
+            return Ps.distance_xy(Point.x, Point.y)
+
+        dd = dx * dx + dy * dy
+        if t >= dd:
             # our Point is lying "ahead" of the segment
             # so end Point 2 is closest to Point and distance is length of
             # vector from end Point 2 to Point.
-            return self.Pe.distance(Point)
+            return Pe.distance_xy(Point.x, Point.y)
         else:
             # our Point is lying "inside" the segment
             # i.e.:a perpendicular from it to the line that contains the line
             # segment has an end Point inside the segment
-            # logger.debug(v.dotProd(v))
-            # logger.debug(d.dotProd(d))
-            # logger.debug(v.dotProd(v) - (t*t)/d.dotProd(d))
-            #logger.debug(d.dotProd(d))
-            #logger.debug(v.dotProd(v) - (t * t) / d.dotProd(d))
-            #logger.debug(eps)
-            #logger.debug((v.dotProd(v) - (t * t) / d.dotProd(d))< eps)
-            #logger.debug(((v.dotProd(v) - (t * t) / d.dotProd(d))< eps))
-
-            if (v.dotProd(v) - (t * t) / d.dotProd(d)) < eps:
+            dist2 = vx * vx + vy * vy - (t * t) / dd
+            if dist2 < eps:
                 return 0.0
             else:
-                return sqrt(v.dotProd(v) - (t * t) / d.dotProd(d));
+                return sqrt(dist2)
 
     def find_inter_point(self, other, type='TIP'):
         """
@@ -379,19 +398,19 @@ class LineGeo(object):
         Pi2 = Point(x=self.Ps.x + v2 * Ldx,
                y=self.Ps.y + v2 * Ldy)
 
-        Pi1.v = Arc.dif_ang(Arc.Ps, Pi1, Arc.ext) / Arc.ext
-        Pi2.v = Arc.dif_ang(Arc.Ps, Pi2, Arc.ext) / Arc.ext
+        Pi1_v = Arc.dif_ang(Arc.Ps, Pi1, Arc.ext) / Arc.ext
+        Pi2_v = Arc.dif_ang(Arc.Ps, Pi2, Arc.ext) / Arc.ext
 
         if type == 'TIP':
-            if ((Pi1.v >= 0.0 and Pi1.v <= 1.0 and self.intersect(Pi1)) and
-               (Pi1.v >= 0.0 and Pi2.v <= 1.0 and self.intersect(Pi2))):
+            if ((Pi1_v >= 0.0 and Pi1_v <= 1.0 and self.intersect(Pi1)) and
+               (Pi1_v >= 0.0 and Pi2_v <= 1.0 and self.intersect(Pi2))):
                 if (root == 0):
                     return Pi1
                 else:
                     return [Pi1, Pi2]
-            elif (Pi1.v >= 0.0 and Pi1.v <= 1.0 and self.intersect(Pi1)):
+            elif (Pi1_v >= 0.0 and Pi1_v <= 1.0 and self.intersect(Pi1)):
                 return Pi1
-            elif  (Pi1.v >= 0.0 and Pi2.v <= 1.0 and self.intersect(Pi2)):
+            elif  (Pi1_v >= 0.0 and Pi2_v <= 1.0 and self.intersect(Pi2)):
                 return Pi2
             else:
                 return None
@@ -628,15 +647,12 @@ class LineGeo(object):
         else:
             return [self, other]
 
-    def make_abs_geo(self, parent=None):
+    def build_abs_geo(self, transform):
         """
-        Generates the absolute geometry based on itself and the parent. This
-        is done for rotating and scaling purposes
+        Generates the absolute geometry based on itself and the Transform of
+        the parent. This is done for rotating and scaling purposes
         """
-        Ps = self.Ps.rot_sca_abs(parent=parent)
-        Pe = self.Pe.rot_sca_abs(parent=parent)
-
-        self.abs_geo = LineGeo(Ps=Ps, Pe=Pe)
+        return LineGeo(Ps=transform.apply(self.Ps), Pe=transform.apply(self.Pe))
 
     def make_path(self, caller, drawHorLine):
         drawHorLine(caller, self.Ps, self.Pe)
@@ -663,8 +679,7 @@ class LineGeo(object):
         Reverses the direction of the arc (switch direction).
         """
         self.Ps, self.Pe = self.Pe, self.Ps
-        if self.abs_geo:
-            self.abs_geo.reverse()
+        self.reverse_abs_geo()
 
     def split_into_2geos(self, ipoint=Point()):
         """
@@ -27,7 +27,7 @@
 from __future__ import absolute_import
 from __future__ import division
 
-from math import sqrt, sin, cos, atan2
+from math import sqrt, sin, cos, atan2, hypot
 
 
 from core.point3d import Point3D
@@ -37,8 +37,7 @@ import logging
 logger = logging.getLogger("core.point")
 
 class Point(object):
-    #__slots__ = ["x", "y"]
-    # __slots__ = ["x", "y"]  # TODO: currently not possible because of cutter compensation stuff located in here
+    __slots__ = ["x", "y"]
     eps=1e-12
 
     def __init__(self, x=0, y=0):
@@ -94,7 +93,7 @@ class Point(object):
         Implemnetaion of Point negation
         @return: Returns a new Point which is negated
         """
-        return -1.0 * self
+        return Point(-self.x, -self.y)
 
     def __add__(self, other):  # add to another Point
         """
@@ -135,7 +134,7 @@ class Point(object):
         @param other: The other Point which shall be subtracted
         @return: Returns a new Point
         """
-        return self + -other
+        return Point(self.x - other.x, self.y - other.y)
 
     def __rmul__(self, other):
         """
@@ -170,6 +169,15 @@ class Point(object):
     def tr(self, message):
         return message
 
+    def add_scaled(self, other, factor):
+        """
+        Same as self + other * factor, without the intermediate Point
+        @param other: The Point (vector) which shall be scaled and added
+        @param factor: The real value other is multiplied by
+        @return: Returns a new Point
+        """
+        return Point(self.x + other.x * factor, self.y + other.y * factor)
+
     def between(self, B, C):
         """
         is c between a and b?     // Reference: O' Rourke p. 32
@@ -209,6 +217,15 @@ class Point(object):
         else:
             return 0
 
+    def cross_z(self, other):
+        """
+        Returns the z value of the cross product of the two vectors, which is
+        positive if other is counterclockwise of self
+        @param other: The 2nd Point
+        @return: The z value of the cross product
+        """
+        return self.x * other.y - self.y * other.x
+
     def cross_product(self, other):
         """
         Returns the cross Product of two points
@@ -231,23 +248,44 @@ class Point(object):
     def distance(self, other=None):
         """Returns distance between two given points"""
         if other is None:
-            other = Point(x=0.0, y=0.0)
+            return hypot(self.x, self.y)
         if not isinstance(other, Point):
             return other.distance(self)
-        return (self - other).length()
+        return hypot(self.x - other.x, self.y - other.y)
+
+    def distance_xy(self, x, y):
+        """
+        Returns the distance to the point given by its coordinates
+        @param x: The x value of the other point
+        @param y: The y value of the other point
+        @return: The distance
+        """
+        return hypot(self.x - x, self.y - y)
+
+    def distance_squared(self, other):
+        """
+        Returns the squared distance between two given points, which is enough
+        to compare distances
+        @param other: The other Point
+        @return: The squared distance
+        """
+        dx = self.x - other.x
+        dy = self.y - other.y
+        return dx * dx + dy * dy
 
     def distance2_to_line(self, Ps, Pe):
-        dLine = Pe - Ps
+        dx = Pe.x - Ps.x
+        dy = Pe.y - Ps.y
 
-        u = ((self.x - Ps.x) * dLine.x + (self.y - Ps.y) * dLine.y) / dLine.length_squared()
+        u = ((self.x - Ps.x) * dx + (self.y - Ps.y) * dy) / (dx * dx + dy * dy)
         if u > 1.0:
             u = 1.0
         elif u < 0.0:
             u = 0.0
 
-        closest = Ps + u * dLine
-        diff = closest - self
-        return diff.length_squared()
+        dx = Ps.x + u * dx - self.x
+        dy = Ps.y + u * dy - self.y
+        return dx * dx + dy * dy
 
     def dotProd(self, P2):
         """
@@ -276,8 +314,10 @@ class Point(object):
         @param r: The length of the normal (-length for other direction)
         @return: Returns the Normal Vector
         """
-        unit_vector = self.unit_vector(other)
-        return Point(x=unit_vector.y * r, y=-unit_vector.x * r)
+        dx = other.x - self.x
+        dy = other.y - self.y
+        l = hypot(dx, dy)
+        return Point(x=dy / l * r, y=-dx / l * r)
 
     def get_nearest_point(self, points):
         """
@@ -307,8 +347,8 @@ class Point(object):
 
     def norm_angle(self, other=None):
         """Returns angle between two given points"""
-        if type(other) == type(None):
-            other = Point(x=0.0, y=0.0)
+        if other is None:
+            return atan2(-self.y, -self.x)
         return atan2(other.y - self.y, other.x - self.x)
 
     def rot_sca_abs(self, sca=None, p0=None, pb=None, rot=None, parent=None):
@@ -323,19 +363,8 @@ class Point(object):
         @return: A new Point which is absolute position
         """
         if sca is None and parent is not None:
-            p0 = parent.p0
-            pb = parent.pb
-            sca = parent.sca
-            rot = parent.rot
-
-            pc = self - pb
-            rotx = (pc.x * cos(rot) + pc.y * -sin(rot)) * sca[0]
-            roty = (pc.x * sin(rot) + pc.y * cos(rot)) * sca[1]
-            p1 = Point(rotx, roty) + p0
-
-            # Recursive loop if the point self is  introduced
-            if parent.parent is not None:
-                p1 = p1.rot_sca_abs(parent=parent.parent)
+            # The transformation of all the parents is cached by the parent
+            p1 = parent.get_transform().apply(self)
 
         elif parent is None and sca is None:
             p0 = Point()
@@ -414,9 +443,10 @@ class Point(object):
         if Pto is None:
             return self / self.length()
         else:
-            diffVec = Pto - self
-            l = diffVec.distance()
-            return Point(diffVec.x / l * r, diffVec.y / l * r)
+            dx = Pto.x - self.x
+            dy = Pto.y - self.y
+            l = hypot(dx, dy)
+            return Point(dx / l * r, dy / l * r)
 
     def within_tol(self, other, tol):
         """
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2008-2015
+#    Christian Kohlöffel
+#    Vinzenz Schulz
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+from __future__ import absolute_import
+from __future__ import division
+
+from core.point import Point
+from core.transform import Transform
+
+
+class RapidPos(Point):
+    """
+    RapidPos represents a rapid move (G0) to a position in the plane.
+    """
+    def __init__(self, point):
+        Point.__init__(self, point.x, point.y)
+        self.abs_geo = None
+
+    def get_start_end_points(self, start_point, angles=None):
+        if angles is None:
+            return self
+        elif angles:
+            return self, 0
+        else:
+            return self, Point(0, -1) if start_point else Point(0, -1)
+
+    def make_abs_geo(self, parent=None, transform=None):
+        """
+        Generates the absolute geometry based on itself and the parent. This
+        is done for rotating and scaling purposes
+        @param transform: The Transform of the parent, if already known
+        """
+        if transform is None:
+            transform = Transform.of(parent)
+        self.abs_geo = RapidPos(transform.apply(self))
+
+    def make_path(self, caller, drawHorLine):
+        pass
+
+    def Write_GCode(self, PostPro):
+        """
+        Writes the GCODE for a rapid position.
+        @param PostPro: The PostProcessor instance to be used
+        @return: Returns the string to be written to a file.
+        """
+        return PostPro.rap_pos_xy(self)
@@ -36,6 +36,10 @@ from core.point import Point
 from core.linegeo import LineGeo
 from core.arcgeo import ArcGeo
 from core.holegeo import HoleGeo
+from core.rapidpos import RapidPos
+from core.geostore import GeoStore, StoredLineGeo, StoredArcGeo
+from core.boundingbox import BoundingBox
+from core.transform import Transform
 
 from globals.six import text_type
 import globals.constants as c
@@ -44,6 +48,9 @@ if c.PYQT5notPYQT4:
 else:
     from PyQt4 import QtCore
 
+# Number of start moves (with different parameters) kept for each shape
+STMOVE_CACHE_SIZE = 4
+
 logger = logging.getLogger("Core.Shape")
 
 
@@ -52,6 +59,13 @@ class Shape(object):
     The Shape Class includes all plotting, GUI functionality and export functions
     related to the Shapes.
     """
+    # The BoundingBox of the absolute geometries and what it was calculated for
+    BB_cache = None
+    BB_key = None
+    # Incremented each time the BoundingBox of any shape changed (e.g. for the
+    # ShapeIndex)
+    BB_version = 0
+
     # only need default arguments here because of the change of usage with super in QGraphicsItem
     def __init__(self, nr=-1, closed=True, parentEntity=None, geos=[]):
         if nr == -1:
@@ -71,6 +85,11 @@ class Shape(object):
 
         self.stmove = None
 
+        # Start moves which were already calculated, see get_stmove_data
+        self.geos_version = 0
+        self.stmove_cache = {}
+        self.stmove_cache_geos = None
+
         self.send_to_TSP = g.config.vars.Route_Optimisation['default_TSP']
 
         self.selected = False
@@ -184,6 +203,7 @@ class Shape(object):
 
             # Overwrite the geometries in changed order.
             self.geos = Geos(self.geos[min_geo_nr:] + self.geos[:min_geo_nr])
+            self.geos_version += 1
 
             start = self.get_start_end_points(True)
             logger.debug(self.tr("New Start Point: %s" % start))
@@ -195,6 +215,8 @@ class Shape(object):
         for geo in geos:
             geo.reverse()
         self.cw = not self.cw
+        if geos is self.geos:
+            self.geos_version += 1
 
     def switch_cut_cor(self):
         """
@@ -211,6 +233,44 @@ class Shape(object):
     def append(self, geo):
         geo.make_abs_geo(self.parentEntity)
         self.geos.append(geo)
+        self.geos_version += 1
+
+    def get_stmove_key(self):
+        """
+        The parameters on which the start move of the shape depends, besides
+        its geometry
+        @return: A tuple
+        """
+        cutter_compensation = g.config.vars.Cutter_Compensation
+        return (self.cut_cor, self.parentLayer.getToolRadius(),
+                self.parentLayer.start_radius, g.config.machine_type,
+                self.drag_angle, cutter_compensation['done_by_machine'],
+                cutter_compensation['pocketing'],
+                cutter_compensation['pocket_stepover'])
+
+    def get_stmove_data(self):
+        """
+        Returns the start move which was already calculated for the current
+        parameters, e.g. when the cutter compensation is switched back. All
+        the start moves are forgotten once the geometry (geos_version) or the
+        transformation of the parent changed.
+        @return: The data for StMove (see pack_geos) or None
+        """
+        geos_key = (self.geos_version, Transform.of(self.parentEntity))
+        if self.stmove_cache_geos != geos_key:
+            self.stmove_cache = {}
+            self.stmove_cache_geos = geos_key
+        return self.stmove_cache.get(self.get_stmove_key())
+
+    def set_stmove_data(self, data):
+        """
+        Stores the start move calculated for the current parameters. Only a
+        few sets of parameters are kept.
+        @param data: The data for StMove (see pack_geos)
+        """
+        if len(self.stmove_cache) >= STMOVE_CACHE_SIZE:
+            del self.stmove_cache[next(iter(self.stmove_cache))]
+        self.stmove_cache[self.get_stmove_key()] = data
 
     def get_start_end_points_physical(self, start_point=None, angles=None):
         """
@@ -261,12 +321,35 @@ class Shape(object):
 
     def calc_bounding_box(self):
         """
-        Calculated the BoundingBox of the geometry and saves it into self.BB
+        Calculated the BoundingBox of the geometry and saves it into self.BB.
+        It is kept until the geometries or the Transform of the parent change.
         """
-        self.BB = self.geos.abs_el(0).BB
-        for geo in self.geos.abs_iter():
-            self.BB = self.BB.joinBB(geo.BB)
-        
+        self.set_bb(self.geos.abs_bounding_box())
+
+    def get_bb_key(self):
+        return self.geos, len(self.geos), Transform.of(self.parentEntity)
+
+    def get_bb(self):
+        key = self.BB_key
+        if key is None or self.BB_cache is None:
+            self.calc_bounding_box()
+        else:
+            geos, nr_geos, transform = key
+            if geos is not self.geos or nr_geos != len(geos) or\
+                    transform is not Transform.of(self.parentEntity):
+                self.calc_bounding_box()
+        return self.BB_cache
+
+    def set_bb(self, BB):
+        old_BB = self.BB_cache
+        if old_BB is None or (old_BB.xmin, old_BB.ymin, old_BB.xmax, old_BB.ymax) !=\
+                (BB.xmin, BB.ymin, BB.xmax, BB.ymax):
+            Shape.BB_version += 1
+        self.BB_cache = BB
+        self.BB_key = self.get_bb_key()
+
+    BB = property(get_bb, set_bb)
+
     def make_shape_ccw(self):
         """ 
         This method is called after the shape has been generated before it gets
@@ -284,15 +367,86 @@ class Shape(object):
             logger.debug(self.tr("Had to reverse the shape to be CW"))
         self.cw = True
     
+    def get_contour_geos(self):
+        """
+        The absolute geometries of the closed contour. Gaps between them
+        (e.g. a contour which was found with a tolerance) are closed by lines,
+        as they are by the tool.
+        @return: list of geometries
+        """
+        contour = []
+        Pe = self.geos.abs_el(-1).get_start_end_points(False)
+        for geo in self.geos.abs_iter():
+            Ps = geo.get_start_end_points(True)
+            if Ps.x != Pe.x or Ps.y != Pe.y:
+                contour.append(LineGeo(Point(Pe.x, Pe.y), Point(Ps.x, Ps.y)))
+            contour.append(geo)
+            Pe = geo.get_start_end_points(False)
+        return contour
+
+    def isPointInside(self, point, contour=None):
+        """
+        Crossing number test of the point against the absolute geometries. Arcs
+        are not approximated by lines.
+        @param point: the Point to be checked
+        @param contour: the geometries to be checked if not all of
+        get_contour_geos are needed (e.g. only the ones at the height of point)
+        @return: True if the point is inside the closed shape
+        """
+        if not self.closed:
+            return False
+        if contour is None:
+            contour = self.get_contour_geos()
+        inside = False
+        for geo in contour:
+            if geo.crosses_ray(point):
+                inside = not inside
+        return inside
+
+    def distance_to_point(self, point):
+        """
+        Exact minimal distance between the point and the absolute geometries.
+        Holes are drawn as circles with the radius of the tool. Geometries
+        whose BoundingBox is farther away than the nearest one found so far
+        are skipped.
+        @param point: the Point
+        @return: the distance, infinite for a shape without geometries
+        """
+        x = point.x
+        y = point.y
+        min_distance = float('inf')
+        for geo in self.geos.abs_iter():
+            BB = geo.BB
+            dx = max(BB.xmin - x, 0.0, x - BB.xmax)
+            dy = max(BB.ymin - y, 0.0, y - BB.ymax)
+            if dx * dx + dy * dy >= min_distance * min_distance:
+                continue
+            if isinstance(geo, HoleGeo):
+                distance = abs(geo.Ps.distance(point) - self.parentLayer.getToolRadius())
+            else:
+                distance = geo.distance(point)
+            if distance < min_distance:
+                min_distance = distance
+        return min_distance
+
     def isHit(self, xy, tol):
-        if self.BB.Ps.x - tol <= xy.x <= self.BB.Pe.x + tol\
-                and self.BB.Ps.y - tol <= xy.y <= self.BB.Pe.y + tol:
-            for geo in self.geos.abs_iter():
-                if geo.isHit(self, xy, tol):
-                    return True
+        BB = self.BB
+        if BB.xmin - tol <= xy.x <= BB.xmax + tol\
+                and BB.ymin - tol <= xy.y <= BB.ymax + tol:
+            return self.distance_to_point(xy) <= tol
         return False
 
     def Write_GCode_for_geo(self, geo, PostPro):
+        # Rapid moves within the geometries (e.g. between the rings of a
+        # pocket) are done above the workpiece
+        if isinstance(geo, RapidPos):
+            mom_depth = PostPro.ze
+            return (PostPro.chg_feed_rate(self.f_g1_depth) +
+                    PostPro.lin_pol_z(self.axis3_start_mill_depth + abs(self.parentLayer.axis3_safe_margin)) +
+                    geo.Write_GCode(PostPro) +
+                    PostPro.lin_pol_z(mom_depth) +
+                    PostPro.chg_feed_rate(self.f_g1_plane))
+
         # Used to remove zero length geos. If not, arcs can become a full circle
         post_dec = PostPro.vars.Number_Format["post_decimals"]
         if isinstance(geo, HoleGeo) or\
@@ -400,6 +554,13 @@ class Shape(object):
             if mom_depth < depth:
                 mom_depth = depth
 
+            # A pocket ends at its outer ring, so the tool goes back to the
+            # start in the middle above the workpiece
+            if self.stmove.pocket:
+                exstr += PostPro.chg_feed_rate(f_g1_depth)
+                exstr += PostPro.lin_pol_z(workpiece_top_Z + abs(safe_margin))
+                exstr += self.stmove.geos.abs_el(0).Write_GCode(PostPro)
+
             # Erneutes Eintauchen
             exstr += PostPro.chg_feed_rate(f_g1_depth)
             exstr += PostPro.lin_pol_z(mom_depth)
@@ -571,7 +732,8 @@ class Shape(object):
                     new_geos[0] = joined_geos[0]
                     new_geos.pop()
 
-        self.geos = new_geos
+        self.geos = Geos(new_geos)
+        self.geos_version += 1
 class Geos(list):
     def __init__(self, *args):
         list.__init__(self, *args)
@@ -579,8 +741,48 @@ class Geos(list):
     def abs_iter(self):
         for geo in list.__iter__(self):
             yield geo.abs_geo if geo.abs_geo else geo
-        else:
-            raise StopIteration()
 
     def abs_el(self, element):
         return self[element].abs_geo if self[element].abs_geo else self[element]
+
+    def abs_bounding_box(self):
+        """
+        Joins the BoundingBoxes of the absolute geometries in one pass. The
+        ones of a GeoStore are read from its floats.
+        @return: A new BoundingBox
+        """
+        BB = None
+        stores = []
+        for geo in list.__iter__(self):
+            if isinstance(geo, (StoredLineGeo, StoredArcGeo)):
+                if geo.store in stores:
+                    continue
+                stores.append(geo.store)
+                geo_BB = geo.store.get_abs_bb()
+            else:
+                geo_BB = (geo.abs_geo or geo).BB
+            if BB is None:
+                BB = BoundingBox.from_values(geo_BB.xmin, geo_BB.ymin,
+                                             geo_BB.xmax, geo_BB.ymax)
+            else:
+                BB.union(geo_BB)
+        return BB if BB is not None else BoundingBox()
+
+    def make_abs_geos(self, parent=None):
+        """
+        Generates the absolute geometries of all the geos. The transformation
+        of the parent is only determined once.
+        @param parent: The parent of the geos (EntityContent)
+        """
+        transform = Transform.of(parent)
+        for geo in list.__iter__(self):
+            geo.make_abs_geo(parent, transform)
+
+    def pack(self):
+        """
+        Move the LineGeos and ArcGeos (and their absolute geometries) into
+        one GeoStore. They are replaced by views on its rows, which need much
+        less memory.
+        @return: Geos with the views
+        """
+        return Geos(GeoStore().pack(self))
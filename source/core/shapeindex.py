@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Spatial index over the shapes.
+
+The BoundingBoxes of the shapes are stored in a static R-tree, which is
+packed with the Sort-Tile-Recursive (STR) algorithm. Queries only visit the
+nodes whose boxes overlap the searched area, instead of comparing all the
+shapes with each other.
+
+The tree is built when it is queried first. It is built again when the
+BoundingBox of a shape or the Transform of an entity changed since then.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from math import ceil, sqrt
+import heapq
+
+from core.shape import Shape
+from core.entitycontent import EntityContent
+
+# Values of a node: its box, its children (nodes or entries) and if it is a
+# leaf. Entries only have the box and (nr, shape) as ITEMS.
+XMIN, YMIN, XMAX, YMAX, ITEMS, LEAF = range(6)
+
+
+class ShapeIndex(object):
+    """
+    R-tree with the BoundingBoxes of shapes. The results of the queries are
+    sorted in the order the shapes were given.
+    """
+    def __init__(self, shapes=(), node_size=16):
+        """
+        @param shapes: The shapes to be indexed
+        @param node_size: The maximum number of children of a node
+        """
+        self.shapes = list(shapes)
+        self.node_size = node_size
+        self.root = None
+        self.version = None
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def set_shapes(self, shapes):
+        self.shapes = list(shapes)
+        self.invalidate()
+
+    def add(self, shape):
+        self.shapes.append(shape)
+        self.invalidate()
+
+    def remove(self, shape):
+        self.shapes.remove(shape)
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        Build the tree again when it is queried next
+        """
+        self.root = None
+
+    def get_version(self):
+        return Shape.BB_version, EntityContent.transform_version
+
+    def get_root(self):
+        if self.root is None or self.version != self.get_version():
+            self.build()
+        return self.root
+
+    def build(self):
+        """
+        Pack the BoundingBoxes of the shapes into the tree, level by level.
+        Entries are [xmin, ymin, xmax, ymax, (nr, shape)].
+        """
+        level = []
+        for nr, shape in enumerate(self.shapes):
+            BB = shape.BB
+            level.append([BB.xmin, BB.ymin, BB.xmax, BB.ymax, (nr, shape)])
+
+        leaf = True
+        while level and (leaf or len(level) > 1):
+            level = [self.make_node(items, leaf) for items in self.tiles(level)]
+            leaf = False
+
+        self.root = level[0] if level else None
+        # Reading the BoundingBoxes may calculate them again
+        self.version = self.get_version()
+
+    def tiles(self, items):
+        """
+        Sort-Tile-Recursive: the items are sorted by their x center into
+        vertical slices, which are sorted by their y center and split into
+        groups of node_size items
+        """
+        size = self.node_size
+        nr_slices = int(ceil(sqrt(ceil(len(items) / size))))
+        slice_size = size * nr_slices
+        items = sorted(items, key=lambda item: item[XMIN] + item[XMAX])
+        for start in range(0, len(items), slice_size):
+            slice_ = sorted(items[start:start + slice_size],
+                            key=lambda item: item[YMIN] + item[YMAX])
+            for group in range(0, len(slice_), size):
+                yield slice_[group:group + size]
+
+    def make_node(self, items, leaf):
+        return [min(item[XMIN] for item in items),
+                min(item[YMIN] for item in items),
+                max(item[XMAX] for item in items),
+                max(item[YMAX] for item in items),
+                items, leaf]
+
+    def search(self, xmin, ymin, xmax, ymax, contained=False):
+        """
+        @param contained: Only the entries which contain the area
+        @return: the entries of the leaves which overlap (or contain) the
+        area, the boundaries included
+        """
+        root = self.get_root()
+        if root is None:
+            return []
+        found = []
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            if node[XMIN] > xmax or node[XMAX] < xmin or\
+                    node[YMIN] > ymax or node[YMAX] < ymin:
+                continue
+            if not node[LEAF]:
+                nodes.extend(node[ITEMS])
+                continue
+            for item in node[ITEMS]:
+                if contained:
+                    if item[XMIN] <= xmin and xmax <= item[XMAX] and\
+                            item[YMIN] <= ymin and ymax <= item[YMAX]:
+                        found.append(item[ITEMS])
+                elif not (item[XMIN] > xmax or item[XMAX] < xmin or
+                          item[YMIN] > ymax or item[YMAX] < ymin):
+                    found.append(item[ITEMS])
+        found.sort(key=lambda nr_shape: nr_shape[0])
+        return found
+
+    def intersecting(self, BB, tol=0.0):
+        """
+        @param BB: The BoundingBox to be searched
+        @param tol: The tolerance by which the BoundingBox is enlarged
+        @return: The shapes whose BoundingBox overlaps BB
+        """
+        return [shape for _, shape in self.search(BB.xmin - tol, BB.ymin - tol,
+                                                   BB.xmax + tol, BB.ymax + tol)]
+
+    def at_point(self, point, tol=0.0):
+        """
+        @return: The shapes whose BoundingBox contains the point (within tol)
+        """
+        return [shape for _, shape in self.search(point.x - tol, point.y - tol,
+                                                   point.x + tol, point.y + tol)]
+
+    def containing(self, shape):
+        """
+        Same as BoundingBox.iscontained for all the other shapes
+        @return: The shapes whose BoundingBox contains the one of the shape
+        (without touching it)
+        """
+        BB = shape.BB
+        return [outerShape for _, outerShape
+                in self.search(BB.xmin, BB.ymin, BB.xmax, BB.ymax, True)
+                if outerShape is not shape and BB.iscontained(outerShape.BB)]
+
+    def nearest(self, point, distance=None, accept=None):
+        """
+        Best first search for the shape next to the point
+        @param distance: Function (shape, point) which returns the exact
+        distance. It must not be smaller than the distance to the BoundingBox
+        of the shape. Without it the distance to the BoundingBox is used.
+        @param accept: Function (shape) which returns False for the shapes to
+        be skipped
+        @return: The shape and its distance, (None, None) if there is none
+        """
+        root = self.get_root()
+        if root is None:
+            return None, None
+        x = point.x
+        y = point.y
+        # (distance, tie breaker, node or entry, kind) with kind 0 for nodes,
+        # 1 for entries and 2 for exact distances of entries
+        heap = [(0.0, 0, root, 0)]
+        count = 1
+        while heap:
+            dist, _, item, kind = heapq.heappop(heap)
+            if kind == 2:
+                return item[ITEMS][1], dist
+            if kind == 1:
+                shape = item[ITEMS][1]
+                if distance is None:
+                    return shape, dist
+                heapq.heappush(heap, (distance(shape, point), count, item, 2))
+                count += 1
+                continue
+            for child in item[ITEMS]:
+                if item[LEAF] and accept is not None and not accept(child[ITEMS][1]):
+                    continue
+                dx = max(child[XMIN] - x, 0.0, x - child[XMAX])
+                dy = max(child[YMIN] - y, 0.0, y - child[YMAX])
+                heapq.heappush(heap, (sqrt(dx * dx + dy * dy), count, child,
+                                      1 if item[LEAF] else 0))
+                count += 1
+        return None, None
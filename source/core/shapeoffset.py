@@ -38,6 +38,8 @@ from core.arcgeo import ArcGeo
 from core.point import Point
 from core.shape import Geos
 from core.shape import Shape
+from core.sweepline import SweepLine
+from core.rapidpos import RapidPos
 
 logger = logging.getLogger('core.shapeoffset')
 
@@ -74,26 +76,32 @@ class offShapeClass(Shape):
 
         self.make_segment_types()
 
-        nextConvexPoint = [e for e in self.segments if isinstance(e, ConvexPoint)]
-        # logger.debug(nextConvexPoint)
-        # nextConvexPoint=[nextConvexPoint[31]]
+        self.make_segment_ring()
+
+        # The convex vertices in the order of the ring. The LIR of the first
+        # one which is left is removed next, which removes the vertex itself
+        # and often some of the following ones as well.
+        convex_nrs = [nr for nr, seg in enumerate(self.segments) if isinstance(seg, ConvexPoint)]
+        nr_convex = len(convex_nrs)
+        convex_pos = 0
         self.counter = 0
 
-        while len(nextConvexPoint):  # [self.convex_vertex[-1]]:
-            convex_vertex_nr = self.segments.index(nextConvexPoint[0])
-            # logger.debug(len(self.segments))
-            # logger.debug("convex_vertex: %s" % nextConvexPoint[0])
+        while nr_convex:
+            while self.removed[convex_nrs[convex_pos]]:
+                convex_pos = (convex_pos + 1) % len(convex_nrs)
+            convex_vertex_nr = convex_nrs[convex_pos]
             # logger.debug("convex_vertex_nr: %s" % convex_vertex_nr)
-                 
-            forward, backward = self.PairWiseInterferenceDetection(convex_vertex_nr + 1, convex_vertex_nr - 1)
+
+            forward, backward = self.PairWiseInterferenceDetection(self.next_nr[convex_vertex_nr],
+                                                                   self.prev_nr[convex_vertex_nr])
             # logger.debug("forward: %s, backward: %s" % (forward, backward))
  
             if forward is None:
+                self.segments = self.get_ring_segments()
                 return
-                break
  
  
-            if backward == 0 and forward == (len(self.segments) - 1) and self.closed:
+            if backward == self.first_nr and forward == self.prev_nr[self.first_nr] and self.closed:
                 self.segments = []
                 break
  
@@ -117,12 +125,9 @@ class offShapeClass(Shape):
                 break
  
             # Reomve the LIR from the PS Curce
-            self.remove_LIR(forward, backward, iPoint)
-            nextConvexPoint = [e for e in self.segments if isinstance(e, ConvexPoint)]
-            # logger.debug(nextConvexPoint)
-            # nextConvexPoint=[]
-            # logger.debug(nextConvexPoint)
- 
+            nr_convex -= self.remove_LIR(forward, backward, iPoint)
+        else:
+            self.segments = self.get_ring_segments()
  
         for seg in self.segments:
             self.rawoff += [self.make_rawoff_seg(seg)]
@@ -148,11 +153,11 @@ class offShapeClass(Shape):
         """
 
         self.geos = Geos([])
-        for geo in parent.geos:
+        for geo in parent.geos.abs_iter():
             if isinstance(geo, LineGeo):
-                self.geos.append(OffLineGeo().abscopy(geo, parent))
+                self.geos.append(OffLineGeo(geo.Ps, geo.Pe))
             elif isinstance(geo, ArcGeo):
-                self.geos.append(OffArcGeo().abscopy(geo, parent))
+                self.geos.append(OffArcGeo(Ps=geo.Ps, Pe=geo.Pe, O=geo.O, r=geo.r, direction=geo.ext))
             else:
                 logger.error("Should not be here")
 
@@ -245,24 +250,19 @@ class offShapeClass(Shape):
 #             logger.debug(geo2)
 #             logger.debug(geo1.end_normal)
 #             logger.debug(geo2.start_normal)
-            if (((geo1.Pe.ccw(geo1.Pe + geo1.end_normal,
-                              geo1.Pe + geo1.end_normal +
-                              geo2.start_normal) == 1) and
-                 self.offtype == "in") or
-                (geo1.Pe.ccw(geo1.Pe + geo1.end_normal,
-                             geo1.Pe + geo1.end_normal +
-                             geo2.start_normal) == -1 and
-                 self.offtype == "out")):
+            Pn = geo1.Pe + geo1.end_normal
+            turn = geo1.Pe.ccw(Pn, Pn + geo2.start_normal)
+            if ((turn == 1 and self.offtype == "in") or
+                (turn == -1 and self.offtype == "out")):
 
                 # logger.debug("reflex")
 
-                geo1.Pe.start_normal = geo1.end_normal
-                geo1.Pe.end_normal = geo2.start_normal
-                self.segments += [geo1.Pe, geo2]
+                reflexPoint = OffPoint(geo1.Pe.x, geo1.Pe.y)
+                reflexPoint.start_normal = geo1.end_normal
+                reflexPoint.end_normal = geo2.start_normal
+                self.segments += [reflexPoint, geo2]
 
-            elif (geo1.Pe.ccw(geo1.Pe + geo1.end_normal,
-                             geo1.Pe + geo1.end_normal +
-                             geo2.start_normal) == 0):
+            elif turn == 0:
                 self.segments += [geo2]
 
 
@@ -274,6 +274,32 @@ class offShapeClass(Shape):
         # self.segments_plot = deepcopy(self.segments)
 
 
+    def make_segment_ring(self):
+        """
+        Links the segments to a ring, such that LIRs can be removed without
+        copying the list of segments. The segments keep their position in
+        self.segments, next_nr and prev_nr give the position of the
+        neighbours in the ring.
+        """
+        nr_segments = len(self.segments)
+        self.next_nr = list(range(1, nr_segments)) + [0]
+        self.prev_nr = [nr_segments - 1] + list(range(nr_segments - 1))
+        self.removed = [False] * nr_segments
+        self.first_nr = 0
+        self.nr_segments = nr_segments
+
+    def get_ring_segments(self):
+        """
+        Returns the segments which are left in the ring, starting at the one
+        which came first in the list of segments
+        """
+        segments = []
+        nr = self.first_nr
+        for i in range(self.nr_segments):
+            segments.append(self.segments[nr])
+            nr = self.next_nr[nr]
+        return segments
+
     def make_rawoff_seg(self, seg):
         """
         This function returns the rawoffset of a segement. A line for a line and
@@ -291,19 +317,19 @@ class offShapeClass(Shape):
             offset = abs(self.offset)
 
         # if segement 1 is inverted change End Point
-        if isinstance(seg, OffLineGeo):
-            Ps = seg.Ps + seg.start_normal * offset
-            Pe = seg.Pe + seg.end_normal * offset
+        if isinstance(seg, LineGeo):
+            Ps = seg.Ps.add_scaled(seg.start_normal, offset)
+            Pe = seg.Pe.add_scaled(seg.end_normal, offset)
             return OffLineGeo(Ps, Pe)
 
         elif isinstance(seg, OffPoint):
-            Ps = seg + seg.start_normal * offset
-            Pe = seg + seg.end_normal * offset
+            Ps = seg.add_scaled(seg.start_normal, offset)
+            Pe = seg.add_scaled(seg.end_normal, offset)
 
             return OffArcGeo(Ps = Ps, Pe = Pe, O = deepcopy(seg), r = self.offset, direction = offset)
-        elif isinstance(seg, OffArcGeo):
-            Ps = seg.Ps + seg.start_normal * offset
-            Pe = seg.Pe + seg.end_normal * offset
+        elif isinstance(seg, ArcGeo):
+            Ps = seg.Ps.add_scaled(seg.start_normal, offset)
+            Pe = seg.Pe.add_scaled(seg.end_normal, offset)
 
             if seg.ext > 0:
                 return OffArcGeo(Ps = Ps, Pe = Pe, O = seg.O, r = seg.r + offset, direction = seg.ext)
@@ -311,8 +337,8 @@ class offShapeClass(Shape):
                 return OffArcGeo(Ps = Ps, Pe = Pe, O = seg.O, r = seg.r - offset, direction = seg.ext)
 
         elif isinstance(seg, ConvexPoint):
-            Ps = seg + seg.start_normal * offset
-            Pe = seg + seg.end_normal * offset
+            Ps = seg.add_scaled(seg.start_normal, offset)
+            Pe = seg.add_scaled(seg.end_normal, offset)
             return OffArcGeo(Ps = Ps, Pe = Pe, O = deepcopy(seg), r = self.offset, direction = offset)
         else:
             logger.error("Unsupportet Object type: %s" % type(seg))
@@ -328,17 +354,17 @@ class offShapeClass(Shape):
         """
 
         # if segement 1 is inverted change End Point
-        if isinstance(segment1, OffLineGeo) and dir == 1:
+        if isinstance(segment1, LineGeo) and dir == 1:
             Pe = segment1.Pe
-        elif isinstance(segment1, OffLineGeo) and dir == -1:
+        elif isinstance(segment1, LineGeo) and dir == -1:
             Pe = segment1.Ps
         elif isinstance(segment1, ConvexPoint):
             return False
         elif isinstance(segment1, OffPoint):
             Pe = segment1
-        elif isinstance(segment1, OffArcGeo) and dir == 1:
+        elif isinstance(segment1, ArcGeo) and dir == 1:
             Pe = segment1.Pe
-        elif isinstance(segment1, OffArcGeo) and dir == -1:
+        elif isinstance(segment1, ArcGeo) and dir == -1:
             Pe = segment1.Ps
         else:
             logger.error("Unsupportet Object type: %s" % type(segment1))
@@ -351,7 +377,7 @@ class offShapeClass(Shape):
 
 
         if dir == 1:
-            distance = segment2.distance(Pe + segment1.end_normal * offset)
+            distance = segment2.distance(Pe.add_scaled(segment1.end_normal, offset))
 #             self.interferingshapes += [OffLineGeo(Pe, Pe + segment1.end_normal * offset),
 #                                      segment2,
 #                                      OffArcGeo(O=Pe + segment1.end_normal * offset,
@@ -361,7 +387,7 @@ class offShapeClass(Shape):
             # logger.debug(Pe)
             # logger.debug(segment1)
             # logger.debug(segment1.start_normal)
-            distance = segment2.distance(Pe + segment1.start_normal * offset)
+            distance = segment2.distance(Pe.add_scaled(segment1.start_normal, offset))
 #             self.interferingshapes += [OffLineGeo(Pe, Pe + segment1.start_normal * offset),
 #                                      segment2,
 #                                      OffArcGeo(O=Pe + segment1.start_normal * offset,
@@ -450,27 +476,22 @@ class offShapeClass(Shape):
         @return: forward, backward
         """
         val = 2000
-        # self.counter = 0
+        self.counter = 0
         L1_status, L2_status = "full", "full"
         # Repeat until we reached the Partial-interfering-relation
         while not(L1_status == "partial" and L2_status == "partial"):
             self.interferingshapes = []
             self.counter += 1
 
-            if forward >= len(self.segments):
-                forward = 0
-
             segment1 = self.segments[forward]
             segment2 = self.segments[backward]
 
             if isinstance(segment1, ConvexPoint):
-                forward += 1
-                if forward >= len(self.segments):
-                    forward = 0
+                forward = self.next_nr[forward]
                 segment1 = self.segments[forward]
                 # logger.debug("Forward ConvexPoint")
             if isinstance(segment2, ConvexPoint):
-                backward -= 1
+                backward = self.prev_nr[backward]
                 segment2 = self.segments[backward]
                 # logger.debug("Backward ConvexPoint")
 
@@ -490,13 +511,11 @@ class offShapeClass(Shape):
                         break
                     if self.counter >= val:
                         self.interferingshapes = []
-                    forward += 1
-                    if forward >= len(self.segments):
-                        forward = 0
+                    forward = self.next_nr[forward]
                     segment1 = self.segments[forward]
 
                     if isinstance(segment1, ConvexPoint):
-                        forward += 1
+                        forward = self.next_nr[forward]
                         segment1 = self.segments[forward]
                         # logger.debug("Forward ConvexPoint")
 
@@ -514,12 +533,12 @@ class offShapeClass(Shape):
                         break
                     if self.counter >= val:
                         self.interferingshapes = []
-                    backward -= 1
+                    backward = self.prev_nr[backward]
                     # logger.debug("Reveerse Replace Checking: forward: %s, backward: %s" %(forward, backward))
                     segment2 = self.segments[backward]
 
                     if isinstance(segment2, ConvexPoint):
-                        backward -= 1
+                        backward = self.prev_nr[backward]
                         segment2 = self.segments[backward]
                         # logger.debug("Backward ConvexPoint")
 
@@ -534,14 +553,14 @@ class offShapeClass(Shape):
             tracking direction.
             """
             if L1_status == "full" and (L2_status == "partial" or L2_status == "full"):
-                forward += 1
+                forward = self.next_nr[forward]
             elif L2_status == "full" and (L1_status == "partial" or L1_status == "partial"):
-                backward -= 1
+                backward = self.prev_nr[backward]
 
             # If The begin end point is the end end point we are done.
             if L1_status is None and L2_status is None:
                 # logger.debug("Begin = End; Remove all")
-                return len(self.segments) - 1, 0
+                return self.prev_nr[self.first_nr], self.first_nr
 
             # logger.debug(self.counter)
             # logger.debug("L1_status: %s,L2_status: %s" %(L1_status,L2_status))
@@ -561,16 +580,8 @@ class offShapeClass(Shape):
         @param forward: The forward segment of the LIR
         @param backward: The backward segement of the LIR
         @param iPoint: The Intersection point of the LIR
+        @return: The number of ConvexPoints which were removed
         """
-        if backward > forward:
-            pop_range = self.segments[backward + 1:len(self.segments)] 
-            pop_range += self.segments[0:forward]
-        elif backward<0:
-            pop_range = self.segments[len(self.segments)+backward + 1:len(self.segments)] 
-            pop_range += self.segments[0:forward]
-        else:
-            pop_range = self.segments[backward + 1:forward]
-            
         if self.offtype == "out":
             rev = True
         else:
@@ -579,309 +590,148 @@ class offShapeClass(Shape):
         self.segments[forward] = self.segments[forward].trim(Point=iPoint, dir=1, rev_norm=rev)
         self.segments[backward] = self.segments[backward].trim(Point=iPoint, dir=-1, rev_norm=rev)
 
-        # Remove the segments which are inbetween the LIR
-        self.segments = [x for x in self.segments if x not in pop_range]
+        if forward == backward:
+            return 0
 
-class SweepLine:
-    def __init__(self, geos=[], closed=True):
+        # Remove the segments which are inbetween the LIR
+        removed_convex = 0
+        nr = self.next_nr[backward]
+        while nr != forward:
+            self.removed[nr] = True
+            self.nr_segments -= 1
+            if isinstance(self.segments[nr], ConvexPoint):
+                removed_convex += 1
+            # The ring starts at the forward segment if its start was removed
+            if nr == self.first_nr:
+                self.first_nr = forward
+            nr = self.next_nr[nr]
+        self.next_nr[backward] = forward
+        self.prev_nr[forward] = backward
+        return removed_convex
+
+class offPocketClass(object):
+    """
+    This Class is used to clear the inside of a closed shape. The shape is
+    offset inwards by the tool radius and afterwards again and again by the
+    stepover until nothing is left. Each ring is the offset of the previous
+    one, so the LIRs which are already removed are not searched again.
+    """
+    def __init__(self, parent=Shape(), offset=1, stepover=0.5):
         """
-        This the init function of the SweepLine Class. It is calling a sweep line
-        algorithm in order to find all intersection of the given geometries
-        @param geos: A list if with geometries in their ordered structure.
-        @param closed: If the geometries are closed or not (Polyline or Polygon)
+        Standard method to initialize the class
+        @param parent: The closed shape which shall be cleared
+        @param offset: The radius of the tool
+        @param stepover: The distance between two rings
         """
 
+        self.offset = offset
+        self.stepover = stepover
+        self.rings = []
         self.geos = []
-        self.closed = closed
 
-        self.sweep_array = []
-        self.intersections = []
+        ring = offShapeClass(parent=parent, offset=offset, offtype='in').rawoff
+        area = self.get_ring_area(ring)
+
+        # The rings are CW, so their area is negative. A ring which is no
+        # smaller than the previous one or turned CCW is no longer a valid
+        # offset of it.
+        while ring and area < -eps:
+            # The offset cannot split a ring into several ones (e.g. at a
+            # neck of the pocket), it crosses itself instead. Such a ring
+            # would cut into the walls.
+            if not self.is_simple_ring(ring):
+                logger.error("Pocket of shape %i: ring %i intersects itself, "
+                             "the pocket is only cleared up to ring %i"
+                             % (parent.nr, len(self.rings) + 1, len(self.rings)))
+                break
+            self.rings.append(ring)
+
+            ring_shape = Shape(nr=parent.nr, closed=True, geos=ring)
+            ring = offShapeClass(parent=ring_shape, offset=stepover, offtype='in').rawoff
+            new_area = self.get_ring_area(ring)
+            if new_area <= area:
+                break
+            area = new_area
 
-        self.add_to_sweep_array(geos, self.closed)
+        self.link_rings()
 
     def __str__(self):
-        """ 
+        """
         Standard method to print the object
         @return: A string
         """
-        sweep_array_order = []
-        for element in self.sweep_array:
-            add_array = []
-            rem_array = []
-            swoop_array = []
-
-            for add_ele in element.add:
-                add_array.append(add_ele.nr)
-            for rem_ele in element.remove:
-                rem_array.append(rem_ele.nr)
-            for swoop_ele in element.swoop:
-                swoop_array.append(swoop_ele)
-
-
-
-            sweep_array_order += [[element.Point.x, element.Point.y], add_array, rem_array, swoop_array]
-
-        return ('\nlen(geos):   %i' % len(self.geos)) + \
-               ('\nclosed:      %i' % self.closed) + \
-               ('\ngeos:        %s' % self.geos) + \
-               ('\nsweep_array_order:  %s' % sweep_array_order)
-
-    def add_to_sweep_array(self, geos=[], closed=True):
-        """
-        This instance adds the given geometries to the sweep array. If there 
-        are already some defined it will just continue to add them. This may be 
-        used to get the intersection of two shapes
-        @param: the geometries to be added
-        @param: if these geometries are closed shape or not
-        """
-
-        sweep_array = []
-        self.geos += geos
-
-        for geo_nr in range(len(geos)):
-            geo = geos[geo_nr]
-            geo.iPoints = []
-            y_val = (geo.BB.Ps.y + geo.BB.Pe.y) / 2
-
-            geo.neighbors = []
-            geo.nr = geo_nr
-            geo.Point = Point(x=geo.BB.Ps.x, y=y_val)
-
-            # Add the neighbors before the geometrie
-            if geo_nr == 0 and closed:
-                geo.neighbors.append(geos[geo_nr - 1])
-            else:
-                geo.neighbors.append(geos[geo_nr - 1])
-
-            # Add the neighbors after the geometrie
-            if geo_nr == len(geos) - 1 and closed:
-                geo.neighbors.append(geos[0])
-            else:
-                geo.neighbors.append(geos[geo_nr + 1])
-
-            y_val = (geo.BB.Ps.y + geo.BB.Pe.y) / 2
-            sweep_array.append(SweepElement(Point=geo.Point, add=[geo], remove=[]))
-            sweep_array.append(SweepElement(Point=Point(x=geo.BB.Pe.x, y=y_val), add=[], remove=[geo]))
-
-
-        # logger.debug(sweep_array)
-        sweep_array.sort(self.cmp_SweepElement)
-
-        # Remove all Points which are there twice
-        self.sweep_array = [sweep_array[0]]
-        for ele_nr in range(1, len(sweep_array)):
-            if abs(self.sweep_array[-1].Point.x - sweep_array[ele_nr].Point.x) < eps:
-                self.sweep_array[-1].add += sweep_array[ele_nr].add
-                self.sweep_array[-1].remove += sweep_array[ele_nr].remove
-            else:
-                self.sweep_array.append(sweep_array[ele_nr])
-          
-    def cmp_asscending_arc(self, P1, P2):
-        """
-        Compare Function for the sorting of Intersection Points on one common ARC
-        @param P1: The first Point to be compared
-        @param P2: The secon Point to be compared
-        @return: 1 if the distance to the start point of P1 is bigger
-        """  
-        
-        # The angle between startpoint and where the intersection occures
-        d_ang1 = (self.O.norm_angle(P1) - self.s_ang) % (2 * pi)
-        d_ang2 = (self.O.norm_angle(P2) - self.s_ang) % (2 * pi)
-        
-        # Correct by 2*pi if the direction is wrong
-        if self.ext < 0.0:
-            d_ang1 -= 2 * pi
-            d_ang2 -= 2 * pi
-                
-        if d_ang1 > d_ang2:
-            return 1
-        elif d_ang1 == d_ang2:
-            return 0
-        else:
-            return -1
-        
-    def cmp_asscending_line(self, P1, P2):
-        """
-        Compare Function for the sorting of Intersection points on one common LINE
-        @param P1: The first Point to be compared
-        @param P2: The secon Point to be compared
-        @return: 1 if the distance to the start point of P1 is bigger
-        """  
-        d1 = P1.distance(self.Ps)
-        d2 = P2.distance(self.Ps)
-              
-        if d1 > d2:
-            return 1
-        elif d1 == d2:
-            return 0
-        else:
-            return -1
 
-    def cmp_SweepElement(self, ele1, ele2):
-        """
-        Compare Function for the sorting of the sweep array.
-        @param Point1: First SweepElement point for compare
-        @param Point2: The second SweepElement point for the compare
-        @return: True or false whichever is bigger.
-        """
-        if ele1.Point.x < ele2.Point.x:
-            return -1
-        elif ele1.Point.x > ele2.Point.x:
-            return 1
-        else:
-            return 0
+        return "\noffset:      %s" % self.offset +\
+               "\nstepover:    %s" % self.stepover +\
+               "\nrings:       %s" % len(self.rings) +\
+               "\ngeos:        %s" % self.geos
 
-    def cmp_SweepElementy(self, ele1, ele2):
+    def get_ring_area(self, ring):
         """
-        Compare Function for the sorting of the sweep array just in y direction.
-        @param ele1: First SweepElement point for compare
-        @param ele2: The second SweepElement point for the compare
-        @return: True or false whichever is bigger.
+        Calculates the signed area enclosed by a ring of lines and arcs.
+        @param ring: The list of geometries of the closed ring
+        @return: The area, which is negative for a CW ring
         """
-        # logger.debug(ele1)
-        # logger.debug(ele2)
-
-        if ele1.Point.y < ele2.Point.y:
-            return -1
-        elif ele1.Point.y > ele2.Point.y:
-            return 1
-        else:
-            return 0
+        area = 0.0
+        for geo in ring:
+            area += geo.Ps.x * geo.Pe.y - geo.Pe.x * geo.Ps.y
+            if isinstance(geo, ArcGeo):
+                area += geo.r ** 2 * (geo.ext - sin(geo.ext))
+        return area / 2
 
-    def search_intersections(self):
+    def is_simple_ring(self, ring):
         """
-        This instance is called to search all intersection points between the 
-        Elements defined in geos
+        Checks that a ring does not intersect itself. Neighbouring geometries
+        may touch or overlap a bit at their common point, within the point
+        tolerance.
+        @param ring: The list of geometries of the closed ring
+        @return: True if the ring is simple
         """
-        search_array = []
-        self.found = []
-        ele_nr = 0
-
-        while ele_nr < len(self.sweep_array):
-            ele = self.sweep_array[ele_nr]
-            # logger.debug(ele)
-            ele_nr += 1
-
-            for geo in ele.add:
-                search_array.append(geo)
-                search_array.sort(self.cmp_SweepElementy)
-                index = search_array.index(geo)
-                # logger.debug("add_index: %s" %index)
-                # logger.debug(index)
-                # logger.debug(geo)
-                if len(search_array) >= 2:
-                    if index > 0:
-                        self.search_geo_intersection(geo, search_array[index - 1])
-
-
-                    if index < (len(search_array) - 1):
-                        self.search_geo_intersection(geo, search_array[index + 1])
-
-            for geo in ele.swoop:
-                # The y values of the elements are exchanged and the upper and
-                # lower neighbors are checked for intersections
-                # logger.debug(geo[0].Point)
-                # logger.debug(geo[1].Point)
-                # logger.debug(search_array)
-
-
-                y0 = geo[0].Point.y
-                y1 = geo[1].Point.y
-
-                geo[1].Point.y = y0
-                geo[0].Point.y = y1
-
-                # logger.debug(geo[0].Point)
-                # logger.debug(geo[1].Point)
-                # logger.debug(search_array)
-
-                index0 = search_array.index(geo[0])
-                index1 = search_array.index(geo[1])
-                # logger.debug("Pre sort index: %s, %s" %(index0,index1))
+        tol = g.config.point_tolerance
+        for iPoint, geo1, geo2 in SweepLine(ring, closed=True).search_intersections():
+            if not ((geo1.Pe.distance(geo2.Ps) <= tol and iPoint.distance(geo1.Pe) <= tol) or
+                    (geo2.Pe.distance(geo1.Ps) <= tol and iPoint.distance(geo2.Pe) <= tol)):
+                return False
+        return True
 
-                search_array.sort(self.cmp_SweepElementy)
-
-                index0 = search_array.index(geo[0])
-                index1 = search_array.index(geo[1])
-                # logger.debug("Post sort index: %s, %s" %(index0,index1))
-
-                min_ind = min(index0, index1)
-                max_ind = max(index0, index1)
-                if min_ind > 0:
-                    self.search_geo_intersection(search_array[min_ind], search_array[min_ind - 1])
-
-
-                if max_ind < (len(search_array) - 1):
-                    self.search_geo_intersection(search_array[max_ind], search_array[max_ind + 1])
-
-
-            for geo in ele.remove:
-                index = search_array.index(geo)
-                # logger.debug("remove_index: %s" %index)
-
-                search_array.pop(index)
-                if len(search_array) >= 2:
-                    if index > 0 and index <= (len(search_array) - 1):
-                        self.search_geo_intersection(search_array[index - 1], search_array[index])
-
-
-        logger.debug(self.found)
-
-    def search_geo_intersection(self, geo1, geo2):
+    def is_inside_ring(self, line, ring):
         """
-        This function is called so search the intersections and to add the 
-        intersection point to the sweep array. This is called during each search
-        
+        Checks that a line from the inside of a ring to one of its vertices
+        does not cross the ring on its way.
+        @param line: The line, which ends at the vertex
+        @param ring: The list of geometries of the closed ring
+        @return: True if the line stays inside the ring
         """
-        # logger.debug(search_array[index+1])
-        # logger.debug("geo1: %s\ngeo2: %s" %(geo1,geo2))
-        iPoint = (geo1.find_inter_point(geo2))
-        
-        if (not(iPoint is None) and
-            not(geo2 in geo1.neighbors)):
-            
-            iPoint.geo = [geo1, geo2]
-
-            # if there is only one instersection
-            if isinstance(iPoint, Point):
-                self.found.append(iPoint)
-                geo1.iPoints += [iPoint]
-                geo2.iPoints += [iPoint]
-                
-                self.sweep_array.append(SweepElement(Point=iPoint, add=[], remove=[], swoop=[[geo1, geo2]]))
-
-            else:
-                self.found += iPoint
-                geo1.iPoints += iPoint
-                geo2.iPoints += iPoint
-                self.sweep_array.append(SweepElement(Point=iPoint[0], add=[], remove=[], swoop=[[geo1, geo2]]))
-                self.sweep_array.append(SweepElement(Point=iPoint[1], add=[], remove=[], swoop=[[geo1, geo2]]))
+        tol = g.config.point_tolerance
+        sweep = SweepLine(ring, closed=True)
+        sweep.add_to_sweep_array([line], closed=False)
+        for iPoint, geo1, geo2 in sweep.search_intersections():
+            if (geo1 is line or geo2 is line) and iPoint.distance(line.Pe) > tol:
+                return False
+        return True
 
-            self.sweep_array.sort(self.cmp_SweepElement)
-            # logger.debug(self)
-class SweepElement:
-    def __init__(self, Point=Point(0, 0), add=[], remove=[], swoop=[]):
+    def link_rings(self):
         """
-        This is the class for each SweepElement given in the sweep_array
-        @param Point: the Point of the SweepElement (e.g. 2 Points per LineGeo)
-        @param add: The geometrie to be added
-        @param remove: The geometrie to be removed
-
+        Joins the rings to one path, starting with the innermost one. Each
+        ring starts at its start point next to the end of the ring before.
+        The two are connected by a straight line which is cut, so the tool
+        does not need to leave the pocket. If this line would cross the
+        outer ring, the tool moves there above the workpiece (RapidPos).
         """
-        self.Point = Point
-        self.add = add
-        self.remove = remove
-        self.swoop = swoop
+        self.geos = []
+        Pe = None
+        for ring in reversed(self.rings):
+            if Pe is not None:
+                nr = min(range(len(ring)), key=lambda nr: Pe.distance_squared(ring[nr].Ps))
+                ring = ring[nr:] + ring[:nr]
+                link = LineGeo(Pe, ring[0].Ps)
+                if self.is_inside_ring(link, ring):
+                    self.geos.append(link)
+                else:
+                    self.geos.append(RapidPos(ring[0].Ps))
+            self.geos += ring
+            Pe = ring[-1].Pe
 
-    def __str__(self):
-        """ 
-        Standard method to print the object
-        @return: A string
-        """
-        return ('\nPoint:     %s ' % (self.Point)) + \
-               ('\nadd:       %s ' % self.add) + \
-               ('\nremove:    %s ' % self.remove)
-               
 class OffArcGeo(ArcGeo):
         """
         Inherited Class for Shapeoffset only. All related offset functions are concentrated here in orde to keep base classes as 
@@ -27,8 +27,10 @@
 from __future__ import absolute_import
 from __future__ import division
 
+from array import array
 from math import sin, cos, pi, sqrt
 from copy import deepcopy
+from multiprocessing import Pool, cpu_count
 
 
 import globals.globals as g
@@ -39,7 +41,9 @@ from core.point import Point
 from core.intersect import Intersect
 from core.shape import Geos
 from core.shape import Shape
+from core.layercontent import LayerContent
 from core.shapeoffset import *
+from core.rapidpos import RapidPos
 
 import logging
 logger = logging.getLogger('core.stmove')
@@ -52,7 +56,14 @@ class StMove(object):
     to the shape of its parent
     """
     # only need default arguments here because of the change of usage with super in QGraphicsLineItem
-    def __init__(self, shape=None):
+    def __init__(self, shape=None, data=None):
+        """
+        Standard method to initialize the class
+        @param shape: The shape to which the start move belongs
+        @param data: The geometries of the start move as returned by
+        stmove_job(), if they were already calculated in a worker process.
+        Otherwise they are taken from the cache of the shape if possible.
+        """
         if shape is None:
             return
 
@@ -63,7 +74,17 @@ class StMove(object):
 
         self.geos = Geos([])
 
-        self.make_start_moves()
+        if data is None:
+            data = self.shape.get_stmove_data()
+
+        if data is None:
+            self.make_start_moves()
+            types, coords = pack_geos(self.geos.abs_iter())
+            self.shape.set_stmove_data((types, coords, self.pocket))
+        else:
+            types, coords, self.pocket = data
+            for geo in unpack_geos(types, coords):
+                self.append(geo)
 
     def append(self, geo):
         # we don't want to additional scale / rotate the stmove geo
@@ -77,6 +98,7 @@ class StMove(object):
         be generated based on the given values for start and angle.
         """
         self.geos = Geos([])
+        self.pocket = False
 
         if g.config.machine_type == 'drag_knife':
             self.make_swivelknife_move()
@@ -162,11 +184,11 @@ class StMove(object):
                     first = False
                     prvend = geo_b.Ps + startnorm
                     prvnorm = startnorm
-                norm = offset * (geo_b.Pe - geo_b.Ps).unit_vector()
+                norm = geo_b.Ps.unit_vector(geo_b.Pe, r=offset)
                 geo_b.Ps += norm
                 geo_b.Pe += norm
                 if not prvnorm == norm:
-                    direction = prvnorm.to3D().cross_product(norm.to3D()).z
+                    direction = prvnorm.cross_z(norm)
                     swivel = ArcGeo(Ps=prvend, Pe=geo_b.Ps, r=offset, direction=direction)
                     swivel.drag = drag_angle < abs(swivel.ext)
                     self.append(swivel)
@@ -197,7 +219,7 @@ class StMove(object):
                     geo_b.Pe = Point(geo_b.Pe.x-offset/(sqrt(1+(norme.y/norme.x)**2)),
                                      geo_b.Pe.y-(offset*norme.y/norme.x)/(sqrt(1+(norme.y/norme.x)**2)))
                 if prvnorm != norma:
-                    direction = prvnorm.to3D().cross_product(norma.to3D()).z
+                    direction = prvnorm.cross_z(norma)
                     swivel = ArcGeo(Ps=prvend, Pe=geo_b.Ps, r=offset, direction=direction)
                     swivel.drag = drag_angle < abs(swivel.ext)
                     self.append(swivel)
@@ -213,7 +235,7 @@ class StMove(object):
             # else:
             #     self.append(copy(geo))
         if not prvnorm == startnorm:
-            direction = prvnorm.to3D().cross_product(startnorm.to3D()).z
+            direction = prvnorm.cross_z(startnorm)
             self.append(ArcGeo(Ps=prvend, Pe=prvend-prvnorm+startnorm, r=offset, direction=direction))
 
         self.geos.insert(0, RapidPos(self.geos.abs_el(0).Ps))
@@ -226,9 +248,17 @@ class StMove(object):
 
         offtype = "in"  if self.shape.cut_cor == 42 else "out"
 
-        offshape = offShapeClass(parent=self.shape, offset=toolwidth, offtype=offtype)
+        if offtype == "in" and self.shape.closed and g.config.vars.Cutter_Compensation["pocketing"]:
+            stepover = 2 * toolwidth * g.config.vars.Cutter_Compensation["pocket_stepover"]
+            offgeos = offPocketClass(parent=self.shape, offset=toolwidth, stepover=stepover).geos
+            self.pocket = True
+        else:
+            offgeos = offShapeClass(parent=self.shape, offset=toolwidth, offtype=offtype).rawoff
 
-        self.geos+=offshape.rawoff
+        # The tool moves rapidly to the start of the offset geometries
+        if len(offgeos):
+            self.append(RapidPos(offgeos[0].Ps))
+        self.geos += offgeos
 
     def make_path(self, drawHorLine, drawVerLine):
         for geo in self.geos.abs_iter():
@@ -238,36 +268,157 @@ class StMove(object):
             drawVerLine(self.shape, geo.get_start_end_points(False))
 
 
-class RapidPos(Point):
-    def __init__(self, point):
-        Point.__init__(self, point.x, point.y)
-        self.abs_geo = None
+# Geometry types of the compact arrays of pack_geos()
+GEO_RAPID = 0
+GEO_LINE = 1
+GEO_ARC = 2
+GEO_DRAG_ARC = 3
+
 
-    def get_start_end_points(self, start_point, angles=None):
-        if angles is None:
-            return self
-        elif angles:
-            return self, 0
+def pack_geos(geos):
+    """
+    pack_geos() - Store rapid positions, lines and arcs in compact arrays,
+    which can be sent to and from a worker process
+    @param geos: The (absolute) geometries
+    @return: types, coords
+    """
+    types = array('b')
+    coords = array('d')
+    for geo in geos:
+        if isinstance(geo, RapidPos):
+            types.append(GEO_RAPID)
+            coords.extend((geo.x, geo.y))
+        elif isinstance(geo, LineGeo):
+            types.append(GEO_LINE)
+            coords.extend((geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y))
         else:
-            return self, Point(0, -1) if start_point else Point(0, -1)
+            types.append(GEO_DRAG_ARC if geo.drag else GEO_ARC)
+            coords.extend((geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y,
+                           geo.O.x, geo.O.y, geo.r, geo.ext))
+    return types, coords
 
-    def make_abs_geo(self, parent=None):
-        """
-        Generates the absolute geometry based on itself and the parent. This
-        is done for rotating and scaling purposes
-        """
-        self.abs_geo = RapidPos(self.rot_sca_abs(parent=parent))
 
-    def make_path(self, caller, drawHorLine):
-        pass
+def unpack_geos(types, coords):
+    """
+    unpack_geos() - Build the geometries again from the arrays of pack_geos()
+    @return: list of geometries
+    """
+    geos = []
+    pos = 0
+    for geo_type in types:
+        if geo_type == GEO_RAPID:
+            geos.append(RapidPos(Point(coords[pos], coords[pos + 1])))
+            pos += 2
+        elif geo_type == GEO_LINE:
+            geos.append(LineGeo(Point(coords[pos], coords[pos + 1]),
+                                Point(coords[pos + 2], coords[pos + 3])))
+            pos += 4
+        else:
+            arc = ArcGeo(Ps=Point(coords[pos], coords[pos + 1]),
+                         Pe=Point(coords[pos + 2], coords[pos + 3]),
+                         O=Point(coords[pos + 4], coords[pos + 5]),
+                         r=coords[pos + 6], direction=coords[pos + 7],
+                         drag=geo_type == GEO_DRAG_ARC)
+            # Keep the extent even for (almost) full circles
+            arc.ext = coords[pos + 7]
+            arc.length = arc.r * abs(arc.ext)
+            geos.append(arc)
+            pos += 8
+    return geos
+
+
+def make_stmoves(shapes, stmove_class=StMove):
+    """
+    make_stmoves() - Create the start moves of several shapes. If the cutter
+    compensation is not done by machine and more than one worker is
+    configured (Cutter_Compensation compensation_workers), the offsets of
+    the shapes are calculated in a process pool. All the other start moves
+    are cheap and created right away.
+    @param shapes: list of shapes
+    @param stmove_class: StMove or a subclass of it (e.g. the one of the GUI)
+    @return: list with the start move of each shape
+    """
+    workers = g.config.vars.Cutter_Compensation['compensation_workers']
+    if workers == 0:
+        workers = cpu_count()
+
+    offset_nrs = []
+    if workers > 1 and g.config.machine_type != 'drag_knife' and\
+       not g.config.vars.Cutter_Compensation['done_by_machine']:
+        for nr, shape in enumerate(shapes):
+            if shape.cut_cor != 40 and shape.get_stmove_data() is None and\
+               all(isinstance(geo, (LineGeo, ArcGeo)) for geo in shape.geos.abs_iter()):
+                offset_nrs.append(nr)
+    workers = min(workers, len(offset_nrs))
+
+    results = {}
+    if workers > 1:
+        logger.debug("Calculating the cutter compensation with %i processes" % workers)
+        jobs = [pack_stmove_job(shapes[nr]) for nr in offset_nrs]
+        pool = Pool(workers, init_stmove_worker, (pack_config(),))
+        try:
+            results = dict(zip(offset_nrs, pool.map(stmove_job, jobs)))
+        finally:
+            pool.close()
+            pool.join()
+
+        for nr in offset_nrs:
+            shapes[nr].set_stmove_data(results[nr])
+
+    return [stmove_class(shape, results.get(nr)) for nr, shape in enumerate(shapes)]
+
+
+def pack_config():
+    """
+    pack_config() - The configuration values which are needed to create
+    start moves, as they are in the main process
+    @return: config state for init_stmove_worker()
+    """
+    return {'vars': g.config.vars,
+            'machine_type': g.config.machine_type,
+            'fitting_tolerance': g.config.fitting_tolerance,
+            'point_tolerance': g.config.point_tolerance}
 
-    def Write_GCode(self, PostPro):
-        """
-        Writes the GCODE for a rapid position.
-        @param PostPro: The PostProcessor instance to be used
-        @return: Returns the string to be written to a file.
-        """
-        return PostPro.rap_pos_xy(self)
 
+def init_stmove_worker(config_state):
+    """
+    init_stmove_worker() - Use the configuration of the main process within a
+    worker process. Processes which were not forked have no config at all.
+    @param config_state: as returned by pack_config()
+    """
+    if g.config is None:
+        from globals.config import MyConfig
+        g.config = MyConfig.__new__(MyConfig)
+    g.config.__dict__.update(config_state)
 
 
+def pack_stmove_job(shape):
+    """
+    pack_stmove_job() - Store the data needed for the start move of a shape
+    in compact arrays, which are sent to a worker process
+    @return: job for stmove_job()
+    """
+    types, coords = pack_geos(shape.geos.abs_iter())
+    layer = shape.parentLayer
+    return (shape.nr, shape.closed, shape.cut_cor, shape.drag_angle,
+            layer.tool_diameter, layer.start_radius, types, coords)
+
+
+def stmove_job(job):
+    """
+    stmove_job() - Start move (including the offset) of one shape within a
+    worker process
+    @param job: as returned by pack_stmove_job()
+    @return: types, coords, pocket of the start move
+    """
+    nr, closed, cut_cor, drag_angle, tool_diameter, start_radius, types, coords = job
+    shape = Shape(nr, closed, None, unpack_geos(types, coords))
+    shape.cut_cor = cut_cor
+    shape.drag_angle = drag_angle
+    shape.parentLayer = LayerContent(0, '', [])
+    shape.parentLayer.tool_diameter = tool_diameter
+    shape.parentLayer.start_radius = start_radius
+
+    stmove = StMove(shape)
+    types, coords = pack_geos(stmove.geos)
+    return types, coords, stmove.pocket
@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Intersections of lines and arcs with the sweep line algorithm of Bentley and
+Ottmann.
+
+The arcs are split at their leftmost and rightmost points, such that each
+piece of a geometry is crossed at most once by a vertical line. A heap holds
+the events (start, end and intersection of pieces) sorted by x and y. The
+status is the list of pieces which cross the sweep line, sorted by their
+height at the current x. Pieces are found in it by binary search and only
+neighbouring pieces are intersected, which gives O((n + k) log n)
+comparisons for n geometries with k intersections.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from math import sqrt, pi, floor, cos, sin
+from heapq import heappush, heappop
+import logging
+
+from core.linegeo import LineGeo
+from core.arcgeo import ArcGeo
+from core.point import Point
+
+logger = logging.getLogger('core.sweepline')
+
+eps = 1e-9
+
+
+class SweepPiece(object):
+    """
+    A part of a geometry which is crossed at most once by each vertical line:
+    a line or an arc which lies completely in the upper or lower half of its
+    circle. Vertical lines have their height at the sweep point, limited to
+    their ends.
+    """
+    __slots__ = ["nr", "geo_nr", "xl", "yl", "xr", "yr", "O", "r", "upper",
+                 "vertical", "slope", "active"]
+
+    def __init__(self, geo_nr, Pl, Pr, O=None, r=0.0, upper=True):
+        """
+        @param geo_nr: The nr of the geometry in SweepLine.geos
+        @param Pl: The left end point (the lower one for vertical lines)
+        @param Pr: The right end point
+        @param O: The center of the arc, None for lines
+        @param r: The radius of the arc
+        @param upper: True for a piece in the upper half of the circle
+        """
+        self.nr = 0
+        self.geo_nr = geo_nr
+        self.xl = Pl.x
+        self.yl = Pl.y
+        self.xr = Pr.x
+        self.yr = Pr.y
+        self.O = O
+        self.r = r
+        self.upper = upper
+        self.vertical = O is None and self.xr - self.xl <= eps
+        if O is None and not self.vertical:
+            self.slope = (self.yr - self.yl) / (self.xr - self.xl)
+        else:
+            self.slope = 0.0
+        self.active = False
+
+    def y_at(self, x, y):
+        """
+        The height of the piece at the sweep point
+        @param x: The x value of the sweep point
+        @param y: The y value of the sweep point (only used for vertical lines)
+        @return: The y value of the piece at x
+        """
+        if self.vertical:
+            return min(max(y, self.yl), self.yr)
+        if x <= self.xl:
+            return self.yl
+        if x >= self.xr:
+            return self.yr
+        if self.O is None:
+            return self.yl + (x - self.xl) * self.slope
+        dy = sqrt(max(self.r ** 2 - (x - self.O.x) ** 2, 0.0))
+        return self.O.y + dy if self.upper else self.O.y - dy
+
+    def order_at(self, x, y):
+        """
+        Order of the pieces which go through the same sweep point, directly
+        right of it: the steeper ones are above, followed by the curvature.
+        @return: A tuple to sort the pieces
+        """
+        if self.vertical:
+            return (float('inf'), 0)
+        if self.O is None:
+            return (self.slope, 0)
+        dx = x - self.O.x
+        dy = y - self.O.y
+        if abs(dy) <= eps:
+            slope = float('inf') if (dx < 0) == self.upper else float('-inf')
+        else:
+            slope = -dx / dy
+        return (slope, -1 if self.upper else 1)
+
+    def ends_at(self, x, y):
+        """
+        True if the piece ends in the given sweep point
+        """
+        return (self.xr <= x + eps and
+                (not self.vertical or self.yr <= y + eps))
+
+    def contains(self, x, y):
+        """
+        True if the point which lies on the line or circle of the piece lies
+        within the piece
+        """
+        if not (self.xl - eps <= x <= self.xr + eps):
+            return False
+        if self.O is None:
+            return (min(self.yl, self.yr) - eps <= y <=
+                    max(self.yl, self.yr) + eps)
+        if self.upper:
+            return y >= self.O.y - eps
+        else:
+            return y <= self.O.y + eps
+
+    def is_end_point(self, x, y):
+        return ((abs(self.xl - x) <= eps and abs(self.yl - y) <= eps) or
+                (abs(self.xr - x) <= eps and abs(self.yr - y) <= eps))
+
+
+class SweepLine(object):
+    """
+    Finds all intersections between the given lines and arcs. Neighbouring
+    geometries of a contour which only meet at their common end point are not
+    reported.
+    """
+    def __init__(self, geos=[], closed=True):
+        """
+        @param geos: A list with the geometries in their ordered structure.
+        @param closed: If the geometries are closed or not (Polyline or Polygon)
+        """
+        self.geos = []
+        self.pieces = []
+        self.neighbors = set()
+        self.end_points = []
+
+        self.found = []
+        self.intersections = []
+
+        self.add_to_sweep_array(geos, closed)
+
+    def __str__(self):
+        """
+        Standard method to print the object
+        @return: A string
+        """
+        return ('\nlen(geos):   %i' % len(self.geos)) + \
+               ('\npieces:      %i' % len(self.pieces)) + \
+               ('\nfound:       %s' % self.found)
+
+    def add_to_sweep_array(self, geos=[], closed=True):
+        """
+        Adds the given geometries. If there are already some defined it will
+        just continue to add them. This may be used to get the intersection of
+        two shapes
+        @param geos: the geometries to be added
+        @param closed: if these geometries are closed shape or not
+        """
+        first_nr = len(self.geos)
+        for geo in geos:
+            geo_nr = len(self.geos)
+            self.geos.append(geo)
+            self.end_points.append((geo.Ps, geo.Pe))
+            if isinstance(geo, LineGeo):
+                self.add_line(geo_nr, geo)
+            elif isinstance(geo, ArcGeo):
+                self.add_arc(geo_nr, geo)
+            else:
+                logger.warning("Unsupported geometry type: %s" % type(geo))
+
+            if geo_nr > first_nr:
+                self.neighbors.add((geo_nr - 1, geo_nr))
+
+        last_nr = len(self.geos) - 1
+        if closed and last_nr > first_nr:
+            self.neighbors.add((first_nr, last_nr))
+
+    def add_line(self, geo_nr, geo):
+        Ps, Pe = geo.Ps, geo.Pe
+        if abs(Ps.x - Pe.x) <= eps and abs(Ps.y - Pe.y) <= eps:
+            return
+        if (Ps.x, Ps.y) > (Pe.x, Pe.y):
+            Ps, Pe = Pe, Ps
+        self.pieces.append(SweepPiece(geo_nr, Ps, Pe))
+
+    def add_arc(self, geo_nr, geo):
+        """
+        Splits the arc at its leftmost and rightmost point (multiples of pi)
+        """
+        O, r = geo.O, geo.r
+        if geo.ext >= 0:
+            s_ang, e_ang = geo.s_ang, geo.s_ang + geo.ext
+            Ps, Pe = geo.Ps, geo.Pe
+        else:
+            s_ang, e_ang = geo.s_ang + geo.ext, geo.s_ang
+            Ps, Pe = geo.Pe, geo.Ps
+
+        angles = [s_ang]
+        k = floor(s_ang / pi) + 1
+        while k * pi < e_ang - eps:
+            if k * pi > s_ang + eps:
+                angles.append(k * pi)
+            k += 1
+        angles.append(e_ang)
+
+        points = [Ps]
+        for ang in angles[1:-1]:
+            points.append(Point(O.x + r * cos(ang), O.y))
+        points.append(Pe)
+
+        for i in range(len(angles) - 1):
+            P1, P2 = points[i], points[i + 1]
+            if abs(P1.x - P2.x) <= eps and abs(P1.y - P2.y) <= eps:
+                continue
+            upper = sin((angles[i] + angles[i + 1]) / 2) > 0
+            if P1.x > P2.x:
+                P1, P2 = P2, P1
+            self.pieces.append(SweepPiece(geo_nr, P1, P2, O, r, upper))
+
+    def search_intersections(self):
+        """
+        Searches all intersection points between the geometries. The result is
+        in self.intersections ([Point, geo1, geo2] for each one) and in
+        self.found (the Points only).
+        @return: self.intersections
+        """
+        self.found = []
+        self.intersections = []
+        self.reported = {}
+        # The points at which each pair of pieces was found to intersect
+        self.crossed = {}
+
+        self.events = []
+        self.event_nr = 0
+        for nr, piece in enumerate(self.pieces):
+            piece.nr = nr
+            piece.active = False
+            self.push_event(piece.xl, piece.yl, piece, None)
+            self.push_event(piece.xr, piece.yr, None, piece)
+
+        self.status = []
+        while self.events:
+            x, y, nr, start, end, pair = heappop(self.events)
+            starting, others = [], []
+            self.add_event(start, end, pair, starting, others)
+            # The events at the same point are handled together
+            while (self.events and self.events[0][0] - x <= eps and
+                   abs(self.events[0][1] - y) <= eps):
+                event = heappop(self.events)
+                self.add_event(event[3], event[4], event[5], starting, others)
+            self.handle_event_point(x, y, starting, others)
+
+        return self.intersections
+
+    def push_event(self, x, y, start, end, pair=None):
+        """
+        Adds an event. The nr keeps the order of the events at the same point
+        and prevents that the pieces are compared.
+        """
+        self.event_nr += 1
+        heappush(self.events, (x, y, self.event_nr, start, end, pair))
+
+    def add_event(self, start, end, pair, starting, others):
+        if start is not None:
+            starting.append(start)
+        if end is not None:
+            others.append(end)
+        if pair is not None:
+            others.extend(pair)
+
+    def handle_event_point(self, x, y, starting, others):
+        """
+        Reports the intersection at the event point and reorders the pieces
+        which go through it.
+        @param x, y: The event point
+        @param starting: The pieces which start in the point
+        @param others: The pieces which end or intersect in the point
+        """
+        status = self.status
+
+        # All pieces of the status which go through the point
+        lo = self.bisect(x, y, y - eps)
+        hi = self.bisect(x, y, y + eps, lo)
+        through = status[lo:hi]
+        for piece in others:
+            if piece.active and piece not in through:
+                # Rounding made it end up outside of the range
+                through.append(piece)
+
+        self.report(x, y, through + starting)
+        self.add_crossed(x, y, through + starting)
+
+        for piece in through:
+            piece.active = False
+        status[lo:hi] = []
+        for piece in through[hi - lo:]:
+            status.remove(piece)
+
+        # The pieces which continue right of the point, in their new order
+        group = [piece for piece in through if not piece.ends_at(x, y)]
+        group += starting
+        group.sort(key=lambda piece: piece.order_at(x, y))
+        for piece in group:
+            piece.active = True
+
+        index = self.bisect(x, y, y)
+        status[index:index] = group
+
+        if not group:
+            if 0 < index < len(status):
+                self.check_pieces(status[index - 1], status[index], x, y)
+        else:
+            if index > 0:
+                self.check_pieces(status[index - 1], group[0], x, y)
+            # Unlike lines, arcs may meet again after a common point
+            for i in range(len(group) - 1):
+                self.check_pieces(group[i], group[i + 1], x, y)
+            if index + len(group) < len(status):
+                self.check_pieces(group[-1], status[index + len(group)], x, y)
+
+    def bisect(self, x, y, y_val, lo=0):
+        """
+        Returns the position of the first piece in the status which is above
+        y_val at the sweep point (x, y)
+        """
+        status = self.status
+        hi = len(status)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if status[mid].y_at(x, y) <= y_val:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def report(self, x, y, pieces):
+        """
+        Records the intersections of the geometries of the pieces in the point
+        """
+        geo_pieces = {}
+        for piece in pieces:
+            geo_pieces.setdefault(piece.geo_nr, []).append(piece)
+        geo_nrs = sorted(geo_pieces)
+        for i in range(len(geo_nrs)):
+            for j in range(i + 1, len(geo_nrs)):
+                nr1, nr2 = geo_nrs[i], geo_nrs[j]
+                if (nr1, nr2) in self.neighbors and self.is_common_end_point(nr1, nr2, x, y):
+                    continue
+                # Overlapping pieces are reported at the ends of the overlap
+                if self.is_within_overlap(geo_pieces[nr1], geo_pieces[nr2], x, y):
+                    continue
+                points = self.reported.setdefault((nr1, nr2), [])
+                if any(abs(P.x - x) <= eps and abs(P.y - y) <= eps for P in points):
+                    continue
+                iPoint = Point(x, y)
+                points.append(iPoint)
+                self.found.append(iPoint)
+                self.intersections.append([iPoint, self.geos[nr1], self.geos[nr2]])
+
+    def is_within_overlap(self, pieces1, pieces2, x, y):
+        for piece1 in pieces1:
+            for piece2 in pieces2:
+                if (piece1.is_end_point(x, y) or piece2.is_end_point(x, y) or
+                        not self.overlap(piece1, piece2)):
+                    return False
+        return True
+
+    def overlap(self, piece1, piece2):
+        """
+        True if the two pieces lie on the same line or circle
+        """
+        if piece1.O is None and piece2.O is None:
+            return self.intersect_line_line(piece1, piece2) is None
+        elif piece1.O is not None and piece2.O is not None:
+            return self.intersect_circle_circle(piece1, piece2) is None
+        return False
+
+    def is_common_end_point(self, nr1, nr2, x, y):
+        for P1 in self.end_points[nr1]:
+            if abs(P1.x - x) <= eps and abs(P1.y - y) <= eps:
+                for P2 in self.end_points[nr2]:
+                    if abs(P2.x - x) <= eps and abs(P2.y - y) <= eps:
+                        return True
+        return False
+
+    def check_pieces(self, piece1, piece2, x, y):
+        """
+        Adds the intersections of two neighbouring pieces right of the sweep
+        point as events.
+        """
+        if piece1.geo_nr == piece2.geo_nr:
+            return
+        if piece1.nr > piece2.nr:
+            piece1, piece2 = piece2, piece1
+        crossed = self.crossed.setdefault((piece1.nr, piece2.nr), [])
+        for ix, iy in self.intersect_pieces(piece1, piece2):
+            # Events at the same point are only handled together if they
+            # are not mixed up with others by rounding
+            for piece in (piece1, piece2):
+                if abs(piece.xl - ix) <= eps and abs(piece.yl - iy) <= eps:
+                    ix, iy = piece.xl, piece.yl
+                elif abs(piece.xr - ix) <= eps and abs(piece.yr - iy) <= eps:
+                    ix, iy = piece.xr, piece.yr
+            # Points at the same x are still ahead if the sweep point is above
+            # them, as long as the two pieces did not meet there yet
+            if ix < x - eps:
+                continue
+            if any(abs(cx - ix) <= eps and abs(cy - iy) <= eps for cx, cy in crossed):
+                continue
+            crossed.append((ix, iy))
+            self.push_event(ix, iy, None, None, (piece1, piece2))
+
+    def add_crossed(self, x, y, pieces):
+        """
+        Records that the pieces met in the sweep point, such that this
+        intersection is not added as event again
+        """
+        for piece1 in pieces:
+            for piece2 in pieces:
+                if piece1.nr < piece2.nr:
+                    self.crossed.setdefault((piece1.nr, piece2.nr), []).append((x, y))
+
+    def intersect_pieces(self, piece1, piece2):
+        """
+        Intersection points of two pieces. Where they overlap, their end
+        points within the other one are returned.
+        @return: A list of (x, y) tuples
+        """
+        if piece1.O is None and piece2.O is None:
+            points = self.intersect_line_line(piece1, piece2)
+        elif piece1.O is None:
+            points = self.intersect_line_circle(piece1, piece2)
+        elif piece2.O is None:
+            points = self.intersect_line_circle(piece2, piece1)
+        else:
+            points = self.intersect_circle_circle(piece1, piece2)
+
+        if points is None:
+            # They overlap
+            points = [(piece.xl, piece.yl) for piece in (piece1, piece2)]
+            points += [(piece.xr, piece.yr) for piece in (piece1, piece2)]
+        return [(ix, iy) for ix, iy in points
+                if piece1.contains(ix, iy) and piece2.contains(ix, iy)]
+
+    def intersect_line_line(self, line1, line2):
+        dx1 = line1.xr - line1.xl
+        dy1 = line1.yr - line1.yl
+        dx2 = line2.xr - line2.xl
+        dy2 = line2.yr - line2.yl
+        div = dx1 * dy2 - dy1 * dx2
+        wx = line2.xl - line1.xl
+        wy = line2.yl - line1.yl
+        if abs(div) <= eps * sqrt((dx1 ** 2 + dy1 ** 2) * (dx2 ** 2 + dy2 ** 2)):
+            # Parallel, overlapping if they are on the same line
+            if abs(wx * dy1 - wy * dx1) <= eps * sqrt(dx1 ** 2 + dy1 ** 2):
+                return None
+            return []
+        t = (wx * dy2 - wy * dx2) / div
+        return [(line1.xl + t * dx1, line1.yl + t * dy1)]
+
+    def intersect_line_circle(self, line, arc):
+        dx = line.xr - line.xl
+        dy = line.yr - line.yl
+        fx = line.xl - arc.O.x
+        fy = line.yl - arc.O.y
+        a = dx * dx + dy * dy
+        b = fx * dx + fy * dy
+        c = fx * fx + fy * fy - arc.r ** 2
+        disc = b * b - a * c
+        if disc < -eps * a * arc.r:
+            return []
+        root = sqrt(max(disc, 0.0))
+        return [(line.xl + t * dx, line.yl + t * dy)
+                for t in ((-b - root) / a, (-b + root) / a)]
+
+    def intersect_circle_circle(self, arc1, arc2):
+        dx = arc2.O.x - arc1.O.x
+        dy = arc2.O.y - arc1.O.y
+        d = sqrt(dx * dx + dy * dy)
+        if d <= eps:
+            # The same circle (overlapping) or concentric ones
+            return None if abs(arc1.r - arc2.r) <= eps else []
+        if d > arc1.r + arc2.r + eps or d < abs(arc1.r - arc2.r) - eps:
+            return []
+        a = (arc1.r ** 2 - arc2.r ** 2 + d * d) / (2 * d)
+        h = sqrt(max(arc1.r ** 2 - a * a, 0.0))
+        xm = arc1.O.x + a * dx / d
+        ym = arc1.O.y + a * dy / d
+        return [(xm + h * dy / d, ym - h * dx / d),
+                (xm - h * dy / d, ym + h * dx / d)]
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+2D affine transformation of the EntityContent hierarchy.
+
+A Transform maps a point with x' = a * x + b * y + e and y' = c * x + d * y + f.
+Each EntityContent caches the transformation of its whole parent chain, so the
+absolute geometries are calculated with one multiplication per coordinate
+instead of a recursion with sin and cos for each point.
+
+The absolute geometries (abs_geo) are only calculated when they are used, and
+again after the Transform of their parent changed.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from math import sin, cos
+
+from core.point import Point
+
+
+class Transform(object):
+    __slots__ = ["a", "b", "c", "d", "e", "f", "r_sca"]
+
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=1.0, e=0.0, f=0.0, r_sca=1.0):
+        """
+        @param r_sca: The factor for the radius of arcs (x scale of all levels)
+        """
+        self.a = a
+        self.b = b
+        self.c = c
+        self.d = d
+        self.e = e
+        self.f = f
+        self.r_sca = r_sca
+
+    def __str__(self):
+        return "Transform(%s, %s, %s, %s, %s, %s)" % (self.a, self.b, self.c,
+                                                     self.d, self.e, self.f)
+
+    @staticmethod
+    def from_insert(p0, pb, sca, rot):
+        """
+        Transformation of one insert (same as Point.rot_sca_abs)
+        @param p0: The Offset
+        @param pb: The Base Point
+        @param sca: The Scale
+        @param rot: The angle by which the contour is rotated around p0
+        @return: A new Transform
+        """
+        a = cos(rot) * sca[0]
+        b = -sin(rot) * sca[0]
+        c = sin(rot) * sca[1]
+        d = cos(rot) * sca[1]
+        return Transform(a, b, c, d,
+                         p0.x - a * pb.x - b * pb.y,
+                         p0.y - c * pb.x - d * pb.y,
+                         sca[0])
+
+    @staticmethod
+    def of(parent):
+        """
+        @param parent: The parent Entity (EntityContent) or None
+        @return: The Transform of the parent or the identity
+        """
+        if parent is None:
+            return IDENTITY
+        return parent.get_transform()
+
+    def compose(self, inner):
+        """
+        @param inner: The Transform which is applied first
+        @return: A new Transform which applies inner and then self
+        """
+        return Transform(self.a * inner.a + self.b * inner.c,
+                         self.a * inner.b + self.b * inner.d,
+                         self.c * inner.a + self.d * inner.c,
+                         self.c * inner.b + self.d * inner.d,
+                         self.a * inner.e + self.b * inner.f + self.e,
+                         self.c * inner.e + self.d * inner.f + self.f,
+                         self.r_sca * inner.r_sca)
+
+    def apply(self, point):
+        """
+        @param point: The Point to be transformed
+        @return: A new Point
+        """
+        x = point.x
+        y = point.y
+        return Point(self.a * x + self.b * y + self.e,
+                     self.c * x + self.d * y + self.f)
+
+    def is_mirrored(self):
+        """
+        @return: True if the transformation changes the direction of arcs
+        """
+        return self.a * self.d - self.b * self.c < 0.0
+
+
+IDENTITY = Transform()
+
+
+class LazyAbsGeo(object):
+    """
+    Base class of the geometries which have an absolute geometry. Subclasses
+    implement build_abs_geo.
+    """
+    abs_parent = None
+    abs_transform = None
+    abs_cache = None
+
+    def make_abs_geo(self, parent=None, transform=None):
+        """
+        Generates the absolute geometry based on itself and the parent. This
+        is done for rotating and scaling purposes. It is calculated when it is
+        used first.
+        @param parent: The parent of the geometry (EntityContent)
+        @param transform: The Transform of the parent, if already known
+        """
+        self.abs_parent = parent
+        self.abs_transform = Transform.of(parent) if transform is None else transform
+        self.abs_cache = None
+
+    def build_abs_geo(self, transform):
+        """
+        @param transform: The Transform of the parent
+        @return: A new absolute geometry
+        """
+        raise NotImplementedError()
+
+    def get_abs_geo(self):
+        transform = self.abs_transform
+        if transform is None:
+            return self.abs_cache
+
+        if self.abs_parent is not None:
+            parent_transform = self.abs_parent.get_transform()
+            if parent_transform is not transform:
+                self.abs_transform = transform = parent_transform
+                self.abs_cache = None
+
+        if self.abs_cache is None:
+            self.abs_cache = self.build_abs_geo(transform)
+        return self.abs_cache
+
+    def set_abs_geo(self, abs_geo):
+        """
+        Set an absolute geometry which does not depend on a parent
+        """
+        self.abs_parent = None
+        self.abs_transform = None
+        self.abs_cache = abs_geo
+
+    abs_geo = property(get_abs_geo, set_abs_geo)
+
+    def reverse_abs_geo(self):
+        """
+        Reverses the absolute geometry if it was already calculated
+        """
+        if self.abs_cache is not None:
+            self.abs_cache.reverse()
@@ -34,16 +34,18 @@ from math import degrees, radians
 from copy import copy, deepcopy
 import logging
 import argparse
+import multiprocessing
 import subprocess
 import tempfile
 
 from core.point import Point
 from core.layercontent import LayerContent, Layers, Shapes
 from core.entitycontent import EntityContent
-from core.customgcode import CustomGCode
 from core.linegeo import LineGeo
 from core.holegeo import HoleGeo
 from core.project import Project
+from core.shapeindex import ShapeIndex
+from core.containmenttree import ContainmentTree
 from globals.config import MyConfig
 import globals.globals as g
 from globals.logger import LoggerClass
@@ -54,6 +56,7 @@ from gui.popupdialog import PopUpDialog
 from gui.aboutdialog import AboutDialog
 
 from dxfimport.importer import ReadDXF
+from dxfimport.importcache import ImportCache
 
 from postpro.postprocessor import MyPostProcessor
 from postpro.tspoptimisation import TspOptimization
@@ -125,6 +128,7 @@ class MainWindow(QMainWindow):
 
         self.MyPostProcessor = MyPostProcessor()
         self.d2g = Project(self)
+        self.importCache = ImportCache(os.path.join(g.folder, c.DEFAULT_IMPORT_CACHE_DIR))
 
         self.createActions()
         self.connectToolbarToConfig()
@@ -133,6 +137,7 @@ class MainWindow(QMainWindow):
 
         self.valuesDXF = None
         self.shapes = Shapes([])
+        self.shapeIndex = ShapeIndex()
         self.entityRoot = None
         self.layerContents = Layers([])
         self.newNumber = 1
@@ -477,34 +482,21 @@ class MainWindow(QMainWindow):
            self.ui.actionAutomaticCutterCompensation.isChecked():
             for layerContent in self.layerContents.non_break_layer_iter():
                 if layerContent.automaticCutterCompensationEnabled():
-                    new_exp_order = []
-                    outside_compensation = True
-                    shapes_left = layerContent.shapes
-                    while len(shapes_left) > 0:
-                        shapes_left = [shape for shape in shapes_left
-                                       if not self.ifNotContainedChangeCutCor(shape, shapes_left, outside_compensation, new_exp_order)]
-                        outside_compensation = not outside_compensation
-                    layerContent.exp_order = list(reversed(new_exp_order))
+                    # The outermost shapes are compensated outside, the ones
+                    # within them inside, and so on. Inner shapes are cut first.
+                    tree = ContainmentTree(layerContent.shapes, self.shapeIndex)
+                    for shape in tree.shapes:
+                        self.changeCutCor(shape, tree.get_depth(shape) % 2 == 0)
+                    layerContent.exp_order = [shape.nr for shape in tree.inside_out_order(layerContent.shapes)]
         self.TreeHandler.updateTreeViewOrder()
         self.canvas_scene.update()
 
-    def ifNotContainedChangeCutCor(self, shape, shapes_left, outside_compensation, new_exp_order):
-        if not isinstance(shape, CustomGCode):
-            for outerShape in shapes_left:
-                if self.isShapeContained(shape, outerShape):
-                    return False
-            if outside_compensation == shape.cw:
-                shape.cut_cor = 41
-            else:
-                shape.cut_cor = 42
-            self.canvas_scene.repaint_shape(shape)
-        new_exp_order.append(shape.nr)
-        return True
-
-    def isShapeContained(self, shape, outerShape):
-        return shape != outerShape and not \
-            isinstance(outerShape, CustomGCode) and\
-            shape.BB.iscontained(outerShape.BB)
+    def changeCutCor(self, shape, outside_compensation):
+        if outside_compensation == shape.cw:
+            shape.cut_cor = 41
+        else:
+            shape.cut_cor = 42
+        self.canvas_scene.repaint_shape(shape)
 
     def showSaveDialog(self, title, MyFormats):
         """
@@ -611,9 +603,9 @@ class MainWindow(QMainWindow):
             return
 
         self.cont_scale = float(ScaEntDialog.result[0])
-        self.entityRoot.sca = self.cont_scale
+        self.entityRoot.sca = [self.cont_scale, self.cont_scale, self.cont_scale]
 
-        self.d2g.small_reload()
+        self.updateTransform()
 
     def rotateAll(self):
         title = self.tr('Rotate Contour')
@@ -627,7 +619,7 @@ class MainWindow(QMainWindow):
         self.cont_rotate = radians(float(RotEntDialog.result[0]))
         self.entityRoot.rot = self.cont_rotate
 
-        self.d2g.small_reload()
+        self.updateTransform()
 
     def moveWorkpieceZero(self):
         """
@@ -656,10 +648,33 @@ class MainWindow(QMainWindow):
             self.cont_dx = float(MoveWpzDialog.result[0])
             self.cont_dy = float(MoveWpzDialog.result[1])
 
-        self.entityRoot.p0.x = self.cont_dx
-        self.entityRoot.p0.y = self.cont_dy
+        self.entityRoot.p0 = Point(self.cont_dx, self.cont_dy)
 
-        self.d2g.small_reload()
+        self.updateTransform()
+
+    def updateTransform(self):
+        """
+        Update the drawing after the scale, rotation or workpiece zero of the
+        root entity changed. The absolute geometries are calculated again when
+        they are used, so only the paths, start moves and bounding boxes of the
+        shapes are repainted. The file is not reloaded and the settings of the
+        shapes are kept.
+        """
+        self.setCursor(QtCore.Qt.WaitCursor)
+        self.app.processEvents()
+
+        self.canvas_scene.delete_opt_paths()
+        self.ui.actionDeleteG0Paths.setEnabled(False)
+
+        self.canvas_scene.repaint_all()
+        self.setShowPathDirections()
+        self.TreeHandler.updateEntityTransform()
+        self.canvas.autoscale()
+
+        # Draw the export route again if it is updated live
+        self.TreeHandler.prepareExportOrderUpdate()
+
+        self.unsetCursor()
 
     def setMachineTypeToMilling(self):
         g.config.machine_type = 'milling'
@@ -777,7 +792,12 @@ class MainWindow(QMainWindow):
 
         logger.info(self.tr('Loading file: %s') % self.filename)
 
-        self.valuesDXF = ReadDXF(self.filename)
+        # Files which were already imported are read from the cache
+        cache_key = self.importCache.get_key(self.filename)
+        self.valuesDXF = self.importCache.load(cache_key)
+        if self.valuesDXF is None:
+            self.valuesDXF = ReadDXF(self.filename)
+            self.importCache.store(cache_key, self.valuesDXF)
 
         # Output the information in the text window
         logger.info(self.tr('Loaded layers: %s') % len(self.valuesDXF.layers))
@@ -862,6 +882,9 @@ class MainWindow(QMainWindow):
         self.layerContents.sort(key=lambda x: x.nr)
         self.newNumber = len(self.shapes)
 
+        # Built when it is used first, i.e. after the shapes are plotted
+        self.shapeIndex = ShapeIndex(self.shapes)
+
     def makeEntityShapes(self, parent, layerNr=-1):
         """
         Instance is called prior to plotting the shapes. It creates
@@ -930,6 +953,8 @@ class MainWindow(QMainWindow):
                 if len(tmp_shape.geos) > 0:
                     # All shapes have to be CW direction.
                     tmp_shape.AnalyseAndOptimize()
+                    if g.config.vars.Import_Parameters['compact_geometry']:
+                        tmp_shape.geos = tmp_shape.geos.pack()
 
                     self.shapes.append(tmp_shape)
                     if g.config.vars.Import_Parameters['insert_at_block_layer'] and layerNr != -1:
@@ -1064,6 +1089,9 @@ if __name__ == "__main__":
     """
     The main function which is executed after program start.
     """
+    # Needed for the process pool of the DXF import in frozen executables
+    multiprocessing.freeze_support()
+
     Log = LoggerClass(logger)
 
     g.config = MyConfig()
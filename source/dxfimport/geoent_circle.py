@@ -82,7 +82,7 @@ class GeoentCircle(object):
 
         # Assign short name
         lp = caller.line_pairs
-        e = lp.index_code(0, caller.start + 1)
+        e = lp.entity_end(caller.start)
 
         # Assign layer
         s = lp.index_code(8, caller.start + 1)
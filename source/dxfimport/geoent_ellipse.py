@@ -69,7 +69,10 @@ class GeoentEllipse(object):
 
         # Errechnen der Ellipse / Calculate the ellipse
         self.Ellipse_Grundwerte()
-        self.Ellipse_2_Arcs(tol)
+        if g.config.vars.Import_Parameters['ellipse_fitting'] == 'curvature':
+            self.Ellipse_2_Arcs_curvature(tol)
+        else:
+            self.Ellipse_2_Arcs(tol)
 
     def __str__(self):
         # how to print the object
@@ -117,7 +120,7 @@ class GeoentEllipse(object):
         """
         # Assign short name
         lp = caller.line_pairs
-        e = lp.index_code(0, caller.start + 1)
+        e = lp.entity_end(caller.start)
 
         # Assign Layer
         s = lp.index_code(8, caller.start + 1)
@@ -237,6 +240,104 @@ class GeoentEllipse(object):
         # print degrees(angle)
         # print self
 
+    def Ellipse_2_Arcs_curvature(self, tol):
+        """
+        Ellipse_2_Arcs_curvature() - Fit the ellipse with biarcs, the angles
+        of the sections are calculated from the curvature of the ellipse such
+        that each section is as long as the estimated error of its biarc
+        allows (see Ellipse_Fitting_Error).
+        """
+        direction = 1 if self.ext >= 0 else -1
+        angle_end = self.AngS + self.ext
+        angle = self.AngS
+
+        Ps = self.Ellipse_Point(angle)
+        tana = self.Ellipse_Tangent(angle)
+
+        self.geo = []
+        self.PtsVec = [[Ps, tana]]
+
+        while direction * (angle_end - angle) > 1e-12:
+            # A biarc is not defined for a full ellipse
+            step = min(abs(angle_end - angle), pi)
+            if self.Ellipse_Fitting_Error(angle, angle + direction * step) > tol:
+                # The error increases with the length of the section, find the
+                # longest one within the tolerance (0.1 % precision is enough)
+                low, high = 0.0, step
+                while high - low > 1e-3 * high:
+                    step = (low + high) / 2
+                    if self.Ellipse_Fitting_Error(angle, angle + direction * step) > tol:
+                        high = step
+                    else:
+                        low = step
+                step = low
+
+            angle += direction * step
+            if direction * (angle_end - angle) <= 1e-12:
+                angle = angle_end
+
+            Pb = self.Ellipse_Point(angle)
+            tanb = self.Ellipse_Tangent(angle)
+
+            biarcs = BiarcClass(Ps, tana, Pb, tanb, tol / 100)
+            self.geo += biarcs.geos[:]
+
+            Ps = Pb
+            tana = tanb
+            self.PtsVec.append([Ps, tana])
+
+    def Ellipse_Fitting_Error(self, ang0, ang1):
+        """
+        Ellipse_Fitting_Error() - Estimate of the distance between the ellipse
+        and a biarc between the angles ang0 and ang1 which has the same points
+        and tangents at both ends. For a section of length L it is
+        |dk/ds| * L^3 / 324 for a linear curvature k and |d2k/ds2| * L^4 / 384
+        for a quadratic one; the derivatives are the maximum values at the
+        ends and in the middle of the section, and a margin of 25 % is added
+        for the higher order terms.
+        """
+        length = self.Ellipse_Length(min(ang0, ang1), max(ang0, ang1))
+        ders = [self.Ellipse_Curvature_Ders(alpha) for alpha in (ang0, (ang0 + ang1) / 2, ang1)]
+        dk = max(abs(der[0]) for der in ders)
+        ddk = max(abs(der[1]) for der in ders)
+        return 1.25 * (dk * length ** 3 / 324 + ddk * length ** 4 / 384)
+
+    def Ellipse_Curvature_Ders(self, alpha=0):
+        """
+        Ellipse_Curvature_Ders() - First and second derivative of the
+        curvature k = a * b / q^(3/2) of the ellipse with respect to the
+        length s, where q = b^2 + (a^2 - b^2) * sin(alpha)^2 is the square of
+        ds/dalpha.
+        """
+        ab = self.a * self.b
+        q = self.b ** 2 + (self.a ** 2 - self.b ** 2) * sin(alpha) ** 2
+        dq = (self.a ** 2 - self.b ** 2) * sin(2 * alpha)
+        ddq = 2 * (self.a ** 2 - self.b ** 2) * cos(2 * alpha)
+
+        # Derivatives with respect to alpha
+        dk = -1.5 * ab * q ** -2.5 * dq
+        ddk = ab * (3.75 * q ** -3.5 * dq ** 2 - 1.5 * q ** -2.5 * ddq)
+
+        return dk / sqrt(q), ddk / q - dk * dq / (2 * q ** 2)
+
+    def Ellipse_Speed(self, alpha=0):
+        """
+        Ellipse_Speed() - Length of the derivative of the ellipse point
+        """
+        return sqrt((self.a * sin(alpha)) ** 2 + (self.b * cos(alpha)) ** 2)
+
+    def Ellipse_Length(self, ang0, ang1):
+        """
+        Ellipse_Length() - Length of the ellipse between the angles ang0 and
+        ang1 (Simpson's rule)
+        """
+        step = (ang1 - ang0) / 4
+        return abs(step) / 3 * (self.Ellipse_Speed(ang0) +
+                                4 * self.Ellipse_Speed(ang0 + step) +
+                                2 * self.Ellipse_Speed(ang0 + 2 * step) +
+                                4 * self.Ellipse_Speed(ang0 + 3 * step) +
+                                self.Ellipse_Speed(ang1))
+
     def check_ellipse_fitting_tolerance(self, biarc, tol, ang0, ang1):
         """
         check_ellipse_fitting_tolerance()
@@ -71,7 +71,7 @@ class GeoentInsert(object):
         """
         # Assign short name
         lp = caller.line_pairs
-        e = lp.index_code(0, caller.start + 1)
+        e = lp.entity_end(caller.start)
 
         # Block Name
         ind = lp.index_code(2, caller.start + 1, e)
@@ -26,7 +26,6 @@
 from __future__ import absolute_import
 
 from core.point import Point
-from dxfimport.spline_convert import Spline2Arcs
 from dxfimport.classes import PointsClass, ContourClass
 
 import globals.globals as g
@@ -59,10 +58,10 @@ class GeoentSpline:
 
         # Umwandeln zu einem ArcSpline
         # Convert to a ArcSpline
-        Spline2ArcsClass = Spline2Arcs(degree=self.degree, Knots=self.Knots,
-                                       Weights=self.Weights, CPoints=self.CPoints, tol=tol, check=check)
-
-        self.geo = Spline2ArcsClass.Curve
+        # Identical splines are converted once per import
+        self.geo = caller.spline_cache.convert(degree=self.degree, Knots=self.Knots,
+                                               Weights=self.Weights, CPoints=self.CPoints,
+                                               tol=tol, check=check)
 
         for geo in self.geo:
             self.length += geo.length
@@ -149,7 +148,7 @@ class GeoentSpline:
         """
         # Assign short name
         lp = caller.line_pairs
-        e = lp.index_code(0, caller.start + 1)
+        e = lp.entity_end(caller.start)
 
         # Assign layer
         s = lp.index_code(8, caller.start + 1)
@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+
+############################################################################
+#
+#   Copyright (C) 2015
+#    Christian Kohlöffel
+#    Jean-Paul Schouwstra
+#
+#   This file is part of DXF2GCODE.
+#
+#   DXF2GCODE is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   DXF2GCODE is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with DXF2GCODE.  If not, see <http://www.gnu.org/licenses/>.
+#
+############################################################################
+
+"""
+Cache of imported DXF files.
+
+The result of ReadDXF (layers, blocks, entities and their contours) is stored
+in a binary file per DXF file. The name of the file is a hash of the DXF
+contents and of the import parameters which change the result. The least
+recently used files are removed if the cache grows beyond its size.
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+from array import array
+import hashlib
+import json
+import logging
+import os
+import struct
+import zlib
+
+from core.arcgeo import ArcGeo
+from core.holegeo import HoleGeo
+from core.linegeo import LineGeo
+from core.point import Point
+from dxfimport.classes import ContourClass
+from dxfimport.importer import ReadDXF, LayerClass, EntitiesClass, BlocksClass
+
+import globals.globals as g
+
+from globals.six import PY2
+
+logger = logging.getLogger("DxfImport.ImportCache")
+
+# Increment this each time the format or the import result changes
+CACHE_VERSION = 3
+
+CACHE_MAGIC = b"D2GCACHE"
+CACHE_EXTENSION = '.d2gc'
+
+# Geometry types within the cache
+LINE, ARC, HOLE = range(3)
+
+
+class CachedGeoent(object):
+    """
+    Imported entity restored from the cache. Only the values which are used
+    after the import are stored (see MainWindow.makeEntityShapes).
+    """
+    def __init__(self, Typ='', Nr=0, Layer_Nr=0, length=0.0, geo=None):
+        self.Typ = Typ
+        self.Nr = Nr
+        self.Layer_Nr = Layer_Nr
+        self.length = length
+        self.geo = geo if geo is not None else []
+
+    def __str__(self):
+        return "\nTyp:      %s" % self.Typ +\
+               "\nNr:       %i" % self.Nr +\
+               "\nLayer Nr: %i" % self.Layer_Nr +\
+               "\nlength:   %s" % self.length +\
+               "\ngeo:      %s" % self.geo
+
+
+class CacheWriter(object):
+    """
+    Collects the integers, floats and strings of the cache in separate arrays
+    """
+    def __init__(self):
+        self.ints = array('i')
+        self.floats = array('d')
+        self.strings = []
+
+    def write_int(self, *values):
+        self.ints.extend(values)
+
+    def write_float(self, *values):
+        self.floats.extend(values)
+
+    def write_str(self, value):
+        self.strings.append(value)
+
+    def to_bytes(self):
+        if PY2:
+            ints, floats = self.ints.tostring(), self.floats.tostring()
+        else:
+            ints, floats = self.ints.tobytes(), self.floats.tobytes()
+        strings = json.dumps(self.strings).encode('utf-8')
+        return CACHE_MAGIC + struct.pack('<iii', len(ints), len(floats), len(strings)) +\
+            zlib.compress(ints + floats + strings, 1)
+
+
+class CacheReader(object):
+    """
+    Reads the values in the same order as they were written by CacheWriter
+    """
+    def __init__(self, data):
+        if not data.startswith(CACHE_MAGIC):
+            raise ValueError("Not an import cache file")
+        start = len(CACHE_MAGIC)
+        ints_len, floats_len, strings_len = struct.unpack('<iii', data[start:start + 12])
+        data = zlib.decompress(data[start + 12:])
+
+        self.ints = array('i')
+        self.floats = array('d')
+        if PY2:
+            self.ints.fromstring(data[:ints_len])
+            self.floats.fromstring(data[ints_len:ints_len + floats_len])
+        else:
+            self.ints.frombytes(data[:ints_len])
+            self.floats.frombytes(data[ints_len:ints_len + floats_len])
+        self.strings = json.loads(data[ints_len + floats_len:].decode('utf-8'))
+        self.int_pos = self.float_pos = self.str_pos = 0
+
+    def read_int(self):
+        self.int_pos += 1
+        return self.ints[self.int_pos - 1]
+
+    def read_float(self):
+        self.float_pos += 1
+        return self.floats[self.float_pos - 1]
+
+    def read_point(self):
+        self.float_pos += 2
+        return Point(self.floats[self.float_pos - 2], self.floats[self.float_pos - 1])
+
+    def read_str(self):
+        self.str_pos += 1
+        return self.strings[self.str_pos - 1]
+
+
+class ImportCache(object):
+    """
+    On disk cache of the imported DXF files
+    """
+    def __init__(self, folder):
+        """
+        @param folder: folder for the cache files, created when needed
+        """
+        self.folder = folder
+
+    def max_size(self):
+        """
+        @return: the maximum size of the cache in bytes, 0 if disabled
+        """
+        return g.config.vars.Import_Parameters['import_cache_size'] * 1024 * 1024
+
+    def get_key(self, filename):
+        """
+        Get the key of a file. It depends on the contents of the file and the
+        import parameters.
+        @param filename: name of the DXF file
+        @return: key (hex string) or None if the cache is disabled
+        """
+        if not self.max_size():
+            return None
+
+        hash_ = hashlib.sha1()
+        with open(filename, 'rb') as file_:
+            for chunk in iter(lambda: file_.read(1 << 20), b""):
+                hash_.update(chunk)
+
+        params = (CACHE_VERSION,
+                  g.config.point_tolerance,
+                  g.config.fitting_tolerance,
+                  g.config.vars.Import_Parameters['spline_check'],
+                  g.config.vars.Import_Parameters['contour_search'],
+                  g.config.vars.Import_Parameters['ellipse_fitting'])
+        hash_.update(repr(params).encode('utf-8'))
+        return hash_.hexdigest()
+
+    def get_filename(self, key):
+        return os.path.join(self.folder, key + CACHE_EXTENSION)
+
+    def load(self, key):
+        """
+        Load the import result from the cache.
+        @param key: key as returned by get_key()
+        @return: ReadDXF instance or None if not in the cache
+        """
+        if key is None:
+            return None
+
+        filename = self.get_filename(key)
+        if not os.path.isfile(filename):
+            logger.debug("Import cache miss: %s" % key)
+            return None
+
+        try:
+            with open(filename, 'rb') as file_:
+                values = self.read_values(CacheReader(file_.read()))
+            # Mark as recently used
+            os.utime(filename, None)
+        except (IOError, OSError, ValueError, IndexError, struct.error, zlib.error) as e:
+            logger.warning("Removing unreadable import cache file %s: %s" % (filename, e))
+            self.remove(filename)
+            return None
+
+        g.config.metric = values.metric
+        values.update_tool_values()
+
+        logger.debug("Import cache hit: %s" % key)
+        return values
+
+    def store(self, key, values):
+        """
+        Store the import result in the cache and remove the least recently used
+        files if the cache became too big.
+        @param key: key as returned by get_key()
+        @param values: ReadDXF instance
+        """
+        if key is None:
+            return
+
+        writer = CacheWriter()
+        self.write_values(writer, values)
+        try:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            with open(self.get_filename(key), 'wb') as file_:
+                file_.write(writer.to_bytes())
+        except (IOError, OSError) as e:
+            logger.warning("Writing the import cache failed: %s" % e)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used files until the cache fits its size
+        """
+        try:
+            files = [os.path.join(self.folder, name) for name in os.listdir(self.folder)
+                     if name.endswith(CACHE_EXTENSION)]
+            files = [(os.path.getmtime(name), os.path.getsize(name), name) for name in files]
+        except OSError as e:
+            logger.warning("Reading the import cache failed: %s" % e)
+            return
+
+        size = sum(file_[1] for file_ in files)
+        max_size = self.max_size()
+        for _, file_size, name in sorted(files):
+            if size <= max_size:
+                break
+            self.remove(name)
+            size -= file_size
+
+    def remove(self, filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
+
+    def write_values(self, writer, values):
+        writer.write_int(g.config.metric, len(values.layers), len(values.blocks.Entities))
+        for layer in values.layers:
+            writer.write_str(layer.name)
+        for entities in values.blocks.Entities + [values.entities]:
+            self.write_entities(writer, entities)
+
+    def read_values(self, reader):
+        values = ReadDXF()
+        values.metric = reader.read_int()
+        nr_layers = reader.read_int()
+        nr_blocks = reader.read_int()
+        values.layers = [LayerClass(nr, reader.read_str()) for nr in range(nr_layers)]
+        values.blocks = BlocksClass([self.read_entities(reader) for _ in range(nr_blocks)])
+        values.entities = self.read_entities(reader)
+        return values
+
+    def write_entities(self, writer, entities):
+        writer.write_int(entities.Nr, len(entities.geo), len(entities.cont))
+        writer.write_str(entities.Name)
+        writer.write_float(entities.basep.x, entities.basep.y)
+
+        for geoent in entities.geo:
+            writer.write_str(geoent.Typ)
+            writer.write_int(geoent.Nr, geoent.Layer_Nr)
+            writer.write_float(geoent.length)
+            if geoent.Typ == 'Insert':
+                writer.write_str(geoent.BlockName)
+                writer.write_float(geoent.Point.x, geoent.Point.y, geoent.rot, *geoent.Scale)
+                continue
+
+            writer.write_int(len(geoent.geo))
+            for geo in geoent.geo:
+                if isinstance(geo, LineGeo):
+                    writer.write_int(LINE)
+                    writer.write_float(geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y)
+                elif isinstance(geo, ArcGeo):
+                    writer.write_int(ARC)
+                    writer.write_float(geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y,
+                                       geo.O.x, geo.O.y, geo.r, geo.s_ang, geo.e_ang, geo.ext)
+                else:
+                    writer.write_int(HOLE)
+                    writer.write_float(geo.Ps.x, geo.Ps.y)
+
+        for cont in entities.cont:
+            writer.write_int(cont.cont_nr, cont.closed, len(cont.order))
+            writer.write_float(cont.length)
+            for geo_nr, direction in cont.order:
+                writer.write_int(geo_nr, direction)
+
+    def read_entities(self, reader):
+        Nr = reader.read_int()
+        nr_geo = reader.read_int()
+        nr_cont = reader.read_int()
+        entities = EntitiesClass(Nr, reader.read_str(), [], [])
+        entities.basep = reader.read_point()
+
+        for _ in range(nr_geo):
+            geoent = CachedGeoent(reader.read_str(), reader.read_int(),
+                                  reader.read_int(), reader.read_float())
+            if geoent.Typ == 'Insert':
+                geoent.BlockName = reader.read_str()
+                geoent.Point = reader.read_point()
+                geoent.rot = reader.read_float()
+                geoent.Scale = [reader.read_float() for _ in range(3)]
+                entities.geo.append(geoent)
+                continue
+
+            for _ in range(reader.read_int()):
+                geo_type = reader.read_int()
+                if geo_type == LINE:
+                    geo = LineGeo(reader.read_point(), reader.read_point())
+                elif geo_type == ARC:
+                    Ps, Pe, O = reader.read_point(), reader.read_point(), reader.read_point()
+                    r, s_ang, e_ang, ext = [reader.read_float() for _ in range(4)]
+                    geo = ArcGeo(Ps, Pe, O, r, s_ang, e_ang, ext)
+                    # ext of reversed arcs may differ in the last digits
+                    # if it is calculated again
+                    geo.ext = ext
+                    geo.length = geo.r * abs(ext)
+                else:
+                    geo = HoleGeo(reader.read_point())
+                geoent.geo.append(geo)
+            entities.geo.append(geoent)
+
+        for _ in range(nr_cont):
+            cont_nr = reader.read_int()
+            closed = reader.read_int()
+            order_len = reader.read_int()
+            length = reader.read_float()
+            order = [[reader.read_int(), reader.read_int()] for _ in range(order_len)]
+            entities.cont.append(ContourClass(cont_nr, closed, order, length))
+        return entities
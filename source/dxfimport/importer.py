@@ -27,11 +27,18 @@ from __future__ import division
 
 from __future__ import absolute_import
 
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
 from copy import deepcopy, copy
 import logging
+from math import floor
+import mmap
+from multiprocessing import Pool, cpu_count
+from time import time
 
 from core.point import Point
-from dxfimport.classes import ContourClass
+from dxfimport.classes import ContourClass, PointsClass
 from dxfimport.geoent_arc import GeoentArc
 from dxfimport.geoent_circle import GeoentCircle
 from dxfimport.geoent_insert import GeoentInsert
@@ -41,6 +48,7 @@ from dxfimport.geoent_spline import GeoentSpline
 from dxfimport.geoent_ellipse import GeoentEllipse
 from dxfimport.geoent_lwpolyline import GeoentLwPolyline
 from dxfimport.geoent_point import GeoentPoint
+from dxfimport.spline_convert import SplineCache
 
 import globals.globals as g
 
@@ -55,6 +63,24 @@ else:
 
 logger = logging.getLogger("DxfImport.Import")
 
+# Geoent classes of the supported entities
+GEOENT_CLASSES = {"POLYLINE": GeoentPolyline,
+                  "SPLINE": GeoentSpline,
+                  "ARC": GeoentArc,
+                  "CIRCLE": GeoentCircle,
+                  "LINE": GeoentLine,
+                  "INSERT": GeoentInsert,
+                  "ELLIPSE": GeoentEllipse,
+                  "LWPOLYLINE": GeoentLwPolyline,
+                  "POINT": GeoentPoint}
+
+# Encoding used to decode the values of the line pairs
+DXF_ENCODING = 'utf-8'
+
+# Number of paths which are compared by the graph contour search before
+# branches are no longer followed
+MAX_CONTOUR_PATHS = 1000
+
 
 class ReadDXF(QtCore.QObject):
     # Initialise the class
@@ -64,13 +90,23 @@ class ReadDXF(QtCore.QObject):
         # Setting up logger
         # logger = g.logger.logger
 
-        str_ = self.Read_File(filename)
-        g.config.metric = self.Get_Unit(str_)
+        # Number of contour searches which were stopped by MAX_CONTOUR_PATHS
+        self.truncated_searches = 0
 
-        self.update_tool_values()
+        # Without filename only an empty instance is created, which is used
+        # for the contour search in the worker processes
+        if filename is None:
+            return
+
+        data = self.Read_File(filename)
 
         # Load the contour and store the values in the classes
-        self.line_pairs = self.Get_Line_Pairs(str_)
+        self.line_pairs = self.Get_Line_Pairs(data)
+        del data
+
+        g.config.metric = self.Get_Unit(self.line_pairs)
+
+        self.update_tool_values()
 
         # Debug Informationen
         # logger.info(("\n\nFile has   %0.0f Lines" % len(str_)), 1)
@@ -80,22 +116,27 @@ class ReadDXF(QtCore.QObject):
         sections_pos = self.Get_Sections_pos()
         self.layers = self.Read_Layers(sections_pos)
 
+        # Number of entities and read time per entity type
+        self.entity_stats = {}
+        # Converted splines, reused for identical splines
+        self.spline_cache = SplineCache()
+
         blocks_pos = self.Get_Blocks_pos(sections_pos)
         self.blocks = self.Read_Blocks(blocks_pos)
         self.entities = self.Read_Entities(sections_pos)
+        # Release the file, all values are read
+        self.line_pairs.close()
+        self.Log_Entity_Stats()
+        self.spline_cache.log_stats()
 
         # Aufruf der Klasse um die Konturen zur suchen
         # Schleife f�r die Anzahl der Bl�cke und den Layern
         # Call the class to define the contours of search
         # Loop for the number of blocks and the layer
-        for i in range(len(self.blocks.Entities)):
-            # '\n'
-            # print self.blocks.Entities[i]
-            logger.info(self.tr("Creating Contours of Block Nr: %i") %i)
-            self.blocks.Entities[i].cont = self.Get_Contour(self.blocks.Entities[i])
-
-        logger.info(self.tr("Creating Contours of Entities"))
-        self.entities.cont = self.Get_Contour(self.entities)
+        entities_list = self.blocks.Entities + [self.entities]
+        conts = self.Get_Contours(entities_list)
+        for entities, cont in zip(entities_list, conts):
+            entities.cont = cont
 
     def tr(self, string_to_translate):
         """
@@ -108,18 +149,24 @@ class ReadDXF(QtCore.QObject):
 
     def Read_File(self, filename):
         """
-        Read_File() - Load the selected DXF files
+        Read_File() - Load the selected DXF files. The file is mapped into
+        memory instead of being read at once, the pages are loaded when they
+        are accessed.
         @param: filename: name of the file to load
-        @return: file contents as a list of strings
+        @return: raw file contents as mmap (bytes for empty files)
         """
-        file_ = open(filename, 'r')
-        str_ = file_.readlines()
-        file_.close()
-        return str_
-
-    def Get_Unit(self, str):
+        with open(filename, 'rb') as file_:
+            try:
+                return mmap.mmap(file_.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, mmap.error):
+                # Empty files cannot be mapped
+                return file_.read()
+
+    def Get_Unit(self, line_pairs):
         """
         Get_Unit() - Get unit of measure English (Imperial) or Metric from DXF file
+        @param: line_pairs: the line pairs of the DXF file
+        @return: 0 for English units, 1 for Metric units
         """
         # Set drawing units: 0 = English; 1 = Metric
         # Metric will be treated as being in millimeters
@@ -127,10 +174,14 @@ class ReadDXF(QtCore.QObject):
 
         metric = 1  # default: metric
 
-        for line in range(len(str) - 2):
-            if str[line].startswith("$MEASUREMENT"):
-                metric = int(str[line + 2].strip())
-                break
+        # The variables are all stored within the HEADER section
+        header_end = line_pairs.index_both(0, "ENDSEC")
+        if header_end is None:
+            header_end = line_pairs.nrs
+
+        pos = line_pairs.index_both(9, "$MEASUREMENT", 0, header_end)
+        if pos is not None:
+            metric = int(line_pairs.line_pair[pos + 1].value)
 
         # Default drawing units for AutoCAD DesignCenter blocks:
         # 0 = Unitless; 1 = Inches; 2 = Feet; 3 = Miles; 4 = Millimeters;
@@ -140,13 +191,13 @@ class ReadDXF(QtCore.QObject):
         # 16 = Hectometers; 17 = Gigameters; 18 = Astronomical units;
         # 19 = Light years; 20 = Parsecs
 
-        for line in range(len(str) - 2):
-            if str[line].startswith("$INSUNITS"):
-                if int(str[line + 2].strip()) == 1:
-                    metric = 0
-                elif int(str[line + 2].strip()) == 4:
-                    metric = 1
-                break
+        pos = line_pairs.index_both(9, "$INSUNITS", 0, header_end)
+        if pos is not None:
+            insunits = int(line_pairs.line_pair[pos + 1].value)
+            if insunits == 1:
+                metric = 0
+            elif insunits == 4:
+                metric = 1
 
         return metric
 
@@ -166,28 +217,37 @@ class ReadDXF(QtCore.QObject):
             g.config.tool_units_metric = g.config.metric
 
     # Convert the uploaded file into line pairs (code & Value).
-    def Get_Line_Pairs(self, string):
-        line = 0
-        line_pairs = dxflinepairsClass([])
+    def Get_Line_Pairs(self, data):
+        """
+        Get_Line_Pairs() - Tokenize the raw file contents into line pairs.
+        Only the group codes and the offsets of the values are stored, the
+        values themselves are decoded when they are accessed.
+        @param: data: raw file contents as returned by Read_File()
+        @return: instance of dxflinepairsClass
+        """
+        newline = get_newline(data)
+        line_pairs = dxflinepairsClass(data, newline=newline)
 
         # Start at the first SECTION
-        while not string[line].startswith("SECTION"):
-            line += 1
-        line -= 1
+        if data[:7] == b"SECTION":
+            pos = 0
+        else:
+            pos = data.find(newline + b"SECTION") + 1
+        if pos > 0:
+            pos = data.rfind(newline, 0, pos - 1) + 1
+        line = data[:pos].count(newline)
 
         # Continue to the end if no error occurs. Otherwise abort with error
         try:
-            while line + 1 < len(string):
-                line_pairs.line_pair.append(dxflinepairClass(int(string[line].strip()), string[line + 1].strip()))
-                line += 2
+            for line, code, value_pos in iter_line_pairs(data, pos, line, newline):
+                line_pairs.append(int(code), value_pos)
 
         except ValueError:
             message = self.tr('Reading stopped at line %i.\n "%s" is not a valid code (number) - please, check/correct dxf file')\
-                      % (line + 1, string[line].strip())
+                      % (line + 1, code.decode(DXF_ENCODING, 'replace').strip())
             logger.warning(message)
             QMessageBox.warning(g.window, self.tr("Warning reading linepairs"), message)
 
-        line_pairs.nrs = len(line_pairs.line_pair)
         logger.debug(self.tr('Did read %i of linepairs from DXF') % line_pairs.nrs)
         return line_pairs
 
@@ -389,31 +449,36 @@ class ReadDXF(QtCore.QObject):
 
         # Instanz des neuen Objekts anlegen und gleichzeitig laden
         # Create a new instance of the object and at the same load ???
-        if name == "POLYLINE":
-            geo = GeoentPolyline(geo_nr, self)
-        elif name == "SPLINE":
-            geo = GeoentSpline(geo_nr, self)
-        elif name == "ARC":
-            geo = GeoentArc(geo_nr, self)
-        elif name == "CIRCLE":
-            geo = GeoentCircle(geo_nr, self)
-        elif name == "LINE":
-            geo = GeoentLine(geo_nr, self)
-        elif name == "INSERT":
-            geo = GeoentInsert(geo_nr, self)
-        elif name == "ELLIPSE":
-            geo = GeoentEllipse(geo_nr, self)
-        elif name == "LWPOLYLINE":
-            geo = GeoentLwPolyline(geo_nr, self)
-        elif name == "POINT":
-            geo = GeoentPoint(geo_nr, self)
+        started = time()
+        geoent_class = GEOENT_CLASSES.get(name)
+        if geoent_class is not None:
+            geo = geoent_class(geo_nr, self)
         else:
-            logger.info(("Found unsupported geometry type: %s !" % name))
-            self.start += 1  # Eins hochz�hlen sonst gibts ne dauer Schleife
-            return None
+            if name not in self.entity_stats:
+                logger.info(("Found unsupported geometry type: %s !" % name))
+            # Skip the whole entity
+            self.start = self.line_pairs.entity_end(self.start)
+            geo = None
+
+        # Count the entities and the time needed to read them
+        stats = self.entity_stats.setdefault(name, [0, 0.0])
+        stats[0] += 1
+        stats[1] += time() - started
 
         return geo
 
+    def Log_Entity_Stats(self):
+        """
+        Log_Entity_Stats() - Log the number of read entities and the time
+        needed per entity type
+        """
+        for name, (count, duration) in sorted(self.entity_stats.items(),
+                                              key=lambda item: -item[1][1]):
+            if name in GEOENT_CLASSES:
+                logger.debug("%s: %i entities read in %0.3f s" % (name, count, duration))
+            else:
+                logger.debug("%s: %i unsupported entities skipped" % (name, count))
+
     def Get_Layer_Nr(self, Layer_Name):
         """
         Get_Layer_Nr() - Find the number of geometry layers
@@ -442,24 +507,82 @@ class ReadDXF(QtCore.QObject):
         """
         Get_Contour() - Find the best contour the composite geometries
         """
-        cont = []
-
-        points = self.App_Cont_or_Calc_IntPts(entities.geo, cont)
-        points = self.Find_Common_Points(points)
-        # points = self.Remove_Redundant_Geos(points)
+        return self.Get_Contours([entities])[0]
 
-        found_cont = self.Search_Contours(entities.geo, points)
+    def Get_Contours(self, entities_list):
+        """
+        Get_Contours() - Find the best contours of several blocks / entities.
+        The contour search of each block is independent. If searches were
+        stopped by MAX_CONTOUR_PATHS, one warning is logged for all of them. If more than one
+        worker is configured (Import_Parameters contour_workers), the
+        searches are done in a process pool. The result does not depend on
+        the number of workers.
+        @param: entities_list: list of EntitiesClass
+        @return: list with the contours of each entities
+        """
+        tol = g.config.point_tolerance
+        method = g.config.vars.Import_Parameters['contour_search']
+        workers = g.config.vars.Import_Parameters['contour_workers']
+        if workers == 0:
+            workers = cpu_count()
+        workers = min(workers, len(entities_list))
+
+        self.truncated_searches = 0
+        conts = []
+        jobs = []
+        for entities in entities_list:
+            if entities is self.entities:
+                logger.info(self.tr("Creating Contours of Entities"))
+            else:
+                logger.info(self.tr("Creating Contours of Block Nr: %i") % entities.Nr)
 
-#         for check_cont in found_cont:
-#             logger.debug("Correcting Contour inaccuracies if found")
-#             for geo_nr in range(1, len(check_cont.order)):
-#                 geo1 = check_cont.order[geo_nr - 1]
-#                 geo2 = check_cont_order[geo_nr]
-#                 logger.debug(geo[geo_nr])
+            cont = []
+            points = self.App_Cont_or_Calc_IntPts(entities.geo, cont)
+            conts.append(cont)
 
-        cont += found_cont
+            if workers > 1:
+                jobs.append(pack_contour_job(entities.geo, points, tol, method))
+            else:
+                found_cont = self.Search_Block_Contours(entities.geo, points, tol, method)
+                cont += found_cont
+
+        if workers > 1:
+            logger.debug(self.tr("Searching contours with %i processes") % workers)
+            pool = Pool(workers)
+            try:
+                results = pool.map(search_contours_job, jobs)
+            finally:
+                pool.close()
+                pool.join()
+
+            for cont, (found_cont, truncated_searches) in zip(conts, results):
+                cont += [ContourClass(cont_nr, closed, order, length)
+                         for cont_nr, closed, order, length in found_cont]
+                self.truncated_searches += truncated_searches
+
+        if self.truncated_searches:
+            logger.warning(self.tr("Search of %i contours stopped after %i paths, the "
+                                   "found contours may not be the best ones") %
+                           (self.truncated_searches, MAX_CONTOUR_PATHS))
+
+        return conts
+
+    def Search_Block_Contours(self, geo, points, tol, method):
+        """
+        Search_Block_Contours() - Find the common points and the contours of
+        the geometries of one block / entities
+        @param: geo: the geometries, only their length is used
+        @param: points: start and end points as returned by App_Cont_or_Calc_IntPts
+        @param: tol: point tolerance
+        @param: method: 'recursive' or 'graph' (see Import_Parameters contour_search)
+        @return: list of ContourClass
+        """
+        points = self.Find_Common_Points(points, tol)
+        # points = self.Remove_Redundant_Geos(points)
 
-        return cont
+        if method == 'graph':
+            return self.Search_Contours_Graph(geo, points)
+        return self.Search_Contours(geo, points)
 
     def App_Cont_or_Calc_IntPts(self, geo=None, cont=None):
         """
@@ -482,81 +605,75 @@ class ReadDXF(QtCore.QObject):
 
         return points
 
-    def Find_Common_Points(self, points=None):
+    def Find_Common_Points(self, points=None, tol=None):
         """
         Find_Common_Points() - Find common points
+        The start and end points are sorted into a grid (per layer) with cells
+        of the size of the point tolerance. Common points can only be found in
+        the same or in the neighbouring cells.
         """
         # tol = self.config.points_tolerance.get()
-        tol = g.config.point_tolerance
+        if tol is None:
+            tol = g.config.point_tolerance
 
         p_list = []
+        grid = {}
 
-        # Einen List aus allen Punkten generieren
-        # Generate list of all points
+        # Einen Grid aus allen Punkten generieren
+        # Generate a grid of all points
         for p in points:
-            p_list.append([p.Layer_Nr, p.be.x, p.be.y, p.point_nr, 0])
-            p_list.append([p.Layer_Nr, p.en.x, p.en.y, p.point_nr, 1])
-
-        # Sort the list
-        p_list.sort()
-        # print p_list
+            for be_en, pt in ((0, p.be), (1, p.en)):
+                cell = self.grid_cell(p.Layer_Nr, pt.x, pt.y, tol)
+                if cell in grid:
+                    grid[cell].append(len(p_list))
+                else:
+                    grid[cell] = [len(p_list)]
+                p_list.append((pt.x, pt.y, p.point_nr, be_en, cell))
 
-        # Loop for number of list items
-        # Start = where to begin the search of the same elements
-        anf = []
+        if tol > 0:
+            neighbours = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        else:
+            neighbours = [(0, 0)]
 
-        for l_nr in range(len(p_list)):
+        for l_nr, (x, y, point_nr, be_en, cell) in enumerate(p_list):
             inter = []
-            # print ("Suche Starten f�r Geometrie Nr: %i, Punkt %i" % (p_list[l_nr][3], l_nr))
-
-            if isinstance(anf, list):
-                c_nr = 0
-            else:
-                c_nr = anf
-
-            anf = []
-
-            # Schleife bis n�chster X Wert Gr��er ist als selbst +tol und Layer Gr��er gleich
-            # Loop until the next X value is greater than yourself and layer Gr + tol he same ???
-            while p_list[c_nr][0] < p_list[l_nr][0] or \
-                  p_list[c_nr][1] <= (p_list[l_nr][1] + tol):
-                # print ("Suche Punkt %i" % (c_nr))
-
-                # Erstes das �bereinstimmt is der n�chste Anfang
-                # First, the match is the next start
-                if isinstance(anf, list) and\
-                   p_list[c_nr][0] == p_list[l_nr][0] and\
-                   abs(p_list[c_nr][1] - p_list[l_nr][1]) <= tol:
-                    anf = c_nr
-                    # print ("N�chste Suche starten bei" +str(anf))
-
-                # Falls gleich anh�ngen
-                # Attach if equal ???
-                if p_list[c_nr][0] == p_list[l_nr][0] and \
-                   abs(p_list[c_nr][1] - p_list[l_nr][1]) <= tol and\
-                   abs(p_list[c_nr][2] - p_list[l_nr][2]) <= tol and\
-                   c_nr != l_nr:
-                    inter.append(c_nr)
-                    # print ("Gefunden" +str(inter))
-                c_nr += 1
-
-                if c_nr == len(p_list):
-                    break
-
-            # Anh�ngen der gefundenen Punkte an points
+            layer_nr, cx, cy = cell
+            for dx, dy in neighbours:
+                for c_nr in grid.get((layer_nr, cx + dx, cy + dy), ()):
+                    c_p = p_list[c_nr]
+                    if abs(c_p[0] - x) <= tol and abs(c_p[1] - y) <= tol and\
+                       c_nr != l_nr:
+                        inter.append(c_p[:4])
+
+            # Same order as a search along the points sorted by x and y
+            inter.sort()
+
+            # Anhängen der gefundenen Punkte an points
             # Append the found points
             for int_p in inter:
                 # Common Anfangspunkt
                 # Common starting point
-                if p_list[l_nr][-1] == 0:
-                    points[p_list[l_nr][-2]].be_cp.append(p_list[int_p][3:5])
+                if be_en == 0:
+                    points[point_nr].be_cp.append([int_p[2], int_p[3]])
                 # Common Endpunkt
                 # Common end point
                 else:
-                    points[p_list[l_nr][-2]].en_cp.append(p_list[int_p][3:5])
+                    points[point_nr].en_cp.append([int_p[2], int_p[3]])
 
         return points
 
+    def grid_cell(self, layer_nr, x, y, tol):
+        """
+        grid_cell() - Get the grid cell of a point for Find_Common_Points()
+        @param: layer_nr: layer of the point
+        @param: x, y: coordinates of the point
+        @param: tol: the tolerance which is used as cell size
+        @return: tuple (layer_nr, column, row)
+        """
+        if tol > 0:
+            return layer_nr, int(floor(x / tol)), int(floor(y / tol))
+        return layer_nr, x, y
+
     def Remove_Redundant_Geos(self, geo=None, points=None):
         """
         Remove_Redundant_Geos() - Does nothing!
@@ -769,6 +886,255 @@ class ReadDXF(QtCore.QObject):
             cont.order[c_nr][0] = points[cont.order[c_nr][0]].geo_nr
         return cont
 
+    def Search_Contours_Graph(self, geo=None, all_points=None):
+        """
+        Search_Contours_Graph() - Find the best continuous contours. The
+        common points are used as graph: the paths are walked iteratively
+        without copying contours and used points are only marked. From each
+        unused point the longest closed path is taken, or the longest open
+        one if there is no closed path. Each geometry is used exactly once,
+        so the result may differ from Search_Contours(), which can use a
+        geometry twice.
+        """
+        found_contours = []
+        used = [False] * len(all_points)
+
+        for point in all_points:
+            p_nr = point.point_nr
+            if used[p_nr]:
+                continue
+
+            be_cp = self.Get_Next_Points(point, 1, all_points, used)
+            en_cp = self.Get_Next_Points(point, 0, all_points, used)
+
+            if not be_cp and not en_cp:
+                # If nothing found then count up the contour
+                cont = ContourClass(len(found_contours), 0, [[p_nr, 0]], 0)
+            elif not be_cp:
+                cont = self.Walk_Paths([[p_nr, 0]], geo, all_points, used)
+            elif not en_cp:
+                cont = self.Walk_Paths([[p_nr, 1]], geo, all_points, used)
+            else:
+                cont = self.Walk_Paths([[p_nr, 1]], geo, all_points, used)
+
+                # If the path is not closed by the first point, continue the
+                # search at the other end of the first point. The continued
+                # paths may be shorter (if they are closed by another point),
+                # so they are compared with the path found so far, like in
+                # Get_Best_Contour()
+                if cont.closed == 0:
+                    cont_neg = deepcopy(cont)
+                    cont_neg.reverse()
+                    cont_neg = self.Walk_Paths(cont_neg.order, geo, all_points, used)
+                    if cont_neg.closed or cont_neg.length >= cont.length:
+                        cont = cont_neg
+
+            cont.cont_nr = len(found_contours)
+            for p in cont.order:
+                used[p[0]] = True
+
+            found_contours.append(self.Contours_Points2Geo(cont, all_points))
+        return found_contours
+
+    def Get_Next_Points(self, point, dir, points, used):
+        """
+        Get_Next_Points() - Get the unused common points to continue a path
+        @param: point: the point (PointsClass) of the last path element
+        @param: dir: direction of the last path element (0 = pos, 1 = neg)
+        @return: list of [point_nr, dir] for the next path elements
+        """
+        if dir == 0:
+            weiter = point.en_cp
+        else:
+            weiter = point.be_cp
+        return [cp for cp in weiter if not used[cp[0]]]
+
+    def Walk_Paths(self, order, geo, points, used):
+        """
+        Walk_Paths() - Depth first search of all paths which start with order.
+        Only the current path is kept, every finished path is compared
+        against the best one found so far (see Get_Best_Contour()).
+        After MAX_CONTOUR_PATHS paths no further branches are searched, the
+        remaining paths just follow the first common point and the search is
+        counted in truncated_searches (see Get_Contours()).
+        @param: order: the start of the path as list of [point_nr, dir]
+        @return: the best contour (ContourClass)
+        """
+        best_closed = best_open = None
+        best_closed_len = best_open_len = -1
+        nr_paths = 0
+        truncated = False
+
+        path = [list(p) for p in order]
+        # Accumulated length of the path up to each element
+        path_len = []
+        length = 0
+        for p in path:
+            length += geo[points[p[0]].geo_nr].length
+            path_len.append(length)
+        on_path = {}
+        for i, p in enumerate(path):
+            on_path.setdefault(p[0], i)
+
+        stack = [[self.Get_Next_Points(points[path[-1][0]], path[-1][1], points, used), 0]]
+        if not stack[0][0] or len(on_path) < len(path):
+            stack = []
+            finished = [True]
+        else:
+            finished = []
+
+        while stack or finished:
+            if finished:
+                # Evaluate the finished path
+                finished.pop()
+                nr_paths += 1
+                last_nr = path[-1][0]
+                first_pos = on_path[last_nr]
+                if first_pos == len(path) - 1:
+                    # Open path
+                    end, closed = len(path), 0
+                elif path[-1] == path[0]:
+                    # Closed by the first point, the last element is removed
+                    end, closed = len(path) - 1, 1
+                elif first_pos == 0:
+                    # Closed at the other end of the first point, the closing
+                    # element is not used
+                    end, closed = len(path) - 1, 0
+                else:
+                    # Closed by another point, the closed part is removed
+                    end, closed = first_pos, 0
+
+                length = path_len[end - 1] if end > 0 else 0
+                if closed and length > best_closed_len:
+                    best_closed_len = length
+                    best_closed = [list(p) for p in path[:end]]
+                elif not closed and length > best_open_len:
+                    best_open_len = length
+                    best_open = [list(p) for p in path[:end]]
+
+                # The closing element is not part of the search path
+                if first_pos < len(path) - 1:
+                    path.pop()
+                    path_len.pop()
+                continue
+
+            weiter, i = stack[-1]
+            if i > 0 and i < len(weiter) and nr_paths >= MAX_CONTOUR_PATHS:
+                truncated = True
+                i = len(weiter)
+            if i < len(weiter):
+                stack[-1][1] += 1
+                nr, dir = weiter[i]
+                path.append([nr, dir])
+                path_len.append(path_len[-1] + geo[points[nr].geo_nr].length)
+                if nr in on_path:
+                    finished.append(True)
+                    continue
+                on_path[nr] = len(path) - 1
+                next_points = self.Get_Next_Points(points[nr], dir, points, used)
+                if next_points:
+                    stack.append([next_points, 0])
+                else:
+                    finished.append(True)
+                    stack.append([next_points, 0])
+            else:
+                stack.pop()
+                if stack:
+                    del on_path[path[-1][0]]
+                    path.pop()
+                    path_len.pop()
+
+        if truncated:
+            self.truncated_searches += 1
+
+        if best_closed is not None:
+            return ContourClass(0, 1, best_closed, best_closed_len)
+        return ContourClass(0, 0, best_open, best_open_len)
+
+# Only the length of the geometries is needed for the contour search
+GeoLength = namedtuple('GeoLength', 'length')
+
+
+def pack_contour_job(geo, points, tol, method):
+    """
+    pack_contour_job() - Store the data needed for the contour search of one
+    block in compact arrays, which are sent to a worker process
+    @return: job for search_contours_job()
+    """
+    nrs = array('i')
+    coords = array('d')
+    for p in points:
+        nrs.extend((p.point_nr, p.geo_nr, p.Layer_Nr))
+        coords.extend((p.be.x, p.be.y, p.en.x, p.en.y))
+    lengths = array('d', [geo_.length for geo_ in geo])
+    return nrs, coords, lengths, tol, method
+
+
+def search_contours_job(job):
+    """
+    search_contours_job() - Contour search of one block within a worker process
+    @param: job: as returned by pack_contour_job()
+    @return: list of (cont_nr, closed, order, length) of the found contours
+    and the number of searches which were stopped by MAX_CONTOUR_PATHS
+    """
+    nrs, coords, lengths, tol, method = job
+    points = [PointsClass(point_nr=nrs[3 * i], geo_nr=nrs[3 * i + 1],
+                          Layer_Nr=nrs[3 * i + 2],
+                          be=Point(coords[4 * i], coords[4 * i + 1]),
+                          en=Point(coords[4 * i + 2], coords[4 * i + 3]),
+                          be_cp=[], en_cp=[])
+              for i in range(len(nrs) // 3)]
+    geo = [GeoLength(length) for length in lengths]
+
+    reader = ReadDXF()
+    found_cont = reader.Search_Block_Contours(geo, points, tol, method)
+    return ([(cont.cont_nr, cont.closed, cont.order, cont.length)
+             for cont in found_cont], reader.truncated_searches)
+
+
+def get_newline(data):
+    """
+    get_newline() - Get the line separator of the raw DXF data. Lines which
+    end with b"\r\n" are split at b"\n", the b"\r" is stripped with the
+    code and the value. Files with b"\r" only are split at b"\r".
+    @param: data: raw file contents (bytes or mmap)
+    @return: b"\n" or b"\r"
+    """
+    head = data[:4096]
+    if b"\n" not in head and b"\r" in head:
+        return b"\r"
+    return b"\n"
+
+
+def iter_line_pairs(data, pos=0, line=0, newline=b"\n"):
+    """
+    iter_line_pairs() - Walk through the raw DXF data pair by pair without
+    splitting it into lines first.
+    @param: data: raw file contents (bytes or mmap)
+    @param: pos: offset of the first group code line within data
+    @param: line: line number of the first group code line
+    @param: newline: line separator, see get_newline()
+    @return: yields (line, code, value_pos) with the raw group code and the
+    offset of the value line within data
+    """
+    size = len(data)
+    find = data.find
+    while pos < size:
+        code_end = find(newline, pos)
+        if code_end < 0:
+            break
+        value_pos = code_end + 1
+        if value_pos >= size:
+            break
+        yield line, data[pos:code_end], value_pos
+
+        pos = find(newline, value_pos)
+        if pos < 0:
+            break
+        pos += 1
+        line += 2
+
+
 class dxflinepairClass:
     def __init__(self, code=None, value=None):
         self.code = code
@@ -778,13 +1144,102 @@ class dxflinepairClass:
         return 'Code ->' + str(self.code) + '\nvalue ->' + self.value
 
 class dxflinepairsClass:
-    def __init__(self, line_pair):
+    """
+    The line pairs of a DXF file are stored in two compact arrays: the group
+    codes and the offsets of the values within the raw file contents.
+    line_pair[i] returns a dxflinepairClass which is created on access.
+
+    While appending, the positions of each group code are collected in sorted
+    arrays, so index_code() and index_both() are bisect lookups instead of
+    linear scans. The values of the code 0 pairs (SECTION, ENDSEC, LINE, ...)
+    are indexed as well, entity_pos holds all entity boundaries.
+    """
+    def __init__(self, data=b"", encoding=DXF_ENCODING, newline=b"\n"):
         self.nrs = 0
-        self.line_pair = line_pair
+        self.data = data
+        self.encoding = encoding
+        self.newline = newline
+        self.codes = array('i')
+        self.value_pos = array('l')
+        self.code_pos = {}
+        self.entity_pos = self.code_pos[0] = array('l')
+        self.entity_names = {}
 
     def __str__(self):
         return 'Number of Line Pairs: ' + str(self.nrs)
 
+    def __len__(self):
+        return self.nrs
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.nrs
+        if not 0 <= i < self.nrs:
+            raise IndexError('line pair index out of range')
+        return dxflinepairClass(self.codes[i], self.get_value(i))
+
+    @property
+    def line_pair(self):
+        """
+        Sequence like access to the line pairs, kept for the Geoent classes
+        """
+        return self
+
+    def append(self, code, value_pos):
+        """
+        append() - Add a line pair and update the indexes
+        @param: code: the group code (int)
+        @param: value_pos: offset of the value line within the data
+        """
+        nr = self.nrs
+        self.codes.append(code)
+        self.value_pos.append(value_pos)
+        self.nrs += 1
+
+        if code in self.code_pos:
+            self.code_pos[code].append(nr)
+        else:
+            self.code_pos[code] = array('l', [nr])
+
+        if code == 0:
+            name = self.get_value(nr)
+            if name in self.entity_names:
+                self.entity_names[name].append(nr)
+            else:
+                self.entity_names[name] = array('l', [nr])
+
+    def close(self):
+        """
+        close() - Release the raw file contents (and unmap the file). The
+        values cannot be accessed afterwards.
+        """
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+
+    def get_value(self, i):
+        """
+        get_value() - Decode the value of line pair i
+        """
+        start = self.value_pos[i]
+        end = self.data.find(self.newline, start)
+        if end < 0:
+            end = len(self.data)
+        return self.data[start:end].decode(self.encoding, 'replace').strip()
+
+    def entity_end(self, start):
+        """
+        entity_end() - Get the end of the entity which starts at line pair
+        start, i.e. the next code 0 line pair
+        @param: start: number of the line pair of the entity
+        @return: number of the next code 0 line pair, nrs if there is none
+        """
+        pos = self.entity_pos
+        k = bisect_right(pos, start)
+        if k < len(pos):
+            return pos[k]
+        return self.nrs
+
     # Search for information in the line pairs (both code & value)
     # Optional start and end values for the search
     def index_both(self, code=0, value=0, start=0, stop= -1):
@@ -794,11 +1249,27 @@ class dxflinepairsClass:
 
         # If stop==-1 then stop at the end of the pairs
         if stop == -1:
-            stop = len(self.line_pair)
+            stop = self.nrs
+
+        # The code 0 values are indexed, others are checked along the
+        # positions of the code
+        if code == 0:
+            pos = self.entity_names.get(value)
+            if pos is None:
+                return None
+            k = bisect_left(pos, start)
+            if k < len(pos) and pos[k] < stop:
+                return pos[k]
+            return None
 
-        # Start the search within the specified parameters
-        for i in range(start, stop):
-            if self.line_pair[i].code == code and self.line_pair[i].value == value:
+        pos = self.code_pos.get(code)
+        if pos is None:
+            return None
+        for k in range(bisect_left(pos, start), len(pos)):
+            i = pos[k]
+            if i >= stop:
+                break
+            if self.get_value(i) == value:
                 return i
 
         #If nothing found return "None"
@@ -815,12 +1286,16 @@ class dxflinepairsClass:
 
         # If stop == -1 then stop at the end of the pairs
         if stop == -1:
-            stop = len(self.line_pair)
+            stop = self.nrs
 
-        # Start the search within the specified parameters
-        for i in range(start, stop):
-            if self.line_pair[i].code == code:
-                return i
+        pos = self.code_pos.get(code)
+        if pos is None:
+            return None
+
+        # First position of the code within the specified parameters
+        k = bisect_left(pos, start)
+        if k < len(pos) and pos[k] < stop:
+            return pos[k]
 
         # If nothing found return "None"
         return None
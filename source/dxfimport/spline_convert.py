@@ -26,7 +26,7 @@
 from __future__ import absolute_import
 from __future__ import division
 
-from math import atan2
+from math import atan2, cos, sin
 import logging
 
 from core.point import Point
@@ -34,16 +34,114 @@ from core.arcgeo import ArcGeo
 from core.linegeo import LineGeo
 from dxfimport.biarc import BiarcClass
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 logger = logging.getLogger("DxfImport.SplineConvert")
 
 debug_on = False
 
+
+class SplineCache(object):
+    """
+    Cache of the converted splines of one import. Splines which only differ
+    in their position and rotation (e.g. the characters of a text converted
+    to curves) are converted once; the arcs and lines are rotated and moved
+    into place for the other ones.
+    """
+    def __init__(self):
+        self.curves = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_angle(self, CPoints):
+        """
+        @return: the direction of the first edge of the control polygon, 0 if
+        all the control points are the same
+        """
+        Ps = CPoints[0]
+        for CPt in CPoints[1:]:
+            if CPt.x != Ps.x or CPt.y != Ps.y:
+                return atan2(CPt.y - Ps.y, CPt.x - Ps.x)
+        return 0.0
+
+    def get_key(self, degree, Knots, Weights, CPoints, ang, tol, check):
+        """
+        The control points are relative to the first one and rotated such that
+        the first edge of the control polygon points to +x. They are rounded to
+        ignore the rounding errors of this transformation.
+        """
+        Ps = CPoints[0]
+        cos_ang = cos(-ang)
+        sin_ang = sin(-ang)
+        CPts = []
+        for CPt in CPoints:
+            x = CPt.x - Ps.x
+            y = CPt.y - Ps.y
+            CPts.append((round(x * cos_ang - y * sin_ang, 9), round(x * sin_ang + y * cos_ang, 9)))
+        return degree, tuple(Knots), tuple(Weights), tuple(CPts), tol, check
+
+    def convert(self, degree, Knots, Weights, CPoints, tol, check):
+        """
+        Convert a spline to arcs and lines, see Spline2Arcs
+        @return: list of ArcGeo and LineGeo
+        """
+        ang = self.get_angle(CPoints)
+        key = self.get_key(degree, Knots, Weights, CPoints, ang, tol, check)
+        curve = self.curves.get(key)
+        if curve is not None:
+            self.hits += 1
+            return [self.move_geo(geo, CPoints[0], ang) for geo in curve]
+
+        self.misses += 1
+        Curve = Spline2Arcs(degree=degree, Knots=Knots, Weights=Weights,
+                            CPoints=CPoints, tol=tol, check=check).Curve
+        offset = -self.rotate_point(CPoints[0], -ang)
+        self.curves[key] = [self.move_geo(geo, offset, -ang) for geo in Curve]
+        return Curve
+
+    def rotate_point(self, P, ang):
+        """
+        @return: P rotated by ang around the origin
+        """
+        if ang == 0.0:
+            return Point(P.x, P.y)
+        cos_ang = cos(ang)
+        sin_ang = sin(ang)
+        return Point(P.x * cos_ang - P.y * sin_ang, P.x * sin_ang + P.y * cos_ang)
+
+    def move_geo(self, geo, offset, ang=0.0):
+        """
+        @return: a copy of the geometry rotated by ang around the origin and
+        then moved by offset
+        """
+        if isinstance(geo, LineGeo):
+            return LineGeo(self.rotate_point(geo.Ps, ang) + offset,
+                           self.rotate_point(geo.Pe, ang) + offset)
+        arc = ArcGeo(self.rotate_point(geo.Ps, ang) + offset,
+                     self.rotate_point(geo.Pe, ang) + offset,
+                     self.rotate_point(geo.O, ang) + offset,
+                     geo.r, None, None, geo.ext)
+        # Keep the extent, it may differ in the last digits if it is
+        # calculated again
+        arc.ext = geo.ext
+        arc.length = geo.length
+        return arc
+
+    def log_stats(self):
+        if self.hits or self.misses:
+            logger.debug("Spline cache: %i hits, %i misses" % (self.hits, self.misses))
+
 class Spline2Arcs:
     def __init__(self, degree=0, Knots=[], Weights=[], CPoints=[], tol=0.01, check=1):
         # Max Abweichung f�r die Biarc Kurve
         self.epsilon = tol
         self.epsilon_high = self.epsilon * 0.1
         self.segments = 50
+        # Number of steps evaluated in advance with NumPy
+        self.batch_steps = 8
 
         # NURBS Klasse initialisieren
         self.NURBS = NURBSClass(degree=degree, Knots=Knots,
@@ -425,6 +523,9 @@ class Spline2Arcs:
         PtsVec = [self.NURBS.NURBS_evaluate(n=1, u=u)]
         step = 0
 
+        # Points of the NURBS evaluated in advance, see calc_step_points()
+        step_points = {}
+
         # Berechnen bis alle Biarcs berechnet sind
         while u < u_sect[-1] - min_u:
             step += 1
@@ -436,7 +537,10 @@ class Spline2Arcs:
                 cur_step = u_sect[-1] - (u - cur_step) - min_u
                 u = u_sect[-1] - min_u
 
-            PtVec = self.NURBS.NURBS_evaluate(n=1, u=u)
+            if (u - cur_step, u) not in step_points:
+                step_points = self.calc_step_points(u, cur_step, u_sect[-1], min_u)
+            Pts, tangents = step_points[(u - cur_step, u)]
+            PtVec = (Pts[-1], tangents[-1])
 
             # Aus den letzten 2 Punkten den n�chsten Biarc berechnen
             Biarc = (BiarcClass(PtsVec[-1][0], PtsVec[-1][1], PtVec[0], PtVec[1], nom_tol * 0.5))
@@ -451,7 +555,7 @@ class Spline2Arcs:
                 cur_step = min([cur_step * 2, self.max_step])
                 PtsVec.append(PtVec)
             else:
-                if self.check_biarc_fitting_tolerance(Biarc, max_tol, u - cur_step, u):
+                if self.check_biarc_fitting_tolerance(Biarc, max_tol, u - cur_step, u, Pts[:-1]):
                     # print("fit1")
                     PtsVec.append(PtVec)
                     BiarcCurve.append(Biarc)
@@ -466,19 +570,52 @@ class Spline2Arcs:
 
         return BiarcCurve, PtsVec
 
-    def check_biarc_fitting_tolerance(self, Biarc, epsilon, u0, u1):
+    def calc_step_points(self, u, cur_step, u_end, min_u):
         """
-        check_biarc_fitting_tolerance()
+        Evaluate the end point and the points to check the tolerance of the
+        step to u and, with NumPy, of the following steps if all of them are
+        within the tolerance. Most steps are, so the NURBS is evaluated for
+        several steps in one call.
+        @return: dict of (u0, u1) of the steps to the points and tangents at
+        calc_check_u(u0, u1) + [u1]
+        """
+        steps = [(u - cur_step, u)]
+        if np is not None:
+            while len(steps) < self.batch_steps and u < u_end - min_u:
+                # Same calculation as in calc_Biarc_section
+                cur_step = min([cur_step / 0.7, self.max_step])
+                u += cur_step
+                if u > u_end:
+                    cur_step = u_end - (u - cur_step) - min_u
+                    u = u_end - min_u
+                steps.append((u - cur_step, u))
+
+        us = []
+        for u0, u1 in steps:
+            us += self.calc_check_u(u0, u1) + [u1]
+        Pts, tangents = self.NURBS.NURBS_evaluate_batch(n=1, us=us)
+
+        step_points = {}
+        for nr, step in enumerate(steps):
+            step_points[step] = (Pts[nr * 5:nr * 5 + 5], tangents[nr * 5:nr * 5 + 5])
+        return step_points
+
+    def calc_check_u(self, u0, u1):
+        """
+        Parameters between u0 and u1 where the fitting tolerance is checked
         """
         check_step = (u1 - u0) / 5
-        check_u = []
-        check_Pts = []
-        fit_error = []
+        return [u0 + check_step * i for i in range(1, 5)]
 
-        for i in range(1, 5):
-            check_u.append(u0 + check_step * i)
-            check_Pts.append(self.NURBS.NURBS_evaluate(n=0, u=check_u[-1]))
-            fit_error.append(Biarc.get_biarc_fitting_error(check_Pts[-1]))
+    def check_biarc_fitting_tolerance(self, Biarc, epsilon, u0, u1, check_Pts=None):
+        """
+        check_biarc_fitting_tolerance()
+        @param check_Pts: the NURBS points at calc_check_u(u0, u1) if already
+        calculated
+        """
+        if check_Pts is None:
+            check_Pts = self.NURBS.NURBS_evaluate_batch(n=0, us=self.calc_check_u(u0, u1))
+        fit_error = [Biarc.get_biarc_fitting_error(Pt) for Pt in check_Pts]
 
         # if debug_on:
         if 0:
@@ -643,6 +780,38 @@ class NURBSClass:
         else:
             return Point
 
+    def NURBS_evaluate_batch(self, n=0, us=()):
+        """
+        Evaluate the NURBS and its first derivative for several u's at once.
+        NumPy is used when available, otherwise NURBS_evaluate is called for
+        each u.
+        @param n: 0 for the points only, 1 for the points and the tangents
+        @param us: the parameters to evaluate
+        @return: list of Points or, if n > 0, the lists of Points and tangents
+        """
+        if np is None:
+            values = [self.NURBS_evaluate(n=n, u=u) for u in us]
+            if n > 0:
+                return [value[0] for value in values], [value[1] for value in values]
+            return values
+
+        HPts = self.BSpline.bspline_ders_evaluate_batch(n=n, us=us)
+
+        # Punkte wieder in Normal Koordinaten zur�ck transformieren
+        x = HPts[0, :, 0] / HPts[0, :, -1]
+        y = HPts[0, :, 1] / HPts[0, :, -1]
+        Points = [Point(x=x_, y=y_) for x_, y_ in zip(x.tolist(), y.tolist())]
+
+        if n > 0:
+            #    w(u)*A'(u)-w'(u)*A(u)
+            # dPt=---------------------
+            #           w(u)^2
+            w2 = HPts[0, :, -1] ** 2
+            dx = (HPts[0, :, -1] * HPts[1, :, 0] - HPts[1, :, -1] * HPts[0, :, 0]) / w2
+            dy = (HPts[0, :, -1] * HPts[1, :, 1] - HPts[1, :, -1] * HPts[0, :, 1]) / w2
+            return Points, [atan2(dy_, dx_) for dx_, dy_ in zip(dx.tolist(), dy.tolist())]
+        return Points
+
     def CPts_2_HCPts(self):
         """
         Umwandeln der NURBS Kontrollpunkte und Weight in einen Homogenen Vektor
@@ -670,6 +839,10 @@ class BSplineClass:
         self.CPt_len = len(self.CPts[0])
         self.CPts_len = len(self.CPts)
 
+        # NumPy arrays of the knots and control points for the batch evaluation
+        self.Knots_array = None
+        self.CPts_array = None
+
         # Eingangspr�fung, ober KnotenAnzahl usw. passt
         if self.Knots_len < self.degree + 1:
             raise ValueError("degree greater than number of control points.")
@@ -734,6 +907,111 @@ class BSplineClass:
 
         return CK
 
+    def bspline_ders_evaluate_batch(self, n=0, us=()):
+        """
+        Vectorized version of bspline_ders_evaluate() for an array of u's. The
+        same algorithms are used, but each scalar is replaced by an array with
+        one value per u. Requires NumPy.
+        @return: array with the shape (n + 1, len(us), CPt_len)
+        """
+        if self.Knots_array is None:
+            self.Knots_array = np.asarray(self.Knots, dtype=float)
+            self.CPts_array = np.asarray(self.CPts, dtype=float)
+        us = np.asarray(us, dtype=float)
+        Knots = self.Knots_array
+        CPts = self.CPts_array
+        p = self.degree
+
+        span = self.findspan_batch(us, Knots)
+        dN = self.ders_basis_functions_batch(span, us, n, Knots)
+
+        CK = np.zeros((n + 1, len(us), self.CPt_len))
+        for k in range(min(n, p) + 1):
+            for j in range(p + 1):
+                CK[k] += dN[k][j][:, None] * CPts[span - p + j]
+        return CK
+
+    def findspan_batch(self, us, Knots):
+        """
+        Vectorized version of findspan(), the same as Algorithm A2.1
+        """
+        span = np.searchsorted(Knots, us, side='right') - 1
+        span = np.clip(span, self.degree, self.Knots_len - self.degree - 2)
+        # Spezialfall wenn der Wert==Endpunkt ist
+        span[us == Knots[-1]] = self.Knots_len - self.degree - 2
+        return span
+
+    def ders_basis_functions_batch(self, span, us, n, Knots):
+        """
+        Vectorized version of ders_basis_functions(), Algorithm A2.3
+        """
+        d = self.degree
+        zeros = np.zeros(len(us))
+
+        a = [[zeros] * (d + 1) for _ in range(2)]
+        ndu = [[zeros] * (d + 1) for _ in range(d + 1)]
+        ders = [[zeros] * (d + 1) for _ in range(n + 1)]
+
+        ndu[0][0] = np.ones(len(us))
+        left = [zeros]
+        right = [zeros]
+
+        for j in range(1, d + 1):
+            left.append(us - Knots[span + 1 - j])
+            right.append(Knots[span + j] - us)
+            saved = zeros
+            for r in range(j):
+                # Lower Triangle
+                ndu[j][r] = right[r + 1] + left[j - r]
+                temp = ndu[r][j - 1] / ndu[j][r]
+                # Upper Triangle
+                ndu[r][j] = saved + right[r + 1] * temp
+                saved = left[j - r] * temp
+            ndu[j][j] = saved
+
+        # Load the basis functions
+        for j in range(d + 1):
+            ders[0][j] = ndu[j][d]
+
+        # This section computes the derivatives (Eq. [2.9])
+        for r in range(d + 1):
+            s1 = 0; s2 = 1
+            a[0][0] = np.ones(len(us))
+            for k in range(1, n + 1):
+                der = zeros
+                rk = r - k; pk = d - k
+
+                if r >= k:
+                    a[s2][0] = a[s1][0] / ndu[pk + 1][rk]
+                    der = a[s2][0] * ndu[rk][pk]
+                if rk >= -1:
+                    j1 = 1
+                else:
+                    j1 = -rk
+                if r - 1 <= pk:
+                    j2 = k - 1
+                else:
+                    j2 = d - r
+
+                for j in range(j1, j2 + 1):
+                    a[s2][j] = (a[s1][j] - a[s1][j - 1]) / ndu[pk + 1][rk + j]
+                    der = der + a[s2][j] * ndu[rk + j][pk]
+
+                if r <= pk:
+                    a[s2][k] = -a[s1][k - 1] / ndu[pk + 1][r]
+                    der = der + a[s2][k] * ndu[r][pk]
+
+                ders[k][r] = der
+                s1, s2 = s2, s1
+
+        # Multiply through by the correct factors
+        r = d
+        for k in range(1, n + 1):
+            for j in range(d + 1):
+                ders[k][j] = ders[k][j] * r
+            r *= (d - k)
+        return ders
+
     def findspan(self, u):
         """
         Algorithm A2.1 from "THE NURBS BOOK" pg.68
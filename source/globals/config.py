@@ -45,7 +45,7 @@ else:
 
 logger = logging.getLogger("Core.Config")
 
-CONFIG_VERSION = "9.9"
+CONFIG_VERSION = "9.17"
 """
 version tag - increment this each time you edit CONFIG_SPEC
 
@@ -156,10 +156,18 @@ CONFIG_SPEC = str('''
     machine_type = option('milling', 'lathe', 'drag_knife', default = 'milling')
     # The unit used for all values in this file
     tool_units = option('mm', 'in', default = 'mm')
+    # Maximum distance between the arcs and the lines they are drawn with (in drawing units). Large arcs are drawn with more lines, small ones with less.
+    arc_chord_error = float(min = 0.00001, max = 10, default = 0.01)
 
     [Cutter_Compensation]
     # If not checked, DXF2GCODE will create a virtual path for G41 and G42 command. And output will be set to G40; i.e. it will create the path that normally your machine would create with it's cutter compensation.
     done_by_machine = boolean(default = True)
+    # If checked (and the cutter compensation is not done by machine), closed shapes with G42 are cleared as a pocket. The contour is offset inwards again and again until nothing is left.
+    pocketing = boolean(default = False)
+    # Distance between two rings of a pocket, as a fraction of the tool diameter.
+    pocket_stepover = float(min = 0.05, max = 1, default = 0.5)
+    # Number of processes used to calculate the cutter compensation of the shapes, if it is not done by machine (0 = number of CPUs, 1 = no additional process)
+    compensation_workers = integer(min = 0, max = 64, default = 1)
 
 
     [Drag_Knife_Options]
@@ -201,6 +209,20 @@ CONFIG_SPEC = str('''
     fitting_tolerance = float(min = 0, max = 1, default = 0.001)
     # If checked, the elements (shape, ...) which are part of a block will be inserted on the layer that belongs to the block (even though the elements might be defined on a different layers)
     insert_at_block_layer = boolean(default = False)
+    # Method used to assemble the contours of the imported geometries:
+    # - recursive: recursive search of all the paths (original method)
+    # - graph: iterative search on the graph of the common points (faster on drawings with many junctions)
+    contour_search = option('recursive', 'graph', default = 'recursive')
+    # Number of processes used to search the contours of the blocks (0 = number of CPUs, 1 = no additional process)
+    contour_workers = integer(min = 0, max = 64, default = 1)
+    # Maximum size (in MB) of the cache of imported files. Reopening an unchanged file with the same import parameters is read from the cache (0 = cache disabled).
+    import_cache_size = integer(min = 0, max = 100000, default = 200)
+    # Method used to split the ellipses into arcs:
+    # - uniform: equal angles, the number of arcs is increased until the checked points are within the fitting tolerance (original method)
+    # - curvature: the angles are calculated from the curvature of the ellipse, which needs less arcs for the same tolerance
+    ellipse_fitting = option('uniform', 'curvature', default = 'uniform')
+    # If checked, the lines and arcs of the shapes are stored in compact arrays, which needs much less memory for big drawings (but accessing them is slower)
+    compact_geometry = boolean(default = False)
 
     # These settings are intented to be used in the DXF file:
     # - By using MILL: as a prefix to your layer name you can define milling parameters by using one of the following identifiers.
@@ -505,6 +527,7 @@ class MyConfig(object):
                 'automatic_cutter_compensation': CfgCheckBox(self.tr('Default enable "Automatic Cutter Compensation"')),
                 'machine_type': CfgComboBox(self.tr('Default machine type at startup:')),
                 'tool_units': CfgComboBox(self.tr('Units for tools (needs a software restart):')),
+                'arc_chord_error': CfgDoubleSpinBox(self.tr('Maximum deviation of the drawn arcs:'), '', None, None, 5),
                 #'test':
                 #{
                 #   'test_niveau_2': CfgCheckBox('Pour test'),
@@ -515,6 +538,9 @@ class MyConfig(object):
             {
                 '__section_title__': self.tr("Output settings"),
                 'done_by_machine': CfgCheckBox(self.tr('Cutter compensation is done by machine (check this box if the machine reconizes G41 and G42 commands / uncheck it otherwise)')),
+                'pocketing': CfgCheckBox(self.tr('Clear closed shapes with G42 as a pocket (only if the cutter compensation is not done by machine)')),
+                'pocket_stepover': CfgDoubleSpinBox(self.tr('Pocket stepover (fraction of the tool diameter):')),
+                'compensation_workers': CfgSpinBox(self.tr('Cutter compensation processes (0 = number of CPUs):')),
             },
             'Drag_Knife_Options':
             {
@@ -537,6 +563,11 @@ class MyConfig(object):
                 'spline_check': CfgSpinBox(self.tr('DXF import spline check:')),
                 'fitting_tolerance': CfgDoubleSpinBox(self.tr('DXF default import fit tolerance:'), '', None, None, 5),
                 'insert_at_block_layer': CfgCheckBox(self.tr('insert elements which are part of a block to layer where the block is inserted')),
+                'contour_search': CfgComboBox(self.tr('DXF import contour search method:')),
+                'contour_workers': CfgSpinBox(self.tr('DXF import contour search processes (0 = number of CPUs):')),
+                'import_cache_size': CfgSpinBox(self.tr('DXF import cache size (0 = disabled):'), ' MB'),
+                'ellipse_fitting': CfgComboBox(self.tr('DXF import ellipse fitting method:')),
+                'compact_geometry': CfgCheckBox(self.tr('Store the geometry of the shapes compact (less memory for big drawings)')),
             },
             'Layer_Options':
             {
@@ -59,6 +59,7 @@ PROJECT_EXTENSION = '.d2g'
 BAD_CONFIG_EXTENSION = '.bad'
 DEFAULT_CONFIG_DIR = 'config'
 DEFAULT_POSTPRO_DIR = 'postpro_config'
+DEFAULT_IMPORT_CACHE_DIR = 'import_cache'
 
 # log related
 DEFAULT_LOGFILE = 'dxf2gcode.log'
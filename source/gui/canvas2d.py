@@ -37,7 +37,7 @@ import logging
 from core.point import Point
 from core.shape import Shape
 from core.boundingbox import BoundingBox
-from core.stmove import StMove
+from core.stmove import StMove, make_stmoves
 from gui.wpzero import WpZero
 from gui.arrow import Arrow
 from gui.routetext import RouteText
@@ -296,8 +296,9 @@ class MyGraphicsScene(QGraphicsScene):
         It generates all ploting functionality. The parameters are generally
         used to scale or offset the base geometry (by Menu in GUI).
         """
-        for shape in shapes:
-            self.paint_shape(shape)
+        stmoves = make_stmoves(shapes, StMoveGUI)
+        for shape, stmove in zip(shapes, stmoves):
+            self.paint_shape(shape, stmove)
             self.addItem(shape)
             self.shapes.append(shape)
         self.draw_wp_zero()
@@ -317,10 +318,22 @@ class MyGraphicsScene(QGraphicsScene):
             shape.starrow.hide()
             shape.enarrow.hide()
 
-    def paint_shape(self, shape):
+    def repaint_all(self):
+        """
+        Repaint all the shapes, e.g. after the transformation of the root
+        entity changed. The bounding box of the scene is calculated again.
+        """
+        self.BB = BoundingBox()
+        for shape in self.shapes:
+            shape.prepareGeometryChange()
+            self.repaint_shape(shape)
+        self.update()
+
+    def paint_shape(self, shape, stmove=None):
         """
         Create all plotting related parts of one shape.
         @param shape: The shape to be plotted.
+        @param stmove: The start move of the shape, if it was already created
         """
         start, start_ang = shape.get_start_end_points(True, True)
         shape.path = QPainterPath()
@@ -331,7 +344,9 @@ class MyGraphicsScene(QGraphicsScene):
 
         self.BB = self.BB.joinBB(shape.BB)
 
-        shape.stmove = self.createstmove(shape)
+        if stmove is None:
+            stmove = self.createstmove(shape)
+        shape.stmove = stmove
         shape.starrow = self.createstarrow(shape)
         shape.enarrow = self.createenarrow(shape)
         shape.stmove.setParentItem(shape)
@@ -497,20 +512,10 @@ class ShapeGUI(QGraphicsItem, Shape):
     def contains_point(self, point):
         """
         Method to determine the minimal distance from the point to the shape
-        @param point: a QPointF
+        @param point: a QPointF (the y axis of the scene is inverted)
         @return: minimal distance
         """
-        min_distance = float(0x7fffffff)
-        ref_point = Point(point.x(), point.y())
-        t = 0.0
-        while t < 1.0:
-            per_point = self.path.pointAtPercent(t)
-            spline_point = Point(per_point.x(), per_point.y())
-            distance = ref_point.distance(spline_point)
-            if distance < min_distance:
-                min_distance = distance
-            t += 0.01
-        return min_distance
+        return self.distance_to_point(Point(point.x(), -point.y()))
 
     def setSelectionChangedCallback(self, callback):
         """
@@ -618,9 +623,9 @@ class ShapeGUI(QGraphicsItem, Shape):
 
 class StMoveGUI(QGraphicsLineItem, StMove):
 
-    def __init__(self, shape):
+    def __init__(self, shape, data=None):
         QGraphicsLineItem.__init__(self)
-        StMove.__init__(self, shape)
+        StMove.__init__(self, shape, data)
 
         self.allwaysshow = False
         self.path = QPainterPath()
@@ -34,7 +34,7 @@ from core.layercontent import Shapes
 from core.point import Point
 from core.boundingbox import BoundingBox
 from core.point3d import Point3D
-from core.stmove import StMove
+from core.stmove import StMove, make_stmoves
 import globals.globals as g
 from gui.canvas import CanvasBase, MyDropDownMenu
 
@@ -185,18 +185,22 @@ class GLWidget(CanvasBase):
         elif event.button() == Qt.LeftButton:
             clicked, offset, tol = self.getClickedDetails(event)
             xyForZ = {}
+            # Shapes whose BoundingBox is near the clicked position
+            candidatesForZ = {}
             for shape in self.shapes:
                 hit = False
                 z = shape.axis3_start_mill_depth
                 if z not in xyForZ:
                     xyForZ[z] = self.determineSelectedPosition(clicked, z, offset)
-                hit |= shape.isHit(xyForZ[z], tol)
+                    candidatesForZ[z] = set(g.window.shapeIndex.at_point(xyForZ[z], tol))
+                hit |= shape in candidatesForZ[z] and shape.isHit(xyForZ[z], tol)
 
                 if not hit:
                     z = shape.axis3_mill_depth
                     if z not in xyForZ:
                         xyForZ[z] = self.determineSelectedPosition(clicked, z, offset)
-                    hit |= shape.isHit(xyForZ[z], tol)
+                        candidatesForZ[z] = set(g.window.shapeIndex.at_point(xyForZ[z], tol))
+                    hit |= shape in candidatesForZ[z] and shape.isHit(xyForZ[z], tol)
 
                 if self.isMultiSelect and shape.selected:
                     hit = not hit
@@ -431,8 +435,9 @@ class GLWidget(CanvasBase):
         GL.glColor4f(r, g, b, a)
 
     def plotAll(self, shapes):
-        for shape in shapes:
-            self.paint_shape(shape)
+        stmoves = make_stmoves(shapes)
+        for shape, stmove in zip(shapes, stmoves):
+            self.paint_shape(shape, stmove)
             self.shapes.append(shape)
         self.drawWpZero()
 
@@ -440,9 +445,19 @@ class GLWidget(CanvasBase):
         GL.glDeleteLists(shape.drawObject, 4)
         self.paint_shape(shape)
 
-    def paint_shape(self, shape):
+    def repaint_all(self):
+        """
+        Repaint all the shapes, e.g. after the transformation of the root
+        entity changed. The bounding box of the scene is calculated again.
+        """
+        self.BB = BoundingBox()
+        for shape in self.shapes:
+            self.repaint_shape(shape)
+        self.update()
+
+    def paint_shape(self, shape, stmove=None):
         shape.drawObject = self.makeShape(shape)  # 1 object
-        shape.stmove = StMove(shape)
+        shape.stmove = StMove(shape) if stmove is None else stmove
         shape.drawStMove = self.makeStMove(shape.stmove)  # 1 object
         shape.drawArrowsDirection = self.makeDirArrows(shape)  # 2 objects
 
@@ -446,6 +446,19 @@ class TreeHandler(QWidget):
         for i in range(6):
             self.ui.entitiesTreeView.resizeColumnToContents(i)
 
+    def updateEntityTransform(self):
+        """
+        Update the base point, scale and rotation of the root entity in the
+        Entities treeView, e.g. after they were changed by the menu.
+        """
+        entity = self.entities_list
+        root_item = self.entity_item_model.invisibleRootItem()
+        if not isinstance(entity, EntityContent) or root_item.rowCount() == 0:
+            return
+        root_item.child(0, 4).setText(str(entity.p0))
+        root_item.child(0, 5).setText(str(entity.sca))
+        root_item.child(0, 6).setText(str(round(degrees(entity.rot), 3)))
+
     def buildEntitiesSubTree(self, elements_model, elements_list):
         """
         This method is called (possibly recursively) to populate the
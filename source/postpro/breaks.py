@@ -30,7 +30,8 @@ from core.linegeo import LineGeo
 from core.arcgeo import ArcGeo
 from core.breakgeo import BreakGeo
 from core.point import Point
-from core.shape import Geos
+from core.shape import Shape, Geos
+from core.shapeindex import ShapeIndex
 
 import globals.constants as c
 if c.PYQT5notPYQT4:
@@ -53,8 +54,12 @@ class Breaks(object):
         If a shape is intersected twice by a break-shape, the shape will be broken.
         """
         self.breakLayers = []
+        breakShapes = []
         for layerContent in self.layerContents.break_layer_iter():
             self.breakLayers.append(layerContent)
+            breakShapes.extend(shape for shape in layerContent.shapes if isinstance(shape, Shape))
+        # Only the break shapes near a geometry are checked for intersections
+        self.breakShapeIndex = ShapeIndex(breakShapes)
 
         logger.debug("Found %d break layers" % len(self.breakLayers))
 
@@ -77,16 +82,17 @@ class Breaks(object):
         @return: The list of geometries after breaking (lineGeo itself if no breaking happened)
         """
         newGeos = Geos([])
-        for breakLayer in self.breakLayers:
-            for breakShape in breakLayer.shapes.not_disabled_iter():
-                intersections = self.intersectLineGeometry(lineGeo, breakShape)
-                if len(intersections) == 2:
-                    (near, far) = self.classifyIntersections(lineGeo, intersections)
-                    logger.debug("Line %s broken from (%f, %f) to (%f, %f)" % (lineGeo.to_short_string(), near.x, near.y, far.x, far.y))
-                    newGeos.extend(self.breakLineGeo(LineGeo(lineGeo.Ps, near)))
-                    newGeos.append(BreakGeo(near, far, breakShape.axis3_mill_depth, breakShape.f_g1_plane, breakShape.f_g1_depth))
-                    newGeos.extend(self.breakLineGeo(LineGeo(far, lineGeo.Pe)))
-                    return newGeos
+        for breakShape in self.breakShapeIndex.intersecting(lineGeo.BB):
+            if breakShape.disabled:
+                continue
+            intersections = self.intersectLineGeometry(lineGeo, breakShape)
+            if len(intersections) == 2:
+                (near, far) = self.classifyIntersections(lineGeo, intersections)
+                logger.debug("Line %s broken from (%f, %f) to (%f, %f)" % (lineGeo.to_short_string(), near.x, near.y, far.x, far.y))
+                newGeos.extend(self.breakLineGeo(LineGeo(lineGeo.Ps, near)))
+                newGeos.append(BreakGeo(near, far, breakShape.axis3_mill_depth, breakShape.f_g1_plane, breakShape.f_g1_depth))
+                newGeos.extend(self.breakLineGeo(LineGeo(far, lineGeo.Pe)))
+                return newGeos
         return [lineGeo]
 
     def breakArcGeo(self, arcGeo):
@@ -96,16 +102,17 @@ class Breaks(object):
         @return: The list of geometries after breaking (arcGeo itself if no breaking happened)
         """
         newGeos = Geos([])
-        for breakLayer in self.breakLayers:
-            for breakShape in breakLayer.shapes.not_disabled_iter():
-                intersections = self.intersectArcGeometry(arcGeo, breakShape)
-                if len(intersections) == 2:
-                    (near, far) = self.classifyIntersections(arcGeo, intersections)
-                    logger.debug("Arc %s broken from (%f, %f) to (%f, %f)" % (arcGeo.toShortString(), near.x, near.y, far.x, far.y))
-                    newGeos.extend(self.breakArcGeo(ArcGeo(Ps=arcGeo.Ps, Pe=near, O=arcGeo.O, r=arcGeo.r, s_ang=arcGeo.s_ang, direction=arcGeo.ext)))
-                    newGeos.append(BreakGeo(near, far, breakShape.axis3_mill_depth, breakShape.f_g1_plane, breakShape.f_g1_depth))
-                    newGeos.extend(self.breakArcGeo(ArcGeo(Ps=far, Pe=arcGeo.Pe, O=arcGeo.O, r=arcGeo.r, e_ang=arcGeo.e_ang, direction=arcGeo.ext)))
-                    return newGeos
+        for breakShape in self.breakShapeIndex.intersecting(arcGeo.BB):
+            if breakShape.disabled:
+                continue
+            intersections = self.intersectArcGeometry(arcGeo, breakShape)
+            if len(intersections) == 2:
+                (near, far) = self.classifyIntersections(arcGeo, intersections)
+                logger.debug("Arc %s broken from (%f, %f) to (%f, %f)" % (arcGeo.toShortString(), near.x, near.y, far.x, far.y))
+                newGeos.extend(self.breakArcGeo(ArcGeo(Ps=arcGeo.Ps, Pe=near, O=arcGeo.O, r=arcGeo.r, s_ang=arcGeo.s_ang, direction=arcGeo.ext)))
+                newGeos.append(BreakGeo(near, far, breakShape.axis3_mill_depth, breakShape.f_g1_plane, breakShape.f_g1_depth))
+                newGeos.extend(self.breakArcGeo(ArcGeo(Ps=far, Pe=arcGeo.Pe, O=arcGeo.O, r=arcGeo.r, e_ang=arcGeo.e_ang, direction=arcGeo.ext)))
+                return newGeos
         return [arcGeo]
 
     def intersectLineGeometry(self, lineGeo, breakShape):
@@ -131,33 +138,44 @@ class Breaks(object):
         """
         # TODO geos should be abs
         intersections = []
+        O = arcGeo.O
+        r = arcGeo.r
         for breakGeo in breakShape.geos.abs_iter():
             if isinstance(breakGeo, LineGeo):
-                dxy = breakGeo.Pe - breakGeo.Ps
-                a = dxy.x**2 + dxy.y**2
-                b = 2 * (dxy.x * (breakGeo.Ps.x - arcGeo.O.x) + dxy.y * (breakGeo.Ps.y - arcGeo.O.y))
-                c = breakGeo.Ps.x**2 + breakGeo.Ps.y**2 + arcGeo.O.x**2 + arcGeo.O.y**2\
-                    - 2 * (arcGeo.O.x * breakGeo.Ps.x + arcGeo.O.y * breakGeo.Ps.y)\
-                    - arcGeo.r**2
+                Ps = breakGeo.Ps
+                Pe = breakGeo.Pe
+                dx = Pe.x - Ps.x
+                dy = Pe.y - Ps.y
+                a = dx**2 + dy**2
+                b = 2 * (dx * (Ps.x - O.x) + dy * (Ps.y - O.y))
+                c = Ps.x**2 + Ps.y**2 + O.x**2 + O.y**2\
+                    - 2 * (O.x * Ps.x + O.y * Ps.y)\
+                    - r**2
                 bb4ac = b * b - 4 * a * c
 
                 if bb4ac > 0:
                     mu1 = (-b + sqrt(bb4ac)) / (2*a)
                     mu2 = (-b - sqrt(bb4ac)) / (2*a)
-                    p1 = breakGeo.Ps + mu1 * dxy
-                    p2 = breakGeo.Ps + mu2 * dxy
+                    x1 = Ps.x + mu1 * dx
+                    y1 = Ps.y + mu1 * dy
+                    x2 = Ps.x + mu2 * dx
+                    y2 = Ps.y + mu2 * dy
 
                     # Points belong to the finite line?
                     if not\
-                        (p1.x < breakGeo.Ps.x and p2.x < breakGeo.Ps.x and p1.x < breakGeo.Pe.x and p2.x < breakGeo.Pe.x or
-                         p1.y < breakGeo.Ps.y and p2.y < breakGeo.Ps.y and p1.y < breakGeo.Pe.y and p2.y < breakGeo.Pe.y or
-                         p1.x > breakGeo.Ps.x and p2.x > breakGeo.Ps.x and p1.x > breakGeo.Pe.x and p2.x > breakGeo.Pe.x or
-                         p1.y > breakGeo.Ps.y and p2.y > breakGeo.Ps.y and p1.y > breakGeo.Pe.y and p2.y > breakGeo.Pe.y):
-
-                        if arcGeo.O.distance(breakGeo.Ps) >= arcGeo.r and self.point_belongs_to_arc(p2, arcGeo):
-                            intersections.append(p2)
-                        if arcGeo.O.distance(breakGeo.Pe) >= arcGeo.r and self.point_belongs_to_arc(p1, arcGeo):
-                            intersections.append(p1)
+                        (x1 < Ps.x and x2 < Ps.x and x1 < Pe.x and x2 < Pe.x or
+                         y1 < Ps.y and y2 < Ps.y and y1 < Pe.y and y2 < Pe.y or
+                         x1 > Ps.x and x2 > Ps.x and x1 > Pe.x and x2 > Pe.x or
+                         y1 > Ps.y and y2 > Ps.y and y1 > Pe.y and y2 > Pe.y):
+
+                        if O.distance_xy(Ps.x, Ps.y) >= r:
+                            p2 = Point(x2, y2)
+                            if self.point_belongs_to_arc(p2, arcGeo):
+                                intersections.append(p2)
+                        if O.distance_xy(Pe.x, Pe.y) >= r:
+                            p1 = Point(x1, y1)
+                            if self.point_belongs_to_arc(p1, arcGeo):
+                                intersections.append(p1)
         return intersections
 
     def point_belongs_to_arc(self, point, arcGeo):
@@ -168,7 +186,7 @@ class Breaks(object):
         """
         Investigate the array intersection (which contains exactly two Point instances) and return (near, far) tuple, depending on the distance of the points to the start point of the geometry geo.
         """
-        if geo.Ps.distance(intersection[0]) < geo.Ps.distance(intersection[1]):
+        if geo.Ps.distance_squared(intersection[0]) < geo.Ps.distance_squared(intersection[1]):
             return (intersection[0], intersection[1])
         else:
             return (intersection[1], intersection[0])
@@ -33,6 +33,8 @@ import logging
 import globals.globals as g
 
 from core.point import Point
+from core.shape import Shape
+from core.stmove import make_stmoves
 from postpro.postprocessorconfig import MyPostProConfig
 from postpro.breaks import Breaks
 
@@ -179,6 +181,14 @@ class MyPostProcessor(object):
                     exstr += self.chg_tool(LayerContent.tool_nr, LayerContent.speed)
                     previous_tool = LayerContent.tool_nr
 
+                # The start moves of the shapes which were not plotted are
+                # created together for the whole layer
+                shapes = [LayerContent.shapes[shape_nr] for shape_nr in LayerContent.exp_order_complete
+                          if isinstance(LayerContent.shapes[shape_nr], Shape) and
+                          LayerContent.shapes[shape_nr].stmove is None]
+                for shape, stmove in zip(shapes, make_stmoves(shapes)):
+                    shape.stmove = stmove
+
                 for shape_nr in LayerContent.exp_order_complete:
                     shape = LayerContent.shapes[shape_nr]
                     logger.debug(self.tr("Beginning export of Shape Nr: %s") % shape.nr)
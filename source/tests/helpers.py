@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""
+Helpers for the tests. They run from the source folder with
+
+    python -m unittest discover -s tests -t .
+"""
+
+from __future__ import absolute_import
+from __future__ import division
+
+import tempfile
+
+import globals.globals as g
+
+
+def init_config():
+    """
+    Creates the default configuration (in a temporary folder) once, as it is
+    done at the start of DXF2GCODE.
+    """
+    if g.config is None:
+        from globals.config import MyConfig
+        g.folder = tempfile.mkdtemp()
+        g.config = MyConfig()
+
+
+def make_shape(points, arcs={}, nr=0):
+    """
+    Creates a closed shape which connects the given points.
+    @param points: list of (x, y)
+    @param arcs: {nr: (r, direction)} for the geometries which are arcs
+    @return: The Shape
+    """
+    from core.arcgeo import ArcGeo
+    from core.linegeo import LineGeo
+    from core.point import Point
+    from core.shape import Shape
+
+    geos = []
+    for i in range(len(points)):
+        Ps = Point(*points[i])
+        Pe = Point(*points[(i + 1) % len(points)])
+        if i in arcs:
+            r, direction = arcs[i]
+            geos.append(ArcGeo(Ps=Ps, Pe=Pe, r=r, direction=direction))
+        else:
+            geos.append(LineGeo(Ps, Pe))
+    return Shape(nr, True, None, geos)
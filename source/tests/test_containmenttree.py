@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import unittest
+
+from tests.helpers import init_config, make_shape
+
+init_config()
+
+from core.containmenttree import ContainmentTree
+from core.shapeindex import ShapeIndex
+
+
+def square(size, x=0, y=0, nr=0):
+    return make_shape([(x, y), (x + size, y), (x + size, y + size), (x, y + size)], nr=nr)
+
+
+class ContainmentTreeTest(unittest.TestCase):
+    def setUp(self):
+        # Two nested squares next to a third one
+        self.outer = square(30, nr=0)
+        self.inner = square(10, 10, 10, nr=1)
+        self.single = square(10, 50, 0, nr=2)
+        self.shapes = [self.outer, self.inner, self.single]
+        # Shapes of another layer around and within the ones of this layer
+        self.others = [square(100, -20, -20, nr=3), square(2, 14, 14, nr=4)]
+
+    def check_tree(self, tree):
+        self.assertEqual(tree.get_depth(self.outer), 0)
+        self.assertEqual(tree.get_depth(self.inner), 1)
+        self.assertEqual(tree.get_depth(self.single), 0)
+        self.assertIs(tree.get_parent(self.inner), self.outer)
+        self.assertIsNone(tree.get_parent(self.outer))
+        self.assertIsNone(tree.get_parent(self.single))
+        for shape in self.others:
+            self.assertEqual(tree.get_depth(shape), 0)
+
+    def test_own_index(self):
+        self.check_tree(ContainmentTree(self.shapes))
+
+    def test_shared_index(self):
+        index = ShapeIndex(self.others + self.shapes)
+        tree = ContainmentTree(self.shapes, index)
+        self.assertIs(tree.index, index)
+        self.check_tree(tree)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import unittest
+from math import pi
+
+from tests.helpers import init_config
+
+init_config()
+
+from core.arcgeo import ArcGeo
+from core.entitycontent import EntityContent
+from core.geostore import StoredArcGeo, StoredLineGeo
+from core.linegeo import LineGeo
+from core.point import Point
+from core.shape import Geos
+
+
+def make_geos():
+    """
+    A closed contour of lines and arcs, the geometries share their points
+    """
+    P1 = Point(0, 0)
+    P2 = Point(10, 0)
+    P3 = Point(10, 10)
+    P4 = Point(0, 10)
+    geos = Geos([LineGeo(P1, P2),
+                 ArcGeo(Ps=P2, Pe=P3, O=Point(10, 5), r=5, direction=1),
+                 LineGeo(P3, P4),
+                 ArcGeo(Ps=P4, Pe=P1, O=Point(0, 5), r=5, direction=1)])
+    parent = EntityContent(nr=0, name='Entities', parent=None, p0=Point(5, 5),
+                           pb=Point(0, 0), sca=[2, 2, 1], rot=pi / 2)
+    geos.make_abs_geos(parent)
+    return geos
+
+
+class GeoStoreTest(unittest.TestCase):
+
+    def assertSamePoint(self, P1, P2):
+        self.assertAlmostEqual(P1.x, P2.x)
+        self.assertAlmostEqual(P1.y, P2.y)
+
+    def assertSameGeo(self, geo1, geo2):
+        self.assertSamePoint(geo1.Ps, geo2.Ps)
+        self.assertSamePoint(geo1.Pe, geo2.Pe)
+        self.assertAlmostEqual(geo1.length, geo2.length)
+        for value in ('xmin', 'ymin', 'xmax', 'ymax'):
+            self.assertAlmostEqual(getattr(geo1.BB, value), getattr(geo2.BB, value))
+        if isinstance(geo1, ArcGeo):
+            self.assertSamePoint(geo1.O, geo2.O)
+            self.assertAlmostEqual(geo1.r, geo2.r)
+            self.assertAlmostEqual(geo1.ext, geo2.ext)
+
+    def test_pack(self):
+        geos = make_geos()
+        packed = geos.pack()
+        self.assertEqual([type(geo) for geo in packed],
+                         [StoredLineGeo, StoredArcGeo, StoredLineGeo, StoredArcGeo])
+        for geo, stored in zip(geos, packed):
+            self.assertSameGeo(geo, stored)
+            self.assertSameGeo(geo.abs_geo, stored.abs_geo)
+            self.assertSameGeo(geo, stored.unpack())
+
+        BB1 = geos.abs_bounding_box()
+        BB2 = packed.abs_bounding_box()
+        for value in ('xmin', 'ymin', 'xmax', 'ymax'):
+            self.assertAlmostEqual(getattr(BB1, value), getattr(BB2, value))
+
+    def test_vertices_of_rows(self):
+        packed = make_geos().pack()
+        packed[0].Pe.x = 11
+        self.assertAlmostEqual(packed[1].Ps.x, 10)
+
+        P = Point(3, 4)
+        packed[2].Ps = P
+        P.x = 5
+        self.assertSamePoint(packed[2].Ps, Point(3, 4))
+        self.assertSamePoint(packed[1].Pe, Point(10, 10))
+        self.assertAlmostEqual(packed[2].length, Point(3, 4).distance(Point(0, 10)))
+
+        packed[3].Pe = packed[0].Ps
+        packed[3].Pe.y = 1
+        self.assertAlmostEqual(packed[0].Ps.y, 0)
+
+    def test_reverse(self):
+        geos = make_geos()
+        packed = geos.pack()
+        for geo, stored in zip(geos, packed):
+            geo.reverse()
+            stored.reverse()
+            self.assertSameGeo(geo, stored)
+            self.assertSameGeo(geo.abs_geo, stored.abs_geo)
+
+
+if __name__ == '__main__':
+    unittest.main()
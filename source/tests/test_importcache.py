@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.helpers import init_config
+
+init_config()
+
+import globals.globals as g
+from core.arcgeo import ArcGeo
+from core.linegeo import LineGeo
+from dxfimport.importcache import CACHE_EXTENSION, ImportCache
+from dxfimport.importer import ReadDXF
+
+DXF_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'dxf')
+
+
+def describe_geo(geo):
+    if isinstance(geo, LineGeo):
+        return ('line', geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y)
+    elif isinstance(geo, ArcGeo):
+        return ('arc', geo.Ps.x, geo.Ps.y, geo.Pe.x, geo.Pe.y, geo.O.x, geo.O.y,
+                geo.r, geo.s_ang, geo.e_ang, geo.ext, geo.length)
+    return ('hole', geo.Ps.x, geo.Ps.y)
+
+
+def describe_entities(entities):
+    """
+    @return: all the values of the entities which are stored in the cache
+    """
+    geoents = []
+    for geoent in entities.geo:
+        values = [geoent.Typ, geoent.Nr, geoent.Layer_Nr, geoent.length]
+        if geoent.Typ == 'Insert':
+            values += [geoent.BlockName, geoent.Point.x, geoent.Point.y,
+                       geoent.rot, list(geoent.Scale)]
+        else:
+            values += [describe_geo(geo) for geo in geoent.geo]
+        geoents.append(values)
+    conts = [(cont.cont_nr, cont.closed, cont.order, cont.length) for cont in entities.cont]
+    return entities.Nr, entities.Name, (entities.basep.x, entities.basep.y), geoents, conts
+
+
+def describe_values(values):
+    return ([layer.name for layer in values.layers],
+            [describe_entities(entities) for entities in values.blocks.Entities + [values.entities]])
+
+
+class ImportCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = ImportCache(self.folder)
+        self.cache_size = g.config.vars.Import_Parameters['import_cache_size']
+
+    def tearDown(self):
+        g.config.vars.Import_Parameters['import_cache_size'] = self.cache_size
+        shutil.rmtree(self.folder)
+
+    def test_round_trip(self):
+        filename = os.path.join(DXF_FOLDER, 'Blocktest.dxf')
+        values = ReadDXF(filename)
+        metric = g.config.metric
+        key = self.cache.get_key(filename)
+        self.cache.store(key, values)
+
+        g.config.metric = 1 - metric
+        loaded = self.cache.load(key)
+        self.assertIsNotNone(loaded)
+        self.assertEqual(g.config.metric, metric)
+
+        expected = describe_values(values)
+        # Inserts and blocks are part of the test
+        self.assertTrue(expected[1][:-1])
+        self.assertIn('Insert', [geoent[0] for geoent in expected[1][-1][3]])
+        self.assertEqual(describe_values(loaded), expected)
+
+    def test_truncated_file(self):
+        filename = os.path.join(DXF_FOLDER, 'Blocktest.dxf')
+        key = self.cache.get_key(filename)
+        self.cache.store(key, ReadDXF(filename))
+
+        cache_filename = self.cache.get_filename(key)
+        with open(cache_filename, 'rb') as file_:
+            data = file_.read()
+        with open(cache_filename, 'wb') as file_:
+            file_.write(data[:len(data) // 2])
+
+        with self.assertLogs('DxfImport.ImportCache', logging.WARNING):
+            self.assertIsNone(self.cache.load(key))
+        self.assertFalse(os.path.exists(cache_filename))
+
+    def test_evict(self):
+        g.config.vars.Import_Parameters['import_cache_size'] = 1
+        # Three files of 400 kB, the oldest one is not the first by name
+        names = ['a', 'b', 'c']
+        mtimes = [2000000000, 1000000000, 1500000000]
+        for name, mtime in zip(names, mtimes):
+            filename = os.path.join(self.folder, name + CACHE_EXTENSION)
+            with open(filename, 'wb') as file_:
+                file_.write(b"\0" * 400 * 1024)
+            os.utime(filename, (mtime, mtime))
+
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.folder)),
+                         ['a' + CACHE_EXTENSION, 'c' + CACHE_EXTENSION])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.helpers import init_config
+
+init_config()
+
+import globals.globals as g
+from core.point import Point
+from dxfimport.classes import PointsClass
+from dxfimport.importer import GeoLength, ReadDXF, pack_contour_job, search_contours_job
+import dxfimport.importer as importer
+
+# Two lines meet the middle of a third one
+T_JUNCTION = [((0, 0), (10, 0)), ((10, 0), (20, 0)), ((10, 0), (10, 10))]
+# A closed square with a T-junction at one corner
+SQUARE_WITH_T = [((0, 0), (10, 0)), ((10, 0), (10, 10)), ((10, 10), (0, 10)),
+                 ((0, 10), (0, 0)), ((10, 0), (15, -5)), ((10, 0), (15, 5)),
+                 ((0, 10), (-3, 13))]
+# Open paths which branch several times
+BRANCHES = [((0, 0), (1, 0)), ((1, 0), (2, 0)), ((1, 0), (1, 8)),
+            ((2, 0), (3, 0)), ((2, 0), (2, -9)), ((0, 0), (-1, 0)),
+            ((-1, 0), (-2, 0)), ((-1, 0), (-1, 7)), ((1, 8), (3, 8)), ((1, 8), (1, 12))]
+
+
+
+def grid(n, size=10, x=0):
+    """
+    Lines of a grid with n x n cells, all inner points are T- or X-junctions
+    """
+    lines = []
+    for j in range(n + 1):
+        for i in range(n):
+            lines.append(((x + i * size, j * size), (x + (i + 1) * size, j * size)))
+            lines.append(((x + j * size, i * size), (x + j * size, (i + 1) * size)))
+    return lines
+
+
+def make_points(lines):
+    return [PointsClass(point_nr=nr, geo_nr=nr, Layer_Nr=0,
+                        be=Point(*be), en=Point(*en), be_cp=[], en_cp=[])
+            for nr, (be, en) in enumerate(lines)]
+
+
+def search_contours(lines, method, reader=None):
+    geo = [GeoLength(Point(*be).distance(Point(*en))) for be, en in lines]
+    conts = (reader or ReadDXF()).Search_Block_Contours(geo, make_points(lines), 1e-3, method)
+    return [(cont.closed, cont.order, cont.length) for cont in conts]
+
+
+def make_dxf(lines):
+    """
+    @return: DXF data with only an ENTITIES section, which contains the lines
+    """
+    data = ["0", "SECTION", "2", "ENTITIES"]
+    for (x1, y1), (x2, y2) in lines:
+        data += ["0", "LINE", "8", "0", "10", str(x1), "20", str(y1),
+                 "11", str(x2), "21", str(y2)]
+    data += ["0", "ENDSEC", "0", "EOF"]
+    return "\n".join(data) + "\n"
+
+
+class ContourSearchTest(unittest.TestCase):
+
+    def assertSameContours(self, lines):
+        recursive = search_contours(lines, 'recursive')
+        graph = search_contours(lines, 'graph')
+        self.assertEqual(len(recursive), len(graph))
+        for cont1, cont2 in zip(recursive, graph):
+            self.assertEqual(cont1[:2], cont2[:2])
+            self.assertAlmostEqual(cont1[2], cont2[2])
+        # Every geometry is used once
+        nrs = sorted(nr for cont in graph for nr, _ in cont[1])
+        self.assertEqual(nrs, list(range(len(lines))))
+
+    def test_t_junction(self):
+        self.assertSameContours(T_JUNCTION)
+        self.assertSameContours(T_JUNCTION[::-1])
+        self.assertSameContours([(en, be) for be, en in T_JUNCTION])
+
+    def test_square_with_t(self):
+        self.assertSameContours(SQUARE_WITH_T)
+        self.assertSameContours([(en, be) for be, en in SQUARE_WITH_T])
+
+    def test_branches(self):
+        conts = search_contours(BRANCHES, 'graph')
+        # The longest path through the first line
+        self.assertEqual(conts[0][1], [[7, 1], [5, 1], [0, 0], [2, 0], [9, 0]])
+        self.assertAlmostEqual(conts[0][2], 21)
+
+    def test_max_paths(self):
+        max_paths = importer.MAX_CONTOUR_PATHS
+        importer.MAX_CONTOUR_PATHS = 2
+        reader = ReadDXF()
+        try:
+            conts = search_contours(BRANCHES, 'graph', reader)
+            job = pack_contour_job([GeoLength(1)] * len(BRANCHES),
+                                   make_points(BRANCHES), 1e-3, 'graph')
+            job_conts, truncated_searches = search_contours_job(job)
+        finally:
+            importer.MAX_CONTOUR_PATHS = max_paths
+        self.assertGreater(reader.truncated_searches, 0)
+        self.assertGreater(truncated_searches, 0)
+        nrs = sorted(nr for cont in conts for nr, _ in cont[1])
+        self.assertEqual(nrs, list(range(len(BRANCHES))))
+        nrs = sorted(nr for cont in job_conts for nr, _ in cont[2])
+        self.assertEqual(nrs, list(range(len(BRANCHES))))
+
+    def test_max_paths_warning(self):
+        """
+        The stopped searches of an import are reported by one warning
+        """
+        folder = tempfile.mkdtemp()
+        filename = os.path.join(folder, 'grids.dxf')
+        with open(filename, 'w') as file_:
+            file_.write(make_dxf(grid(3) + grid(3, x=100)))
+        params = g.config.vars.Import_Parameters
+        contour_search = params['contour_search']
+        max_paths = importer.MAX_CONTOUR_PATHS
+        params['contour_search'] = 'graph'
+        importer.MAX_CONTOUR_PATHS = 10
+        try:
+            with self.assertLogs('DxfImport.Import', logging.WARNING) as logs:
+                values = ReadDXF(filename)
+        finally:
+            params['contour_search'] = contour_search
+            importer.MAX_CONTOUR_PATHS = max_paths
+            shutil.rmtree(folder)
+        # At least one search per grid
+        self.assertGreaterEqual(values.truncated_searches, 2)
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("%i contours" % values.truncated_searches, logs.output[0])
+        nrs = sorted(nr for cont in values.entities.cont for nr, _ in cont.order)
+        self.assertEqual(nrs, list(range(48)))
+
+
+if __name__ == '__main__':
+    unittest.main()
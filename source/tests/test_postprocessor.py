@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import globals.globals as g
+from tests.helpers import init_config, make_shape
+
+init_config()
+
+from core.customgcode import CustomGCode
+from core.layercontent import LayerContent, Layers
+from postpro.postprocessor import MyPostProcessor
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_custom_gcode_in_layer(self):
+        layer = LayerContent(0, 'MILL:0', [])
+        shape = make_shape([(0, 0), (10, 0), (10, 10), (0, 10)], nr=0)
+        shape.parentLayer = layer
+        custom = CustomGCode('Custom', 1, '(CUSTOM GCODE)', layer)
+        layer.shapes = [shape, custom]
+        layer.exp_order_complete = [0, 1]
+
+        postpro = MyPostProcessor()
+        postpro.getPostProVars(0)
+        filename = os.path.join(self.folder, 'export.ngc')
+        postpro.exportShapes('test.dxf', filename, Layers([layer]))
+
+        with open(filename) as f:
+            exstr = f.read()
+        self.assertIsNotNone(shape.stmove)
+        self.assertIn('(CUSTOM GCODE)', exstr)
+        self.assertIn('* SHAPE Nr: 1 *', exstr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests.helpers import init_config
+
+init_config()
+
+from dxfimport.importer import ReadDXF
+
+DXF_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'dxf')
+
+
+class ReadDXFTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def read(self, data, newline):
+        filename = os.path.join(self.folder, 'test.dxf')
+        with open(filename, 'wb') as file_:
+            file_.write(newline.join(data.splitlines()) + newline)
+        values = ReadDXF(filename)
+        return ([layer.name for layer in values.layers],
+                [(geo.Typ, geo.Layer_Nr) for geo in values.entities.geo],
+                [len(entities.cont) for entities in values.blocks.Entities + [values.entities]])
+
+    def test_line_endings(self):
+        with open(os.path.join(DXF_FOLDER, 'Linieblock.dxf'), 'rb') as file_:
+            data = file_.read()
+        expected = self.read(data, b"\n")
+        self.assertTrue(expected[1])
+        self.assertEqual(self.read(data, b"\r\n"), expected)
+        self.assertEqual(self.read(data, b"\r"), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
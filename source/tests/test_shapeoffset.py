@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import logging
+import unittest
+
+from tests.helpers import init_config, make_shape
+
+init_config()
+
+from core.linegeo import LineGeo
+from core.point import Point
+from core.rapidpos import RapidPos
+from core.shapeoffset import offShapeClass, offPocketClass
+
+SQUARE = [(0, 0), (10, 0), (10, 10), (0, 10)]
+U_SHAPE = [(0, 0), (60, 0), (60, 60), (40, 60), (40, 20), (20, 20), (20, 60), (0, 60)]
+# Two squares which are joined by a neck of 10
+DUMBBELL = [(0, 0), (100, 0), (100, 45), (150, 45), (150, 0), (250, 0),
+            (250, 100), (150, 100), (150, 55), (100, 55), (100, 100), (0, 100)]
+
+
+class PocketTest(unittest.TestCase):
+
+    def assertContinuous(self, geos):
+        for geo1, geo2 in zip(geos, geos[1:]):
+            if not isinstance(geo1, RapidPos) and not isinstance(geo2, RapidPos):
+                self.assertLess(geo1.Pe.distance(geo2.Ps), 1e-6)
+
+    def test_square(self):
+        pocket = offPocketClass(parent=make_shape(SQUARE), offset=1, stepover=0.8)
+        self.assertEqual(len(pocket.rings), 5)
+        for ring in pocket.rings:
+            self.assertTrue(pocket.is_simple_ring(ring))
+            self.assertLess(pocket.get_ring_area(ring), 0)
+        self.assertContinuous(pocket.geos)
+
+    def test_neck(self):
+        logging.disable(logging.ERROR)
+        try:
+            pocket = offPocketClass(parent=make_shape(DUMBBELL), offset=3, stepover=3)
+        finally:
+            logging.disable(logging.NOTSET)
+
+        # The second ring would run through both walls of the neck
+        self.assertEqual(len(pocket.rings), 1)
+        for geo in pocket.rings[0]:
+            for P in (geo.Ps, geo.Pe):
+                if 100 < P.x < 150:
+                    self.assertTrue(abs(P.y - 48) < 1e-6 or abs(P.y - 52) < 1e-6)
+
+    def test_link_inside_ring(self):
+        pocket = offPocketClass(parent=make_shape(SQUARE), offset=1, stepover=0.8)
+        ring = offShapeClass(parent=make_shape(U_SHAPE), offset=1, offtype='in').rawoff
+        # From the left to the right leg of the U, across the gap
+        self.assertFalse(pocket.is_inside_ring(LineGeo(Point(10, 50), Point(41, 59)), ring))
+        self.assertTrue(pocket.is_inside_ring(LineGeo(Point(10, 10), Point(59, 1)), ring))
+
+    def test_links_of_u_shape(self):
+        pocket = offPocketClass(parent=make_shape(U_SHAPE), offset=1, stepover=2)
+        self.assertGreater(len(pocket.rings), 1)
+        self.assertContinuous(pocket.geos)
+        outer = pocket.rings[0]
+        for geo in pocket.geos:
+            if isinstance(geo, LineGeo) and not any(geo is ring_geo for ring in pocket.rings for ring_geo in ring):
+                self.assertTrue(pocket.is_inside_ring(geo, outer))
+
+
+if __name__ == '__main__':
+    unittest.main()
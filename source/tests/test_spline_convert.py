@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import unittest
+from math import cos, sin, radians
+
+from tests.helpers import init_config
+
+init_config()
+
+from core.arcgeo import ArcGeo
+from core.point import Point
+from dxfimport.spline_convert import SplineCache, Spline2Arcs
+
+DEGREE = 3
+KNOTS = [0, 0, 0, 0, 1, 2, 3, 3, 3, 3]
+WEIGHTS = [1, 1, 1, 1, 1, 1]
+CPOINTS = [(0, 0), (10, 0), (15, 10), (5, 20), (-5, 15), (0, 30)]
+TOL = 0.01
+
+
+def place(points, ang, offset):
+    cos_ang = cos(ang)
+    sin_ang = sin(ang)
+    return [Point(x * cos_ang - y * sin_ang + offset[0], x * sin_ang + y * cos_ang + offset[1])
+            for x, y in points]
+
+
+class SplineCacheTest(unittest.TestCase):
+
+    def convert(self, cache, CPoints):
+        return cache.convert(degree=DEGREE, Knots=KNOTS, Weights=WEIGHTS,
+                             CPoints=CPoints, tol=TOL, check=1)
+
+    def assertSameCurve(self, curve1, curve2):
+        """
+        The biarc fitting depends a bit on the orientation, so the curves are
+        compared within the tolerance of the conversion.
+        """
+        self.assertLess(curve1[0].Ps.distance(curve2[0].Ps), 1e-6)
+        self.assertLess(curve1[-1].Pe.distance(curve2[-1].Pe), 1e-6)
+        for geo1, geo2 in zip(curve1, curve1[1:]):
+            self.assertLess(geo1.Pe.distance(geo2.Ps), 1e-6)
+        for geo1 in curve1:
+            for P in (geo1.Ps, geo1.Pe):
+                self.assertLess(min(self.distance(geo2, P) for geo2 in curve2), 2 * TOL)
+
+    def distance(self, geo, P):
+        if isinstance(geo, ArcGeo):
+            return geo.distance_a_p(P)
+        return geo.distance_l_p(P)
+
+    def test_moved_and_rotated(self):
+        cache = SplineCache()
+        first = self.convert(cache, place(CPOINTS, 0, (0, 0)))
+        for ang, offset in ((0, (100, 50)), (radians(90), (0, 0)), (radians(-33), (-20, 7))):
+            CPoints = place(CPOINTS, ang, offset)
+            curve = self.convert(cache, CPoints)
+            direct = Spline2Arcs(degree=DEGREE, Knots=KNOTS, Weights=WEIGHTS,
+                                 CPoints=CPoints, tol=TOL, check=1).Curve
+            self.assertSameCurve(curve, direct)
+            self.assertEqual(len(curve), len(first))
+            for geo1, geo2 in zip(curve, first):
+                P = place([(geo2.Pe.x, geo2.Pe.y)], ang, offset)[0]
+                self.assertLess(geo1.Pe.distance(P), 1e-6)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, 3)
+
+    def test_other_shape(self):
+        cache = SplineCache()
+        self.convert(cache, place(CPOINTS, 0, (0, 0)))
+        self.convert(cache, place(CPOINTS[:-1] + [(0, 31)], 0, (0, 0)))
+        self.assertEqual(cache.misses, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
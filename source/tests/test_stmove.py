@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import unittest
+
+import globals.globals as g
+from tests.helpers import init_config
+
+init_config()
+
+from core.arcgeo import ArcGeo
+from core.entitycontent import EntityContent
+from core.layercontent import LayerContent
+from core.linegeo import LineGeo
+from core.point import Point
+from core.shape import Shape, STMOVE_CACHE_SIZE
+from core.stmove import (StMove, init_stmove_worker, make_stmoves, pack_config,
+                          pack_geos, pack_stmove_job, stmove_job)
+
+
+def make_shape(start_radius=0.0, nr=0, size=20, cut_cor=41):
+    """
+    A closed shape of lines and an arc within a scaled and rotated entity
+    """
+    parent = EntityContent(nr=0, name='Entities', parent=None, p0=Point(5, 5),
+                           pb=Point(0, 0), sca=[2, 2, 1], rot=0.5)
+    geos = [LineGeo(Point(0, 0), Point(size, 0)),
+            ArcGeo(Ps=Point(size, 0), Pe=Point(size, size), O=Point(size, size / 2),
+                   r=size / 2, direction=1),
+            LineGeo(Point(size, size), Point(0, size)),
+            LineGeo(Point(0, size), Point(0, 0))]
+    for geo in geos:
+        geo.make_abs_geo(parent)
+    shape = Shape(nr, True, parent, geos)
+    shape.parentLayer = LayerContent(0, 'MILL:0', [shape])
+    shape.parentLayer.start_radius = start_radius
+    shape.cut_cor = cut_cor
+    return shape
+
+
+def make_shapes():
+    """
+    Shapes with both cutter compensations, the ones with G42 are pockets
+    """
+    return [make_shape(nr=nr, size=10 + 5 * nr, cut_cor=41 + nr % 2)
+            for nr in range(6)]
+
+
+def stmove_data(stmove):
+    types, coords = pack_geos(stmove.geos.abs_iter())
+    return list(types), list(coords), stmove.pocket
+
+
+class StMoveCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.done_by_machine = g.config.vars.Cutter_Compensation['done_by_machine']
+        # The offsets are calculated by DXF2GCODE
+        g.config.vars.Cutter_Compensation['done_by_machine'] = False
+
+    def tearDown(self):
+        g.config.vars.Cutter_Compensation['done_by_machine'] = self.done_by_machine
+
+    def test_switch_cut_cor(self):
+        shape = make_shape()
+        first = stmove_data(StMove(shape))
+        cached = shape.get_stmove_data()
+        self.assertIsNotNone(cached)
+
+        shape.switch_cut_cor()
+        self.assertEqual(shape.cut_cor, 42)
+        self.assertIsNone(shape.get_stmove_data())
+        self.assertNotEqual(stmove_data(StMove(shape)), first)
+
+        shape.switch_cut_cor()
+        self.assertIs(shape.get_stmove_data(), cached)
+        self.assertEqual(stmove_data(StMove(shape)), first)
+        # Same as a calculation without the cache
+        self.assertEqual(stmove_data(StMove(make_shape())), first)
+
+    def test_geos_changed(self):
+        shape = make_shape()
+        StMove(shape)
+        shape.reverse()
+        self.assertIsNone(shape.get_stmove_data())
+
+        reversed_shape = make_shape()
+        reversed_shape.reverse()
+        self.assertEqual(stmove_data(StMove(shape)), stmove_data(StMove(reversed_shape)))
+
+        shape.setNearestStPoint(shape.geos.abs_el(2).Ps)
+        self.assertIsNone(shape.get_stmove_data())
+
+    def test_transform_changed(self):
+        shape = make_shape()
+        StMove(shape)
+        shape.parentEntity.sca = [3, 3, 1]
+        self.assertIsNone(shape.get_stmove_data())
+
+        StMove(shape)
+        self.assertIsNotNone(shape.get_stmove_data())
+        shape.parentEntity.rot = 1.0
+        self.assertIsNone(shape.get_stmove_data())
+
+    def test_cache_size(self):
+        shape = make_shape()
+        start_radii = [float(nr) for nr in range(STMOVE_CACHE_SIZE + 1)]
+        for start_radius in start_radii:
+            shape.parentLayer.start_radius = start_radius
+            StMove(shape)
+
+        shape.parentLayer.start_radius = start_radii[0]
+        self.assertIsNone(shape.get_stmove_data())
+        for start_radius in start_radii[1:]:
+            shape.parentLayer.start_radius = start_radius
+            self.assertIsNotNone(shape.get_stmove_data())
+
+
+class StMoveWorkersTest(unittest.TestCase):
+
+    def setUp(self):
+        compensation = g.config.vars.Cutter_Compensation
+        self.values = dict((name, compensation[name]) for name in
+                           ('done_by_machine', 'pocketing', 'compensation_workers'))
+        compensation['done_by_machine'] = False
+        compensation['pocketing'] = True
+
+    def tearDown(self):
+        for name, value in self.values.items():
+            g.config.vars.Cutter_Compensation[name] = value
+
+    def make_stmoves(self, workers):
+        g.config.vars.Cutter_Compensation['compensation_workers'] = workers
+        return [stmove_data(stmove) for stmove in make_stmoves(make_shapes())]
+
+    def test_pool(self):
+        expected = self.make_stmoves(1)
+        self.assertTrue(all(data[2] for data in expected[1::2]))
+        self.assertEqual(self.make_stmoves(2), expected)
+
+    def test_spawned_worker(self):
+        """
+        Worker processes which were not forked get the config of the main
+        process
+        """
+        shapes = make_shapes()
+        expected = [stmove_data(StMove(shape)) for shape in shapes]
+        jobs = [pack_stmove_job(shape) for shape in make_shapes()]
+        config = g.config
+        config_state = pack_config()
+        g.config = None
+        try:
+            init_stmove_worker(config_state)
+            self.assertIsNot(g.config, config)
+            results = [stmove_job(job) for job in jobs]
+        finally:
+            g.config = config
+        self.assertEqual([(list(types), list(coords), pocket)
+                          for types, coords, pocket in results], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
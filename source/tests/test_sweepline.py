@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+from __future__ import division
+
+import random
+import unittest
+from math import sqrt, pi, cos, sin
+
+from tests.helpers import init_config
+
+init_config()
+
+from core.arcgeo import ArcGeo
+from core.linegeo import LineGeo
+from core.point import Point
+from core.sweepline import SweepLine
+
+tol = 1e-7
+
+
+def on_arc(arc, x, y):
+    return arc.PointAng_withinArc(Point(x, y)) or \
+        min(arc.Ps.distance_xy(x, y), arc.Pe.distance_xy(x, y)) <= tol
+
+
+def line_line(line1, line2):
+    """
+    Brute force intersection of two lines, the ends of the overlap for lines
+    which lie on each other
+    """
+    A, B, C, D = line1.Ps, line1.Pe, line2.Ps, line2.Pe
+    rx, ry = B.x - A.x, B.y - A.y
+    sx, sy = D.x - C.x, D.y - C.y
+    qx, qy = C.x - A.x, C.y - A.y
+    denom = rx * sy - ry * sx
+    if abs(denom) > 1e-12:
+        t = (qx * sy - qy * sx) / denom
+        u = (qx * ry - qy * rx) / denom
+        if -tol <= t <= 1 + tol and -tol <= u <= 1 + tol:
+            return [(A.x + t * rx, A.y + t * ry)]
+        return []
+    if abs(qx * ry - qy * rx) > 1e-12:
+        return []
+    rr = rx * rx + ry * ry
+    t0 = (qx * rx + qy * ry) / rr
+    t1 = ((D.x - A.x) * rx + (D.y - A.y) * ry) / rr
+    lo, hi = max(0.0, min(t0, t1)), min(1.0, max(t0, t1))
+    if lo > hi + tol:
+        return []
+    return [(A.x + t * rx, A.y + t * ry) for t in (lo, hi)]
+
+
+def line_arc(line, arc):
+    A, B, O, r = line.Ps, line.Pe, arc.O, arc.r
+    dx, dy = B.x - A.x, B.y - A.y
+    fx, fy = A.x - O.x, A.y - O.y
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return []
+    points = []
+    for t in ((-b - sqrt(disc)) / (2 * a), (-b + sqrt(disc)) / (2 * a)):
+        x, y = A.x + t * dx, A.y + t * dy
+        if -tol <= t <= 1 + tol and on_arc(arc, x, y):
+            points.append((x, y))
+    return points
+
+
+def arc_arc(arc1, arc2):
+    O1, O2 = arc1.O, arc2.O
+    d = O1.distance(O2)
+    if d < 1e-12 or d > arc1.r + arc2.r or d < abs(arc1.r - arc2.r):
+        return []
+    a = (arc1.r ** 2 - arc2.r ** 2 + d * d) / (2 * d)
+    h = sqrt(max(arc1.r ** 2 - a * a, 0))
+    mx = O1.x + a * (O2.x - O1.x) / d
+    my = O1.y + a * (O2.y - O1.y) / d
+    points = []
+    for sign in (1, -1):
+        x = mx + sign * h * (O2.y - O1.y) / d
+        y = my - sign * h * (O2.x - O1.x) / d
+        if on_arc(arc1, x, y) and on_arc(arc2, x, y):
+            points.append((x, y))
+    return points
+
+
+def brute_force(geos):
+    """
+    @return: {(nr1, nr2): [(x, y), ...]} of all pairs of geometries
+    """
+    found = {}
+    for nr1 in range(len(geos)):
+        for nr2 in range(nr1 + 1, len(geos)):
+            geo1, geo2 = geos[nr1], geos[nr2]
+            if isinstance(geo1, LineGeo) and isinstance(geo2, LineGeo):
+                points = line_line(geo1, geo2)
+            elif isinstance(geo1, LineGeo):
+                points = line_arc(geo1, geo2)
+            elif isinstance(geo2, LineGeo):
+                points = line_arc(geo2, geo1)
+            else:
+                points = arc_arc(geo1, geo2)
+            if points:
+                found[(nr1, nr2)] = points
+    return found
+
+
+def sweep(geos):
+    """
+    @return: the intersections of the sweep line like brute_force(). The
+    geometries are no contour, so all common points are reported.
+    """
+    sweep_line = SweepLine([], closed=False)
+    for geo in geos:
+        sweep_line.add_to_sweep_array([geo], closed=False)
+    found = {}
+    for iPoint, geo1, geo2 in sweep_line.search_intersections():
+        nr1, nr2 = sorted((geos.index(geo1), geos.index(geo2)))
+        found.setdefault((nr1, nr2), []).append((iPoint.x, iPoint.y))
+    return found
+
+
+def make_arc(O, r, s_ang, ext):
+    e_ang = s_ang + ext
+    return ArcGeo(Ps=Point(O.x + r * cos(s_ang), O.y + r * sin(s_ang)),
+                  Pe=Point(O.x + r * cos(e_ang), O.y + r * sin(e_ang)),
+                  O=O, r=r, direction=ext)
+
+
+class SweepLineTest(unittest.TestCase):
+
+    def assertSameIntersections(self, geos):
+        expected = brute_force(geos)
+        found = sweep(geos)
+        self.assertEqual(sorted(found), sorted(expected))
+        for pair, points in expected.items():
+            # The same point may be found twice by the brute force (e.g. at a
+            # common end point)
+            unique = []
+            for x, y in points:
+                if all(abs(x - ux) > 1e-6 or abs(y - uy) > 1e-6 for ux, uy in unique):
+                    unique.append((x, y))
+            self.assertEqual(len(found[pair]), len(unique), pair)
+            for x, y in unique:
+                self.assertTrue(any(abs(x - fx) < 1e-6 and abs(y - fy) < 1e-6
+                                    for fx, fy in found[pair]), pair)
+
+    def test_lines(self):
+        rnd = random.Random(1)
+        for _ in range(30):
+            # Lines on a grid, many of them vertical, horizontal, overlapping
+            # or with common end points
+            geos = []
+            for _ in range(15):
+                Ps = Point(rnd.randint(0, 6), rnd.randint(0, 6))
+                Pe = Point(rnd.randint(0, 6), rnd.randint(0, 6))
+                if Ps != Pe:
+                    geos.append(LineGeo(Ps, Pe))
+            self.assertSameIntersections(geos)
+
+    def test_lines_and_arcs(self):
+        rnd = random.Random(2)
+        for _ in range(30):
+            geos = []
+            for _ in range(8):
+                geos.append(LineGeo(Point(rnd.randint(0, 10), rnd.randint(0, 10)),
+                                    Point(rnd.randint(0, 10), rnd.randint(0, 10))))
+                geos.append(make_arc(Point(rnd.uniform(0, 10), rnd.uniform(0, 10)),
+                                     rnd.uniform(0.5, 5), rnd.uniform(-pi, pi),
+                                     rnd.choice((-1, 1)) * rnd.uniform(0.2, 1.9 * pi)))
+            geos = [geo for geo in geos if geo.length > 0]
+            self.assertSameIntersections(geos)
+
+    def test_vertical_and_overlapping(self):
+        geos = [LineGeo(Point(2, 0), Point(2, 10)),
+                LineGeo(Point(2, 5), Point(2, 15)),
+                LineGeo(Point(0, 7), Point(10, 7)),
+                LineGeo(Point(2, 10), Point(2, 12)),
+                LineGeo(Point(0, 0), Point(4, 8))]
+        self.assertSameIntersections(geos)
+        found = sweep(geos)
+        self.assertEqual(sorted(found[(0, 1)]), [(2, 5), (2, 10)])
+
+    def test_overlapping_arcs(self):
+        O = Point(0, 0)
+        arc1 = make_arc(O, 5, 0, pi)
+        arc2 = make_arc(O, 5, pi / 2, pi)
+        line = LineGeo(Point(-6, 1), Point(6, 1))
+        found = sweep([arc1, arc2, line])
+        self.assertEqual(len(found[(0, 1)]), 2)
+        for x, y in ((0, 5), (-5, 0)):
+            self.assertTrue(any(abs(x - fx) < 1e-6 and abs(y - fy) < 1e-6
+                                for fx, fy in found[(0, 1)]))
+        self.assertEqual(len(found[(0, 2)]), 2)
+        self.assertEqual(len(found[(1, 2)]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()